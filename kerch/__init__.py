@@ -9,10 +9,17 @@ __license__ = "LGPL-3.0"
 # GLOBAL MODULE-WIDE VARIABLES
 _GLOBALS = {"PLOT_ENV": None,
             "LOG_LEVEL": 30,  # this corresponds to logging.WARNING
+            "CACHE_BUDGET": None,  # global cache budget in bytes
+            "CACHE_FINGERPRINT": "pointer",  # identification of the inputs in the cache keys
+            "CACHE_DIRECTORY": None,  # directory of the disk cache
+            "CACHE_PROFILE": None,  # file of the measurements of the automatic cache level
             }
 
 __all__ = ['__version__', '__author__', '__credits__', '__status__', '__date__', '__license__',
            'kernel', 'level', 'model', 'data', 'train', 'opt', 'set_logging_level', 'get_logging_level',
+           'set_cache_budget', 'get_cache_budget', 'set_cache_fingerprint', 'get_cache_fingerprint',
+           'set_cache_directory', 'get_cache_directory', 'set_cache_profile', 'get_cache_profile',
+           'save_cache_profile',
            'gpu_available',
            'set_ftype', 'set_itype', 'DEFAULT_KERNEL_TYPE', 'DEFAULT_CACHE_LEVEL', 'FTYPE', 'ITYPE']
 
@@ -29,6 +36,15 @@ from . import script as script  # alpha
 from . import method as method  # alpha
 from .feature.logger import (set_logging_level as set_logging_level,
                              get_logging_level as get_logging_level)
+from .feature.cache import (set_cache_budget as set_cache_budget,
+                            get_cache_budget as get_cache_budget,
+                            set_cache_fingerprint as set_cache_fingerprint,
+                            get_cache_fingerprint as get_cache_fingerprint)
+from .feature._cache_disk import (set_cache_directory as set_cache_directory,
+                                  get_cache_directory as get_cache_directory)
+from .feature._cache_stats import (set_cache_profile as set_cache_profile,
+                                   get_cache_profile as get_cache_profile,
+                                   save_cache_profile as save_cache_profile)
 from .utils import (gpu_available as gpu_available,
                     FTYPE as FTYPE,
                     ITYPE as ITYPE,
@@ -0,0 +1,339 @@
+# coding=utf-8
+"""
+Disk tier of the cache, part of :py:class:`kerch.feature.Cache`: the entries spilled to memory-mapped temporary files
+and the entries written to a directory shared across processes.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+import atexit
+import shutil
+import hashlib
+import tempfile
+import weakref
+import itertools
+import numpy as np
+import torch
+from typing import Union, List, Any
+
+from .. import _GLOBALS, __version__
+from ..utils import reverse_dict, fingerprint, DEFAULT_CACHE_DISK
+
+# temporary directory of the spilled entries of all instances, created when first required
+_SPILL_DIRECTORY = None
+
+
+def _spill_directory() -> str:
+    global _SPILL_DIRECTORY
+    if _SPILL_DIRECTORY is None:
+        _SPILL_DIRECTORY = tempfile.mkdtemp(prefix='kerch_spill_')
+        atexit.register(shutil.rmtree, _SPILL_DIRECTORY, ignore_errors=True)
+    return _SPILL_DIRECTORY
+
+
+def _remove_files(files: dict) -> None:
+    for file in files.values():
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+
+class _Spilled:
+    r"""
+    Tensor of a cache entry spilled to memory-mapped files in a temporary directory. The files are removed as soon as
+    the entry is dropped.
+
+    The tensor can be compressed when written:
+
+    * ``'none'``: the values are written as such and paged back in lazily when accessed.
+    * ``'symmetric'``: only the upper triangle of a symmetric matrix is written (e.g. a kernel matrix).
+    * ``'sparse'``: only the non-zero values and their indices are written (e.g. a compactly supported kernel).
+    * ``'auto'``: the representation requiring the least bytes is chosen.
+    """
+
+    compressions = ['none', 'symmetric', 'sparse', 'auto']
+
+    def __init__(self, val: torch.Tensor, compression: str = 'auto'):
+        self.shape, self.dtype, self.device = val.shape, val.dtype, val.device
+        values = val.detach().cpu()
+        self.compression = _Spilled._compression(values) if compression == 'auto' else compression
+        if self.compression == 'symmetric':
+            rows, cols = torch.triu_indices(self.shape[0], self.shape[1])
+            arrays = {'values': values[rows, cols]}
+        elif self.compression == 'sparse':
+            indices = torch.nonzero(values.reshape(-1)).squeeze(1)
+            arrays = {'indices': indices, 'values': values.reshape(-1)[indices]}
+        else:
+            arrays = {'values': values}
+
+        self.files = {}
+        weakref.finalize(self, _remove_files, self.files)
+        prefix = os.path.join(_spill_directory(), uuid.uuid4().hex)
+        for name, array in arrays.items():
+            self.files[name] = f"{prefix}_{name}.npy"
+            np.save(self.files[name], array.numpy())
+        self.nbytes = sum(os.path.getsize(file) for file in self.files.values())
+
+    @staticmethod
+    def _compression(values: torch.Tensor) -> str:
+        size = values.element_size()
+        costs = {'none': values.numel() * size,
+                 'sparse': int(torch.count_nonzero(values)) * (size + 8)}
+        if values.dim() == 2 and values.shape[0] == values.shape[1] and torch.equal(values, values.T):
+            costs['symmetric'] = values.shape[0] * (values.shape[0] + 1) // 2 * size
+        return min(costs, key=costs.get)
+
+    def load(self) -> torch.Tensor:
+        arrays = {name: torch.from_numpy(np.load(file, mmap_mode='c')) for name, file in self.files.items()}
+        if self.compression == 'symmetric':
+            val = torch.empty(self.shape, dtype=self.dtype)
+            rows, cols = torch.triu_indices(self.shape[0], self.shape[1])
+            val[rows, cols] = arrays['values']
+            val[cols, rows] = arrays['values']
+        elif self.compression == 'sparse':
+            val = torch.zeros(self.shape.numel(), dtype=self.dtype)
+            val[arrays['indices']] = arrays['values']
+            val = val.reshape(self.shape)
+        else:
+            val = arrays['values']
+        return val.to(device=self.device, dtype=self.dtype)
+
+    def __str__(self):
+        return f"Spilled tensor of shape {tuple(self.shape)} ({self.compression}, {self.nbytes} bytes on disk)"
+
+
+def set_cache_directory(path: str | None):
+    r"""
+    Sets a directory where the expensive cache entries of the sample (kernel matrices, feature maps, decompositions...)
+    are also written. The entries are identified by a hash of the class, the parameters and the hyperparameters of the
+    module, so that a directory can be shared across processes and restarts: an entry computed once is loaded from the
+    disk by any module in the same state. Defaults to ``None``, which corresponds to no disk cache.
+
+    :param path: Path of the cache directory. It is created if it does not exist.
+    :type path: str, optional
+
+    Usage:
+
+    .. code-block:: python
+
+        import kerch
+
+        kerch.set_cache_directory('~/.cache/kerch')
+    """
+    if path is not None:
+        path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+        os.makedirs(path, exist_ok=True)
+    _GLOBALS["CACHE_DIRECTORY"] = path
+
+
+def get_cache_directory() -> str | None:
+    r"""
+    Returns the directory of the disk cache, ``None`` corresponding to no disk cache.
+    """
+    return _GLOBALS["CACHE_DIRECTORY"]
+
+
+def _disk_write(path: str, val) -> bool:
+    r"""
+    Writes a tensor or a tuple of tensors as a directory of ``.npy`` files. The directory is first written under a
+    temporary name and then renamed, so that a concurrent reader never sees a partial entry.
+    """
+    values = [val] if isinstance(val, torch.Tensor) else val
+    if not isinstance(values, (tuple, list)) or not all(isinstance(v, torch.Tensor) for v in values):
+        return False
+    if os.path.isdir(path):
+        return True
+    tmp = tempfile.mkdtemp(prefix='.tmp_', dir=os.path.dirname(path))
+    try:
+        if isinstance(val, torch.Tensor):
+            np.save(os.path.join(tmp, 'tensor.npy'), val.detach().cpu().numpy())
+        else:
+            for num, v in enumerate(values):
+                np.save(os.path.join(tmp, f'{num}.npy'), v.detach().cpu().numpy())
+        os.replace(tmp, path)
+    except (OSError, TypeError):
+        # another process has written the same entry in the meantime, or the type is not supported by numpy
+        shutil.rmtree(tmp, ignore_errors=True)
+        return os.path.isdir(path)
+    return True
+
+
+def _disk_read(path: str, device) -> Any:
+    r"""
+    Reads an entry written by :py:func:`_disk_write`. The files are memory-mapped (copy-on-write), so that their content
+    is only loaded when accessed.
+    """
+    if not os.path.isdir(path):
+        return None
+    try:
+        file = os.path.join(path, 'tensor.npy')
+        if os.path.isfile(file):
+            return torch.from_numpy(np.load(file, mmap_mode='c')).to(device)
+        values = []
+        while os.path.isfile(os.path.join(path, f'{len(values)}.npy')):
+            file = os.path.join(path, f'{len(values)}.npy')
+            values.append(torch.from_numpy(np.load(file, mmap_mode='c')).to(device))
+        return tuple(values)
+    except (OSError, ValueError):
+        return None
+
+
+class _CacheDisk:
+    r"""
+    Disk tier of the cache: the entries spilled to memory-mapped temporary files (see
+    :ref:`Spilling <cache-spilling>`) and the ones written to the cache directory.
+    """
+
+    @property
+    def cache_directory(self) -> str | None:
+        r"""
+        Directory where the expensive cache entries of the sample (see ``kerch.utils.DEFAULT_CACHE_DISK``) are also
+        written, so that they are loaded instead of computed again by any module in the same state, possibly in
+        another process. Defaults to the global directory set by :py:func:`kerch.set_cache_directory`.
+        """
+        if self._cache_directory is None:
+            return _GLOBALS["CACHE_DIRECTORY"]
+        return self._cache_directory
+
+    @cache_directory.setter
+    def cache_directory(self, val: str | None):
+        if val is not None:
+            val = os.path.abspath(os.path.expanduser(os.fspath(val)))
+            os.makedirs(val, exist_ok=True)
+        self._cache_directory = val
+
+    def _disk_state(self, dependencies: Union[List[str], None] = None, visiting: set | None = None) -> list:
+        r"""
+        Description of the state of the module identifying its cache entries on the disk: its class, the values of
+        its parameters, tensors and hyperparameters, and the ones of its children. Contrary to
+        :py:meth:`~kerch.feature.Cache._cache_sources`, it does not depend on the instance.
+        """
+        def describe(val):
+            if isinstance(val, torch.Tensor):
+                return fingerprint(val, content=True, num_sampled=None)
+            if isinstance(val, (bool, int, float, str, range, type(None))):
+                return repr(val)
+            if isinstance(val, (tuple, list)):
+                values = [describe(v) for v in val]
+                return None if None in values else values
+            return None
+
+        state = [type(self).__module__ + '.' + type(self).__qualname__]
+        for name, val in sorted(self.__dict__.items()):
+            if not name.startswith('_cache'):
+                description = describe(val)
+                if description is not None:
+                    state.append((name, description))
+        for name, param in sorted(self._parameters.items()):
+            if dependencies is None or name in dependencies:
+                state.append((name, None if param is None else self._disk_digest(name)))
+        for name, buffer in sorted(self._buffers.items()):
+            if dependencies is None or name in dependencies:
+                state.append((name, describe(buffer)))
+
+        # the modules may reference each other (e.g. the transforms and their parent)
+        visiting = set() if visiting is None else visiting
+        if id(self) in visiting:
+            return state
+        visiting.add(id(self))
+        for name, child in sorted(self._modules.items()):
+            if isinstance(child, _CacheDisk) and (dependencies is None or 'child_' + name in dependencies):
+                state.append((name, child._disk_state(visiting=visiting)))
+        visiting.discard(id(self))
+        return state
+
+    def _disk_digest(self, name: str) -> str:
+        r"""
+        Content digest of the parameter ``name``. The digests are kept with the stamp of the module (see
+        :py:meth:`~kerch.feature.Cache._cache_stamp`), so that the sample is only hashed once per version and not on
+        every miss.
+        """
+        current = self._cache_digests
+        if current is None or not self._cache_fresh(current[0]):
+            current = (self._cache_stamp(), {})
+            self._cache_digests = current
+        digests = current[1]
+        if name not in digests:
+            digests[name] = fingerprint(self._parameters[name], content=True, num_sampled=None)
+        return digests[name]
+
+    def _disk_path(self, key, level_key) -> str | None:
+        r"""
+        Path of the cache entry on the disk, ``None`` if it is not meant to be written there. The entries depending on
+        parameters that require a gradient are not written, as their computational graph would be lost.
+        """
+        directory = self.cache_directory
+        if directory is None or level_key not in DEFAULT_CACHE_DISK:
+            return None
+        if torch.is_grad_enabled() and any(param.requires_grad for param in self.parameters()):
+            return None
+        description = repr((__version__, key, self._disk_state(self._cache_dependencies(key))))
+        return os.path.join(directory, hashlib.blake2b(description.encode(), digest_size=16).hexdigest())
+
+    def _disk_device(self) -> torch.device:
+        for tensor in itertools.chain(self.parameters(), self.buffers()):
+            return tensor.device
+        return torch.device('cpu')
+
+    @property
+    def cache_spill_level(self) -> str | None:
+        r"""
+        Level from which the tensors are spilled to memory-mapped temporary files instead of being kept in memory,
+        ``None`` corresponding to no spilling. The spilled entries are paged back in when read. This makes the
+        ``'heavy'`` and ``'total'`` levels usable when the memory is limited.
+        """
+        if self._cache_spill_level is None:
+            return None
+        return reverse_dict(self._cache_level_switcher)[self._cache_spill_level]
+
+    @cache_spill_level.setter
+    def cache_spill_level(self, val: Union[str, int, None]):
+        self._cache_spill_level = None if val is None else self._get_level(val)
+        self._share_settings()
+
+    @property
+    def cache_spill_bytes(self) -> int | None:
+        r"""
+        Size in bytes from which the tensors are spilled to memory-mapped temporary files, ``None`` corresponding to
+        no spilling based on the size.
+        """
+        return self._cache_spill_bytes
+
+    @cache_spill_bytes.setter
+    def cache_spill_bytes(self, val: int | None):
+        assert val is None or val >= 0, "The spilling size must be positive."
+        self._cache_spill_bytes = val
+        self._share_settings()
+
+    @property
+    def cache_spill_compression(self) -> str:
+        r"""
+        Default compression of the spilled tensors (see :ref:`Spilling <cache-spilling>`), either ``'none'``,
+        ``'symmetric'``, ``'sparse'`` or ``'auto'``.
+        """
+        return self._cache_spill_compression
+
+    @cache_spill_compression.setter
+    def cache_spill_compression(self, val: str):
+        val = val.lower()
+        if val not in _Spilled.compressions:
+            raise ValueError(f"Unknown spill compression {val}. The compression must be either 'none', 'symmetric', "
+                             f"'sparse' or 'auto'.")
+        self._cache_spill_compression = val
+        self._share_settings()
+
+    @property
+    def cache_spilled_bytes(self) -> int:
+        r"""
+        Number of bytes of the entries of this module spilled to the disk.
+        """
+        return sum(val[2].nbytes for val in self._cache.values() if isinstance(val[2], _Spilled))
+
+    def _spills(self, level: int, val, size: int) -> bool:
+        if not isinstance(val, torch.Tensor) or val.requires_grad or val.dim() == 0:
+            # the computational graph of the tensors requiring a gradient would be lost
+            return False
+        return (self._cache_spill_level is not None and level >= self._cache_spill_level) or \
+            (self._cache_spill_bytes is not None and size >= self._cache_spill_bytes)
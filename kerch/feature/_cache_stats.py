@@ -0,0 +1,266 @@
+# coding=utf-8
+"""
+Statistics of the cache entries and profile of the automatic cache level, part of :py:class:`kerch.feature.Cache`.
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import atexit
+import tempfile
+import itertools
+import threading
+
+from .. import _GLOBALS
+from ..utils import reverse_dict
+from ._cache_disk import _Spilled
+from ._cache_storage import _Reduced
+
+# maximum number of keys of which the statistics are kept by each instance once their entry has left the cache
+_STATS_HISTORY = 1024
+# computations, reuses, total computation time and total size of the entries of each class and default level key,
+# used by cache_level='auto' (see set_cache_profile)
+_PROFILE = {}
+_PROFILE_LOCK = threading.Lock()
+# whether the profile is written when the process exits, only once a profile file has been set
+_PROFILE_AT_EXIT = False
+
+
+def set_cache_profile(path: str | None):
+    r"""
+    Sets a file where the measurements of the automatic cache level (``cache_level='auto'``) are kept across
+    processes. If the file exists, its measurements are loaded, so that a repeated job starts with the decisions learned
+    by the previous ones. The measurements are written to the file when the process exits or when calling
+    :py:func:`kerch.save_cache_profile`. Defaults to ``None``, which corresponds to no profile file.
+
+    :param path: Path of the profile file, typically one per workload.
+    :type path: str, optional
+
+    Usage:
+
+    .. code-block:: python
+
+        import kerch
+
+        kerch.set_cache_profile('kpca_mnist.json')
+        model = kerch.level.KPCA(sample=x, cache_level='auto')
+    """
+    global _PROFILE_AT_EXIT
+    if path is not None:
+        path = os.path.abspath(os.path.expanduser(os.fspath(path)))
+        if os.path.isfile(path):
+            with open(path, 'r') as file:
+                profile = {key: list(value) for key, value in json.load(file).items()}
+            with _PROFILE_LOCK:
+                _PROFILE.update(profile)
+        if not _PROFILE_AT_EXIT:
+            atexit.register(save_cache_profile)
+            _PROFILE_AT_EXIT = True
+    _GLOBALS["CACHE_PROFILE"] = path
+
+
+def get_cache_profile() -> str | None:
+    r"""
+    Returns the path of the file of the automatic cache level measurements, ``None`` corresponding to no file.
+    """
+    return _GLOBALS["CACHE_PROFILE"]
+
+
+def save_cache_profile(path: str | None = None) -> None:
+    r"""
+    Writes the measurements of the automatic cache level to a file. The file is first written under a temporary name and
+    then renamed, so that concurrent jobs never read a partial profile.
+
+    :param path: Path of the profile file. Defaults to the one set by :py:func:`kerch.set_cache_profile`.
+    :type path: str, optional
+    """
+    path = _GLOBALS["CACHE_PROFILE"] if path is None else os.path.abspath(os.path.expanduser(os.fspath(path)))
+    if path is None:
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, tmp = tempfile.mkstemp(prefix='.tmp_', dir=directory)
+    with _PROFILE_LOCK:
+        profile = {key: list(value) for key, value in _PROFILE.items()}
+    with os.fdopen(descriptor, 'w') as file:
+        json.dump(profile, file)
+    os.replace(tmp, path)
+
+
+class _CacheStats:
+    r"""
+    Statistics of the cache entries (see :py:meth:`~kerch.feature.Cache.cache_stats`) and measurements of the
+    automatic cache level.
+    """
+
+    def _profile_key(self, key, level_key=None) -> str:
+        if level_key is None and key in self._cache_statistics:
+            level_key = self._cache_statistics[key]['level_key']
+        return f"{type(self).__qualname__}/{key if level_key is None else level_key}"
+
+    def _saving(self, key, level_key=None) -> float:
+        r"""
+        Expected computation time saved per byte by keeping the entry, according to the profile.
+        """
+        computes, reuses, cost, size = _PROFILE.get(self._profile_key(key, level_key), (0, 0, 0., 0))
+        if computes == 0:
+            return 0.
+        return reuses * cost / (computes * max(size, 1))
+
+    def _worth(self, key, level_key, level: int, size: int) -> bool:
+        r"""
+        Decides whether an entry is saved with ``cache_level='auto'``. Without measurement, the default level is used.
+        Otherwise, the entry is saved if it has been reused. Under memory pressure, it must also save more time per byte
+        than the least profitable entry that would be evicted for it.
+        """
+        computes, reuses, _, _ = _PROFILE.get(self._profile_key(key, level_key), (0, 0, 0., 0))
+        if computes < 2 and reuses == 0:
+            return level <= self._cache_level
+        if reuses == 0:
+            return False
+        budgets = [budget for budget in [self._cache_budget, _GLOBALS["CACHE_BUDGET"]] if budget is not None]
+        if not budgets:
+            return True
+        if size > min(budgets):
+            return False
+        if self._cache_bytes + size <= min(budgets):
+            return True
+        saving = self._saving(key, level_key)
+        return any(self._saving(other) < saving for other in self._evictable_keys())
+
+    def _record(self, key, level_key=None, hit: bool = False, disk: bool = False, compute_time: float = 0.,
+                size: int = 0) -> None:
+        r"""
+        Records an access to the cache entry ``key`` in the statistics (see
+        :py:meth:`~kerch.feature.Cache.cache_stats`) and in the profile used by ``cache_level='auto'``.
+        """
+        with self._cache_lock:
+            statistics = self._update_statistics(key, level_key, hit, disk, compute_time)
+            misses = statistics['misses']
+
+        # the profile counts the computations and the reuses, including the computations of a key already computed
+        with _PROFILE_LOCK:
+            profile = _PROFILE.setdefault(self._profile_key(key), [0, 0, 0., 0])
+            if hit:
+                profile[1] += 1
+            elif not disk:
+                profile[0] += 1
+                profile[1] += misses > 1
+                profile[2] += compute_time
+                profile[3] += size
+
+    def _update_statistics(self, key, level_key, hit: bool, disk: bool, compute_time: float) -> dict:
+        statistics = self._cache_statistics.get(key)
+        if statistics is None:
+            if len(self._cache_statistics) >= len(self._cache) + _STATS_HISTORY:
+                # the statistics of the keys that have left the cache for the longest time are dropped
+                dropped = sorted((k for k in self._cache_statistics if k not in self._cache),
+                                 key=lambda k: self._cache_statistics[k]['last_access'])
+                for k in dropped[:len(dropped) // 2 + 1]:
+                    self._cache_statistics.pop(k)
+            statistics = {'level_key': level_key, 'hits': 0, 'misses': 0, 'disk_loads': 0, 'compute_time': 0.,
+                          'last_access': None}
+            self._cache_statistics[key] = statistics
+        if level_key is not None:
+            statistics['level_key'] = level_key
+        if hit:
+            statistics['hits'] += 1
+        elif disk:
+            statistics['disk_loads'] += 1
+        else:
+            statistics['misses'] += 1
+            statistics['compute_time'] += compute_time
+        statistics['last_access'] = time.time()
+        return statistics
+
+    def _collect_stats(self, name: str, columns: dict, visited: set) -> None:
+        visited.add(id(self))
+        with self._cache_lock:
+            cache, info = self._cache, self._cache_info
+            rows = [(key, dict(statistics)) for key, statistics in self._cache_statistics.items()]
+        for key, statistics in rows:
+            entry = cache.get(key)
+            columns['module'].append(name)
+            columns['key'].append(key)
+            columns['level'].append(None if entry is None else reverse_dict(self._cache_level_switcher)[entry[0]])
+            columns['bytes'].append(info[key][0] if entry is not None else 0)
+            columns['spilled_bytes'].append(entry[2].nbytes if entry is not None and isinstance(entry[2], _Spilled)
+                                            else 0)
+            reduced = entry[2] if entry is not None and isinstance(entry[2], _Reduced) else None
+            columns['storage'].append(None if reduced is None else reduced.storage)
+            columns['storage_error'].append(None if reduced is None else reduced.error)
+            for field, value in statistics.items():
+                columns[field].append(value)
+
+        for key, entry in cache.items():
+            if isinstance(entry[2], _CacheStats) and id(entry[2]) not in visited:
+                entry[2]._collect_stats(f"{name}[{key}]", columns, visited)
+        for child_name, child in self._modules.items():
+            if isinstance(child, _CacheStats) and id(child) not in visited:
+                child._collect_stats(f"{name}.{child_name}", columns, visited)
+
+    def cache_stats(self) -> dict:
+        r"""
+        Statistics of the cache entries of this module, of its children and of the transforms, one row per key. This
+        allows to identify the entries that are often used or expensive and to tune the cache levels accordingly. The
+        statistics of a key are kept after its entry has left the cache, e.g. to count the misses of an entry computed
+        again after a reset.
+
+        The statistics are returned as a dictionary of columns, which can directly be turned into a
+        ``pandas.DataFrame``:
+
+        * ``'module'``: path of the module in the hierarchy, the transform trees being given between brackets.
+        * ``'key'``: key of the entry.
+        * ``'level'``: current cache level of the entry, ``None`` if it is not in the cache.
+        * ``'bytes'``: number of bytes currently held in memory.
+        * ``'spilled_bytes'``: number of bytes currently spilled to the disk.
+        * ``'storage'``: storage type of the entry if reduced (see :ref:`Storage Precision <cache-storage>`), e.g.
+          ``'bfloat16'`` or ``'float32 packed'``, ``None`` otherwise.
+        * ``'storage_error'``: maximal error of the reduced entry relative to its largest magnitude, ``None`` if it is
+          not reduced.
+        * ``'level_key'``: key of the default level in ``kerch.DEFAULT_CACHE_LEVEL``, if any.
+        * ``'hits'``: number of times the entry has been read from the cache.
+        * ``'misses'``: number of times the entry has been computed.
+        * ``'disk_loads'``: number of times the entry has been loaded from the disk directory.
+        * ``'compute_time'``: total time in seconds spent computing the entry, including the entries it reads.
+        * ``'last_access'``: time of the last access, in seconds since the epoch.
+
+        :return: Dictionary of columns.
+        :rtype: dict
+
+        Usage:
+
+        .. code-block:: python
+
+            import pandas as pd
+
+            stats = pd.DataFrame(model.cache_stats())
+            print(stats.groupby('level_key')[['hits', 'misses', 'compute_time']].sum())
+        """
+        columns = {field: [] for field in ['module', 'key', 'level', 'bytes', 'spilled_bytes', 'storage',
+                                           'storage_error', 'level_key', 'hits', 'misses', 'disk_loads',
+                                           'compute_time', 'last_access']}
+        self._collect_stats(type(self).__name__, columns, set())
+        return columns
+
+    def reset_cache_stats(self, recurse: bool = True) -> None:
+        r"""
+        Resets the statistics of the cache entries (see :py:meth:`~kerch.feature.Cache.cache_stats`).
+
+        :param recurse: If ``True``, the statistics of the children and of the transforms are also reset. Defaults to
+            ``True``.
+        :type recurse: bool, optional
+        """
+        visited = set()
+
+        def reset(cache: _CacheStats):
+            visited.add(id(cache))
+            cache._cache_statistics = {}
+            if recurse:
+                caches = [entry[2] for entry in cache._cache.values() if isinstance(entry[2], _CacheStats)]
+                for other in itertools.chain(caches, cache.children()):
+                    if isinstance(other, _CacheStats) and id(other) not in visited:
+                        reset(other)
+
+        reset(self)
@@ -0,0 +1,164 @@
+# coding=utf-8
+"""
+Storage of the cache entries with a reduced footprint, part of :py:class:`kerch.feature.Cache`.
+"""
+from __future__ import annotations
+
+import torch
+from typing import Union
+
+from ..utils import reverse_dict, DEFAULT_CACHE_EXACT
+
+
+def _sizeof(val) -> int:
+    r"""
+    Number of bytes held by a cache entry. The tensors contained in tuples, lists and dictionaries are also counted.
+    Other cache modules are not counted as they account for their own entries.
+    """
+    if isinstance(val, torch.Tensor):
+        return val.numel() * val.element_size()
+    if isinstance(val, (tuple, list)):
+        return sum(_sizeof(v) for v in val)
+    if isinstance(val, dict):
+        return sum(_sizeof(v) for v in val.values())
+    return 0
+
+
+class _Reduced:
+    r"""
+    Tensor of a cache entry stored in memory with a reduced footprint and restored to its original type when read.
+
+    * ``dtype``: the values are stored in a floating type of lower precision (``torch.float16`` or
+      ``torch.bfloat16``).
+    * ``packed``: only the upper triangle of a symmetric matrix is stored.
+
+    The maximal error relative to the largest magnitude of the tensor is measured when stored. It is infinite if the
+    values overflow the reduced type.
+    """
+
+    dtypes = {'float16': torch.float16, 'bfloat16': torch.bfloat16}
+
+    def __init__(self, val: torch.Tensor, dtype: torch.dtype | None = None, packed: bool = False):
+        self.shape, self.dtype = val.shape, val.dtype
+        values = val.detach()
+        self.packed = packed and values.dim() == 2 and values.shape[0] == values.shape[1] and \
+            torch.equal(values, values.T)
+        if self.packed:
+            rows, cols = torch.triu_indices(self.shape[0], self.shape[1], device=values.device)
+            values = values[rows, cols]
+        self.values = values if dtype is None else values.to(dtype)
+        self.nbytes = _sizeof(self.values)
+        if dtype is None:
+            self.error = 0.
+        else:
+            finite = torch.isfinite(values)
+            if not torch.equal(torch.isfinite(self.values), finite):
+                # out of the range of the reduced type, e.g. above 65504 in float16
+                self.error = float('inf')
+            elif not finite.any():
+                self.error = 0.
+            else:
+                values, reduced = values[finite], self.values[finite].to(self.dtype)
+                scale = torch.max(torch.abs(values)).item()
+                error = torch.max(torch.abs(reduced - values)).item()
+                self.error = error / scale if scale > 0 else 0.
+
+    def load(self) -> torch.Tensor:
+        values = self.values.to(self.dtype)
+        if not self.packed:
+            return values
+        val = torch.empty(self.shape, dtype=self.dtype, device=values.device)
+        rows, cols = torch.triu_indices(self.shape[0], self.shape[1], device=values.device)
+        val[rows, cols] = values
+        val[cols, rows] = values
+        return val
+
+    @property
+    def storage(self) -> str:
+        name = str(self.values.dtype).replace('torch.', '')
+        return name + ' packed' if self.packed else name
+
+    def __str__(self):
+        return f"Reduced tensor of shape {tuple(self.shape)} ({self.storage}, {self.nbytes} bytes)"
+
+
+class _CacheStorage:
+    r"""
+    Storage policy of the cache entries: the tensors stored from a given level are kept in a floating type of lower
+    precision or packed (see :ref:`Storage Precision <cache-storage>`).
+    """
+
+    @property
+    def cache_storage_dtype(self) -> str | None:
+        r"""
+        Floating type in which the tensors stored at :py:attr:`~kerch.feature.Cache.cache_storage_level` or above are
+        kept, either ``'float16'``, ``'bfloat16'`` or ``None`` (same type as computed). They are restored to their
+        original type when read (see :ref:`Storage Precision <cache-storage>`).
+        """
+        return self._cache_storage_dtype
+
+    @cache_storage_dtype.setter
+    def cache_storage_dtype(self, val: str | None):
+        if isinstance(val, torch.dtype):
+            val = str(val).replace('torch.', '')
+        if val is not None and val not in _Reduced.dtypes:
+            raise ValueError(f"Unknown storage type {val}. The storage type must be either 'float16', 'bfloat16' or "
+                             f"None.")
+        self._cache_storage_dtype = val
+        self._share_settings()
+
+    @property
+    def cache_storage_packed(self) -> bool:
+        r"""
+        Indicates whether only the upper triangle of the symmetric matrices stored at
+        :py:attr:`~kerch.feature.Cache.cache_storage_level` or above is kept.
+        """
+        return self._cache_storage_packed
+
+    @cache_storage_packed.setter
+    def cache_storage_packed(self, val: bool):
+        self._cache_storage_packed = bool(val)
+        self._share_settings()
+
+    @property
+    def cache_storage_level(self) -> str:
+        r"""
+        Level from which the storage policy (:py:attr:`~kerch.feature.Cache.cache_storage_dtype` and
+        :py:attr:`~kerch.feature.Cache.cache_storage_packed`) applies.
+        """
+        return reverse_dict(self._cache_level_switcher)[self._cache_storage_level]
+
+    @cache_storage_level.setter
+    def cache_storage_level(self, val: Union[str, int]):
+        self._cache_storage_level = self._get_level(val)
+        self._share_settings()
+
+    @property
+    def cache_storage_tolerance(self) -> float:
+        r"""
+        Maximal error relative to the largest magnitude of a tensor stored with
+        :py:attr:`~kerch.feature.Cache.cache_storage_dtype`. The tensors exceeding it, or overflowing the type, are
+        kept in full precision.
+        """
+        return self._cache_storage_tolerance
+
+    @cache_storage_tolerance.setter
+    def cache_storage_tolerance(self, val: float):
+        val = float(val)
+        if val < 0:
+            raise ValueError(f"The storage tolerance must be non-negative ({val}).")
+        self._cache_storage_tolerance = val
+        self._share_settings()
+
+    def _reduces(self, level: int, val, level_key=None) -> bool:
+        if self._cache_storage_dtype is None and not self._cache_storage_packed:
+            return False
+        if not isinstance(val, torch.Tensor) or not val.is_floating_point() or val.requires_grad or val.dim() == 0:
+            return False
+        if level_key in DEFAULT_CACHE_EXACT:
+            # the entries feeding decompositions are kept exact
+            return False
+        if self._cache_storage_dtype is not None and \
+                val.element_size() <= torch.empty(0, dtype=_Reduced.dtypes[self._cache_storage_dtype]).element_size():
+            return False
+        return level >= self._cache_storage_level
@@ -5,22 +5,175 @@ which can also be ported like torch.nn.Parameters are, on GPU for example.
 """
 from __future__ import annotations
 
+import time
+import weakref
+import itertools
+import threading
 import torch
 from typing import Union, List, Iterable, Any, Type
 from abc import ABCMeta
 
 from .module import Module
-from ..utils import reverse_dict, extend_docstring, DEFAULT_CACHE_LEVEL
+from ._cache_disk import _CacheDisk, _Spilled, _disk_write, _disk_read
+from ._cache_stats import _CacheStats
+from ._cache_storage import _CacheStorage, _Reduced, _sizeof
+from .. import _GLOBALS
+from ..utils import reverse_dict, extend_docstring, fingerprint, DEFAULT_CACHE_LEVEL
+
+# all living cache instances, required to enforce the global budget
+_INSTANCES = weakref.WeakSet()
+# thread-local state, e.g. the modules whose sources are being collected to avoid infinite recursions
+_LOCAL = threading.local()
+# access counter shared by all instances, so that the least recently used entries can be compared across modules
+_CLOCK = itertools.count()
+
+
+def _visiting() -> set:
+    r"""
+    Modules whose sources are being collected by the current thread.
+    """
+    if not hasattr(_LOCAL, 'visiting'):
+        _LOCAL.visiting = set()
+    return _LOCAL.visiting
+
+
+class _Flight:
+    r"""
+    Computation of a cache entry by a thread, which the other threads requiring the same entry wait for instead of
+    computing it again.
+    """
+    __slots__ = ['thread', 'event', 'done', 'value']
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.event = threading.Event()
+        self.done = False
+        self.value = None
+
+
+def set_cache_budget(budget: int | None):
+    r"""
+    Sets a global budget in bytes shared by the caches of all the kerch modules. When the total size of the caches
+    exceeds it, entries are evicted across all modules, following the eviction policy of each of them (see
+    :py:attr:`kerch.feature.Cache.cache_eviction`). Defaults to ``None``, which corresponds to no global budget.
+
+    :param budget: Global cache budget in bytes.
+    :type budget: int, optional
+
+    Usage:
+
+    .. code-block:: python
+
+        import kerch
+
+        kerch.set_cache_budget(2 ** 30)  # 1 GiB
+    """
+    assert budget is None or budget >= 0, "The cache budget must be positive."
+    _GLOBALS["CACHE_BUDGET"] = budget
+    _enforce_global_budget()
+
+
+def get_cache_budget() -> int | None:
+    r"""
+    Returns the global cache budget in bytes, ``None`` corresponding to no global budget.
+    """
+    return _GLOBALS["CACHE_BUDGET"]
+
+
+def set_cache_fingerprint(mode: str):
+    r"""
+    Sets how the inputs are identified in the keys of the out-of-sample cache entries (see
+    :py:func:`kerch.utils.fingerprint`). Defaults to ``'pointer'``.
+
+    * ``'pointer'``: the inputs are identified by their storage and version counter. This is cheap, but the same
+      values passed as a new tensor are computed again.
+    * ``'content'``: the inputs are identified by a hash of all their values. The same values passed as a new tensor,
+      e.g. repeated inference batches, are then loaded from the cache.
+
+    :param mode: Fingerprint mode, either ``'pointer'`` or ``'content'``.
+    :type mode: str
+    """
+    mode = mode.lower()
+    if mode not in ['pointer', 'content']:
+        raise ValueError(f"Unknown fingerprint mode {mode}. The mode must be either 'pointer' or 'content'.")
+    _GLOBALS["CACHE_FINGERPRINT"] = mode
+
+
+def get_cache_fingerprint() -> str:
+    r"""
+    Returns how the inputs are identified in the keys of the out-of-sample cache entries, either ``'pointer'`` or
+    ``'content'``.
+    """
+    return _GLOBALS["CACHE_FINGERPRINT"]
+
+
+def _enforce_global_budget(exclude=None) -> None:
+    budget = _GLOBALS["CACHE_BUDGET"]
+    if budget is None:
+        return
+    instances = list(_INSTANCES)
+    excess = sum(cache._cache_bytes for cache in instances) - budget
+    if excess <= 0:
+        return
+    # the locks are taken one module at a time, so that two threads enforcing the budget cannot deadlock
+    candidates = list()
+    for cache in instances:
+        with cache._cache_lock:
+            candidates.extend((cache._eviction_priority(key), cache, key)
+                              for key in cache._evictable_keys() if (cache, key) != exclude)
+    # the victims are gathered first and evicted together from each module
+    victims = dict()
+    for _, cache, key in sorted(candidates, key=lambda c: c[0]):
+        if excess <= 0:
+            break
+        victims.setdefault(cache, []).append(key)
+        excess -= cache._cache_info.get(key, [0])[0]
+    for cache, keys in victims.items():
+        cache._evict(keys)
 
 
 @extend_docstring(Module)
 class Cache(Module,
+            _CacheDisk,  # spilled entries and disk directory
+            _CacheStorage,  # reduced storage of the entries
+            _CacheStats,  # statistics and automatic cache level
             metaclass=ABCMeta):
     r"""
     :param cache_level: Cache level for saving temporary execution results during the execution. The higher the cache,
         the more is saved. Defaults to ``'normal'``. We refer to the :doc:`/features/cache` documentation for further
         information.
     :type cache_level: str, optional
+    :param cache_budget: Maximum number of bytes held by the cache of this module. When exceeded, entries are evicted
+        according to ``cache_eviction``. Defaults to ``None``, which corresponds to no budget.
+    :type cache_budget: int, optional
+    :param cache_eviction: Eviction policy when the budget is exceeded, either ``'lru'`` (least recently used first) or
+        ``'cost'`` (lowest computation time per byte first). Defaults to ``'lru'``.
+    :type cache_eviction: str, optional
+    :param cache_directory: Directory where the expensive entries of the sample are also written and loaded from
+        across processes. Defaults to ``None``, which corresponds to the global directory set by
+        :py:func:`kerch.set_cache_directory`.
+    :type cache_directory: str, optional
+    :param cache_spill_level: The tensors stored at this level or above are spilled to memory-mapped temporary files
+        instead of being kept in memory. Defaults to ``None``, which corresponds to no spilling.
+    :type cache_spill_level: str, optional
+    :param cache_spill_bytes: The tensors of this size in bytes or above are spilled to memory-mapped temporary files.
+        Defaults to ``None``, which corresponds to no spilling based on the size.
+    :type cache_spill_bytes: int, optional
+    :param cache_spill_compression: Compression of the spilled tensors, either ``'none'``, ``'symmetric'``,
+        ``'sparse'`` or ``'auto'``. Defaults to ``'auto'``.
+    :type cache_spill_compression: str, optional
+    :param cache_storage_dtype: Floating type in which the tensors stored at ``cache_storage_level`` or above are kept,
+        either ``'float16'``, ``'bfloat16'`` or ``None`` (same type as computed). Defaults to ``None``.
+    :type cache_storage_dtype: str, optional
+    :param cache_storage_packed: If ``True``, only the upper triangle of the symmetric matrices stored at
+        ``cache_storage_level`` or above is kept. Defaults to ``False``.
+    :type cache_storage_packed: bool, optional
+    :param cache_storage_level: Level from which the storage policy applies. Defaults to ``'heavy'``.
+    :type cache_storage_level: str, optional
+    :param cache_storage_tolerance: Maximal error relative to the largest magnitude of a tensor stored with
+        ``cache_storage_dtype``. The tensors exceeding it, or overflowing the type, are kept in full precision.
+        Defaults to ``1e-2``.
+    :type cache_storage_tolerance: float, optional
     """
 
     _cache_elements = []
@@ -34,9 +187,42 @@ class Cache(Module,
     def __init__(self, *args, **kwargs):
         super(Cache, self).__init__(*args, **kwargs)
 
-        # we initiate the cache
+        # we initiate the cache. The dictionaries of the entries are never modified in place but replaced (copy-on-write),
+        # so that they can be read by other threads without any lock
+        self._cache_lock = threading.RLock()
+        self._cache_flights = {}
+        self._cache_frozen = False
         self._cache = {}
+        # size in bytes, computation time, last access, state of the sources and stamp (see _cache_stamp) of each entry
+        self._cache_info = {}
+        self._cache_bytes = 0
+        self._cache_evictions = 0
+        # number of times each source (parameter, indices...) has been changed outside of the autograd version counter
+        self._cache_versions = {}
+        # changed with any source of this module or of its children, so that the entries are only compared source by
+        # source after a change (see _is_stale)
+        self._cache_version = next(_CLOCK)
+        self.__dict__.setdefault('_cache_parents', weakref.WeakSet())
+        # stamp and sources of the module, only rebuilt after a change (see _cache_current)
+        self._cache_current_state = None
+        # stamp and content digests of the parameters, only hashed again after a change (see _disk_digest)
+        self._cache_digests = None
+        # hits, misses, computation time and last access of each key, also kept after the entry has left the cache
+        self._cache_statistics = {}
+        self._cache_auto = False
         self.cache_level = kwargs.pop('cache_level', 'normal')
+        self._cache_budget = None
+        self.cache_budget = kwargs.pop('cache_budget', None)
+        self.cache_eviction = kwargs.pop('cache_eviction', 'lru')
+        self.cache_directory = kwargs.pop('cache_directory', None)
+        self.cache_spill_level = kwargs.pop('cache_spill_level', None)
+        self.cache_spill_bytes = kwargs.pop('cache_spill_bytes', None)
+        self.cache_spill_compression = kwargs.pop('cache_spill_compression', 'auto')
+        self.cache_storage_dtype = kwargs.pop('cache_storage_dtype', None)
+        self.cache_storage_packed = kwargs.pop('cache_storage_packed', False)
+        self.cache_storage_level = kwargs.pop('cache_storage_level', 'heavy')
+        self.cache_storage_tolerance = kwargs.pop('cache_storage_tolerance', 1e-2)
+        _INSTANCES.add(self)
 
     @property
     def cache_level(self) -> str:
@@ -50,20 +236,380 @@ class Cache(Module,
         * ``"normal"``: same as light, but the statistics of the out-of-sample points are also saved.
         * ``"heavy"``: in addition to the statistics, the final kernel matrices of the out-of-sample points are saved.
         * ``"total"``: every step of any computation is saved.
+        * ``"auto"``: each entry is saved if its measured reuse, computation time and size make it worth it (see
+          :ref:`Automatic Level <cache-auto>`).
 
         We refer to the :doc:`/features/cache` documentation for further information.
         """
+        if self._cache_auto:
+            return 'auto'
         switcher = Cache._cache_level_switcher
         inv_switcher = {switcher[k]: k for k in switcher}
         return inv_switcher[self._cache_level]
 
     @cache_level.setter
     def cache_level(self, val: Union[str, int]):
-        val = self._get_level(val)
-        self._cache_level = val
-        for value in self._cache.values():
-            if isinstance(value, Cache):
-                value._cache_level = val
+        # the automatic level relies on the default levels as long as no measurement is available
+        self._cache_auto = val == 'auto'
+        self._cache_level = self._get_level('normal' if self._cache_auto else val)
+        self._share_settings()
+
+    def __getstate__(self):
+        state = super(Cache, self).__getstate__()
+        # the locks, the ongoing computations and the links to the parents are specific to the instance
+        state.pop('_cache_lock', None)
+        state.pop('_cache_flights', None)
+        state.pop('_cache_parents', None)
+        state.pop('_cache_current_state', None)
+        state.pop('_cache_digests', None)
+        return state
+
+    def __setstate__(self, state):
+        super(Cache, self).__setstate__(state)
+        self._cache_lock = threading.RLock()
+        self._cache_flights = {}
+        self._cache_current_state = None
+        self._cache_digests = None
+        # the children may have been restored first and already have registered this module
+        self.__dict__.setdefault('_cache_parents', weakref.WeakSet())
+        for child in self._modules.values():
+            if isinstance(child, Cache):
+                child._cache_adopt(self)
+
+    def __setattr__(self, name, value):
+        super(Cache, self).__setattr__(name, value)
+        if isinstance(value, torch.nn.Parameter) and '_cache_versions' in self.__dict__:
+            self._cache_touch(name)
+        elif isinstance(value, Cache):
+            value._cache_adopt(self)
+            if '_cache_versions' in self.__dict__:
+                self._cache_bump()
+
+    def add_module(self, name, module) -> None:
+        super(Cache, self).add_module(name, module)
+        if isinstance(module, Cache):
+            module._cache_adopt(self)
+            if '_cache_versions' in self.__dict__:
+                self._cache_bump()
+
+    def _cache_adopt(self, parent) -> None:
+        self.__dict__.setdefault('_cache_parents', weakref.WeakSet()).add(parent)
+
+    def _cache_bump(self) -> None:
+        r"""
+        Changes the version of this module and of all the modules it belongs to.
+        """
+        visited = set()
+        modules = [self]
+        while modules:
+            module = modules.pop()
+            if id(module) in visited:
+                continue
+            visited.add(id(module))
+            module.__dict__['_cache_version'] = next(_CLOCK)
+            modules.extend(module.__dict__.get('_cache_parents', ()))
+
+    def _cache_touch(self, *sources: str) -> None:
+        r"""
+        Signals that the sources have changed, so that the cache entries computed from them are considered as stale.
+        This is only required for the changes that are not tracked by the version counter of the tensors, such as an
+        assignment to ``param.data``. The replacement of a parameter is tracked automatically.
+        """
+        for source in sources:
+            self._cache_versions[source] = self._cache_versions.get(source, 0) + 1
+        self._cache_bump()
+
+    def after_step(self) -> None:
+        r"""
+        Signals that the parameters of this module and of its children have changed. The optimizers update the
+        parameters through ``param.data``, which is not tracked by their version counter.
+        """
+        for module in self.modules():
+            if isinstance(module, Cache):
+                module._cache_touch(*(name for name, param in module._parameters.items() if param is not None))
+        super(Cache, self).after_step()
+
+    def _cache_sources(self) -> dict:
+        r"""
+        Current state of the sources the cache entries may be computed from: the parameters of the module and the
+        state of its children.
+        """
+        sources = {name: (self._cache_versions.get(name, 0), param._version)
+                   for name, param in self._parameters.items() if param is not None}
+        # the modules may reference each other (e.g. the transforms and their parent)
+        visiting = _visiting()
+        if id(self) in visiting:
+            return sources
+        visiting.add(id(self))
+        try:
+            for name, child in self._modules.items():
+                if isinstance(child, Cache):
+                    sources['child_' + name] = tuple(child._cache_sources().items())
+        finally:
+            visiting.discard(id(self))
+        return sources
+
+    def _cache_dependencies(self, key) -> Union[List[str], None]:
+        r"""
+        Names of the sources (see :py:meth:`~kerch.feature.Cache._cache_sources`) the cache entry ``key`` depends on,
+        ``None`` corresponding to all of them.
+        """
+        return None
+
+    def _cache_state(self, key) -> dict:
+        sources = self._cache_current()[1]
+        dependencies = self._cache_dependencies(key)
+        if dependencies is None:
+            return sources
+        return {name: sources[name] for name in dependencies if name in sources}
+
+    def _cache_stamp(self) -> tuple:
+        r"""
+        Version of the module and of the parameters of the module and its children. As long as it does not change,
+        none of the sources has changed.
+        """
+        params = tuple(self.parameters())
+        return self._cache_version, params, tuple(param._version for param in params)
+
+    def _cache_fresh(self, stamp: tuple) -> bool:
+        r"""
+        Indicates whether none of the sources has changed since the stamp (see
+        :py:meth:`~kerch.feature.Cache._cache_stamp`). The in-place changes of the parameters are only tracked by their
+        version counter, so that this costs one comparison per parameter of the module and its children, whatever the
+        number of entries and the depth of the sources.
+        """
+        version, params, versions = stamp
+        return version == self._cache_version and all(param._version == v for param, v in zip(params, versions))
+
+    def _cache_current(self) -> tuple:
+        r"""
+        Current stamp and sources of the module. The sources are only rebuilt once after a change, not for each entry
+        read afterwards.
+        """
+        current = self._cache_current_state
+        if current is None or not self._cache_fresh(current[0]):
+            # the stamp is taken first, so that a change in the meantime leads to a rebuild on the next call
+            stamp = self._cache_stamp()
+            current = (stamp, self._cache_sources())
+            self._cache_current_state = current
+        return current
+
+    def _is_stale(self, key) -> bool:
+        r"""
+        Indicates whether one of the sources the cache entry has been computed from has changed since.
+        """
+        info = self._cache_info.get(key)
+        if info is None:
+            # the entry has been removed by another thread in the meantime
+            return True
+        state = info[3]
+        if not state:
+            return False
+        if self._cache_fresh(info[4]):
+            return False
+        # something has changed since, which may not concern the sources of this entry
+        stamp, sources = self._cache_current()
+        if any(sources.get(name) != version for name, version in state.items()):
+            return True
+        with self._cache_lock:
+            # the entry may have been replaced or removed by another thread in the meantime
+            if self._cache_info.get(key) is info:
+                info[4] = stamp
+        return False
+
+    @property
+    def cache_budget(self) -> int | None:
+        r"""
+        Maximum number of bytes held by the cache of this module, ``None`` corresponding to no budget. When exceeded,
+        entries are evicted according to :py:attr:`~kerch.feature.Cache.cache_eviction`. The entries with the highest
+        levels are evicted first and the persisting ones are never evicted. A global budget shared by all modules can
+        also be set with :py:func:`kerch.set_cache_budget`.
+        """
+        return self._cache_budget
+
+    @cache_budget.setter
+    def cache_budget(self, val: int | None):
+        assert val is None or val >= 0, "The cache budget must be positive."
+        self._cache_budget = val
+        self._enforce_budget()
+
+    @property
+    def cache_eviction(self) -> str:
+        r"""
+        Eviction policy when the cache budget is exceeded, either ``'lru'`` (the least recently used entries are
+        evicted first) or ``'cost'`` (the entries with the lowest computation time per byte are evicted first).
+        """
+        return self._cache_eviction
+
+    @cache_eviction.setter
+    def cache_eviction(self, val: str):
+        val = val.lower()
+        if val not in ['lru', 'cost']:
+            raise ValueError(f"Unknown cache eviction policy {val}. The policy must be either 'lru' or 'cost'.")
+        self._cache_eviction = val
+
+    def _share_settings(self, caches: Iterable | None = None) -> None:
+        r"""
+        Shares the cache level, the spilling and the storage settings with the cache modules stored in the cache (e.g.
+        the transforms).
+        """
+        if caches is None:
+            caches = [value[2] for value in self.__dict__.get('_cache', {}).values() if isinstance(value[2], Cache)]
+        for cache in caches:
+            for name in ['_cache_level', '_cache_auto', '_cache_spill_level', '_cache_spill_bytes',
+                         '_cache_spill_compression', '_cache_storage_dtype', '_cache_storage_packed',
+                         '_cache_storage_level', '_cache_storage_tolerance']:
+                if name in self.__dict__:
+                    setattr(cache, name, self.__dict__[name])
+
+    @property
+    def cache_bytes(self) -> int:
+        r"""
+        Number of bytes currently held by the cache of this module.
+        """
+        return self._cache_bytes
+
+    @property
+    def cache_evictions(self) -> int:
+        r"""
+        Number of entries evicted from the cache of this module because a budget was exceeded.
+        """
+        return self._cache_evictions
+
+    def _store_entry(self, key, level: int, persisting: bool, val, cost: float = 0.,
+                     compression: str | None = None, level_key=None) -> None:
+        r"""
+        Stores an entry in the cache and keeps track of its size, then enforces the budgets. The tensor is spilled to
+        the disk if its level or size requires it, or otherwise stored with the storage policy.
+        """
+        size = _sizeof(val)
+        if self._spills(level, val, size):
+            try:
+                val = _Spilled(val, compression=self._cache_spill_compression if compression is None else compression)
+                self._logger.debug(f"The cache element {key} ({size} bytes) is spilled to the disk ({val}).")
+                size = 0
+            except (OSError, TypeError) as e:
+                self._logger.debug(f"The cache element {key} cannot be spilled to the disk and is kept in memory: {e}")
+        elif self._reduces(level, val, level_key):
+            dtype = None if self._cache_storage_dtype is None else _Reduced.dtypes[self._cache_storage_dtype]
+            reduced = _Reduced(val, dtype=dtype, packed=self._cache_storage_packed)
+            if reduced.error > self._cache_storage_tolerance:
+                self._logger.debug(f"The cache element {key} is kept in full precision, as its relative error in "
+                                   f"{self._cache_storage_dtype} would be {reduced.error:.2e}.")
+                reduced = _Reduced(val, packed=True) if self._cache_storage_packed else None
+            if reduced is not None and (reduced.packed or reduced.values.dtype != val.dtype):
+                val = reduced
+                self._logger.debug(f"The cache element {key} ({size} bytes) is stored as {val} with a relative error "
+                                   f"of {val.error:.2e}.")
+                size = val.nbytes
+        if isinstance(val, Cache):
+            self._share_settings([val])
+        stamp = self._cache_current()[0]
+        state = self._cache_state(key)
+        with self._cache_lock:
+            # the dictionaries are only copied once, the previous entry being replaced
+            cache, info = dict(self._cache), dict(self._cache_info)
+            cache.pop(key, None)
+            previous = info.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= previous[0]
+            if self._cache_budget is not None and size > self._cache_budget and not persisting:
+                self._logger.debug(f"The cache element {key} ({size} bytes) exceeds the cache budget and is not "
+                                   f"saved.")
+                self._cache, self._cache_info = cache, info
+                return
+            info[key] = [size, cost, next(_CLOCK), state, stamp]
+            cache[key] = (level, persisting, val)
+            # the information is published first, so that a reader finding the entry also finds its information
+            self._cache_info = info
+            self._cache = cache
+            self._cache_bytes += size
+            self._enforce_budget(exclude=key)
+        _enforce_global_budget(exclude=(self, key))
+
+    def _pop_entry(self, key) -> None:
+        with self._cache_lock:
+            if key in self._cache:
+                self._retain(lambda k, entry: k != key)
+
+    def _retain(self, condition) -> None:
+        r"""
+        Only keeps the entries satisfying ``condition(key, entry)``. The dictionaries are replaced instead of being
+        modified, so that the threads reading them are not affected.
+        """
+        with self._cache_lock:
+            cache = {key: entry for key, entry in self._cache.items() if condition(key, entry)}
+            info = {key: val for key, val in self._cache_info.items() if key in cache}
+            self._cache = cache
+            self._cache_info = info
+            self._cache_bytes = sum(val[0] for val in info.values())
+
+    def _clear_entries(self) -> None:
+        with self._cache_lock:
+            self._cache = {}
+            self._cache_info = {}
+            self._cache_bytes = 0
+
+    def _evictable_keys(self) -> List[str]:
+        r"""
+        Keys of the entries that can be evicted: the persisting entries and other cache modules are never evicted.
+        """
+        cache, info = self._cache, self._cache_info
+        return [key for key, val in cache.items()
+                if not val[1] and not isinstance(val[2], Cache) and key in info and info[key][0] > 0]
+
+    def _eviction_priority(self, key) -> tuple:
+        r"""
+        Sorting key of the entries to be evicted, the lowest being evicted first. The entries of the highest levels
+        come first, then the least recently used ones or the ones with the lowest computation time per byte.
+        """
+        size, cost, access = self._cache_info[key][:3]
+        if self._cache_eviction == 'cost':
+            return -self._cache[key][0], cost / size
+        return -self._cache[key][0], access
+
+    def _evict(self, keys: Iterable) -> int:
+        r"""
+        Evicts the entries ``keys`` at once, the dictionaries being only replaced once.
+
+        :return: Number of bytes freed.
+        """
+        with self._cache_lock:
+            info = self._cache_info
+            # some may already have been removed by another thread
+            keys = {key for key in keys if key in info}
+            if not keys:
+                return 0
+            size = sum(info[key][0] for key in keys)
+            self._logger.debug(f"The cache elements {sorted(keys)} ({size} bytes) are evicted.")
+            self._retain(lambda k, entry: k not in keys)
+            self._cache_evictions += len(keys)
+            return size
+
+    def _enforce_budget(self, exclude=None) -> None:
+        with self._cache_lock:
+            if self._cache_budget is None or self._cache_bytes <= self._cache_budget:
+                return
+            excess = self._cache_bytes - self._cache_budget
+            # the victims are gathered first and evicted together
+            victims = []
+            for key in sorted((key for key in self._evictable_keys() if key != exclude), key=self._eviction_priority):
+                if excess <= 0:
+                    break
+                victims.append(key)
+                excess -= self._cache_info[key][0]
+            self._evict(victims)
+
+    @staticmethod
+    def _fingerprint(x) -> str:
+        r"""
+        Identifies an input in the cache keys, according to the mode set by :py:func:`kerch.set_cache_fingerprint`.
+        """
+        content = _GLOBALS["CACHE_FINGERPRINT"] == 'content'
+        if isinstance(x, dict):
+            return "_".join(f"{key}:{fingerprint(val, content=content, num_sampled=None)}"
+                            for key, val in x.items())
+        return fingerprint(x, content=content, num_sampled=None)
 
     def _get_level(self, level: Union[int, str, None]) -> int:
         r"""
@@ -84,20 +630,33 @@ class Cache(Module,
             This method is documented for completeness, but it should never be required to call it directly.
 
         """
-        with torch.no_grad():
+        with torch.no_grad(), self._cache_lock:
             for value in self._cache.values():
                 cache_entry = value[2]
                 if isinstance(cache_entry, torch.Tensor):
                     cache_entry.data = fn(cache_entry)
+                elif isinstance(cache_entry, _Spilled):
+                    # the spilled tensors are only ported when paged back in
+                    ported = fn(torch.empty(0, dtype=cache_entry.dtype, device=cache_entry.device))
+                    cache_entry.dtype, cache_entry.device = ported.dtype, ported.device
+                elif isinstance(cache_entry, _Reduced):
+                    # the values keep their storage type and are only restored to the new type when read
+                    ported = fn(torch.empty(0, dtype=cache_entry.dtype, device=cache_entry.values.device))
+                    cache_entry.dtype = ported.dtype
+                    cache_entry.values = cache_entry.values.to(device=ported.device)
                 elif isinstance(cache_entry, Cache):
                     cache_entry._apply(fn)
+            # the porting may change the type of the entries and thus their size
+            for key, value in self._cache.items():
+                self._cache_info[key][0] = value[2].nbytes if isinstance(value[2], _Reduced) else _sizeof(value[2])
+            self._cache_bytes = sum(info[0] for info in self._cache_info.values())
         if recurse:
             for child in self.children():
                 child._apply(fn, recurse=recurse)
         return super(Cache, self)._apply(fn)
 
     def _save(self, key, fun, level_key=None, default_level: str = 'total', force: bool = False,
-              persisting=False) -> Any:
+              persisting=False, compression: str | None = None) -> Any:
         r"""
         Saves an element in the cache.
 
@@ -108,6 +667,8 @@ class Cache(Module,
         :param force: if the value is ``True``, the element will nevertheless be saved whatever level is specified. Defaults to ``False``.
         :param persisting: These values are meant to persist after a cache reset when calling
             :py:meth:`~kerch.feature.Cache.reset` with ``reset_persisting=False``. Defaults to ``False``.
+        :param compression: Compression of the element if it is spilled to the disk. Defaults to
+            :py:attr:`~kerch.feature.Cache.cache_spill_compression`.
 
         :type key: str
         :type fun: function handle
@@ -115,26 +676,50 @@ class Cache(Module,
         :type default_level: str, optional
         :type force: bool, optional
         :type persisting: bool, optional
+        :type compression: str, optional
         :return: The result of ``fun()``
         """
 
-        # determine which level to store in
+        assert callable(fun) is not None, \
+            f"Cannot store {key} in the cache as no callable argument fun has been provided"
+        if self._cache_frozen:
+            return fun()
+        level = self._entry_level(level_key, default_level)
+        # the state is described before the computation, which may change it (e.g. pruned dimensions)
+        path = self._disk_path(key, level_key) if level <= self._cache_level or force else None
+        return self._evaluate(key, fun, level_key, level, force, persisting, compression, path)
+
+    def _entry_level(self, level_key, default_level: str) -> int:
+        r"""
+        Level of an entry, given by ``kerch.DEFAULT_CACHE_LEVELS`` for its level key or by the default level otherwise.
+        """
         try:
             level = DEFAULT_CACHE_LEVEL[level_key]
         except KeyError:
             level = default_level
-        level = self._get_level(level)
+        return self._get_level(level)
 
-        # we now compute, store if the level corresponds and return the value
-        assert callable(fun) is not None, \
-            f"Cannot store {key} in the cache as no callable argument fun has been provided"
+    def _evaluate(self, key, fun, level_key, level: int, force: bool, persisting, compression, path) -> Any:
+        r"""
+        Computes an entry, stores it if its level corresponds and writes it at ``path`` on the disk if not ``None``.
+        """
+        start = time.perf_counter()
         val = fun()
-        if level <= self._cache_level or force:
-            self._cache[key] = (level, persisting, val)
+        cost = time.perf_counter() - start
+        size = _sizeof(val)
+        self._record(key, level_key=level_key, compute_time=cost, size=size)
+        if self._cache_auto and not force:
+            store = self._worth(key, level_key, level, size)
+        else:
+            store = level <= self._cache_level or force
+        if store:
+            self._store_entry(key, level, persisting, val, cost=cost, compression=compression, level_key=level_key)
+            if path is not None and _disk_write(path, val):
+                self._logger.debug(f"The cache element {key} is written to the disk ({path}).")
         return val
 
     def _get(self, key, fun=None, level_key=None, default_level: str = 'normal', force: bool = False,
-             overwrite: bool = False, persisting=False, destroy=False) -> Any:
+             overwrite: bool = False, persisting=False, destroy=False, compression: str | None = None) -> Any:
         r"""
         Retrieves an element from the cache. If the element is not present, it saved to the cache provided its level
         is lower or equal to the default level. This can be overwritten by the overwrite argument.
@@ -148,6 +733,8 @@ class Cache(Module,
             :py:meth:`~kerch.feature.Cache.reset` with ``reset_persisting=False``. Defaults to ``False``.
         :param destroy: This destroys the value from the cache after being read/computed. This is meant for short-term
             memory. Defaults to ``False``.
+        :param compression: Compression of the element if it is spilled to the disk. Defaults to
+            :py:attr:`~kerch.feature.Cache.cache_spill_compression`.
 
         :type key: str
         :type level_key: str, optional
@@ -157,28 +744,125 @@ class Cache(Module,
         :type overwrite: bool, optional
         :type persisting: bool, optional
         :type destroy: bool, optional
+        :type compression: str, optional
 
         :return: The result of ``fun()``
         """
 
         # a cache element is represented by the tuple(level, persisting, value)
+        if overwrite:
+            path = None if self._cache_frozen else self._disk_path(key, level_key)
+            return self._compute(key, fun, level_key, default_level, force, persisting, destroy, compression, path)
 
         # we first check if the value is already in the cache
-        if not overwrite:
-            if key in self._cache:
-                return self._cache[key][2]
-            # elif type(key) is tuple:
-            #     reverted_key = (key[1], key[0])
-            #     if reverted_key in self._cache:
-            #         return self._cache[reverted_key][1].T
-
-        # if it is not, we save it
-        val = self._save(key=key, fun=fun, level_key=level_key, default_level=default_level,
-                         force=force, persisting=persisting)
+        found, val = self._lookup(key, level_key)
+        if found:
+            return val
+        if self._cache_frozen:
+            return fun()
+
+        # only one thread computes a missing entry, the other ones requiring it in the meantime wait for its value
+        flight, owner = self._join_flight(key)
+        if flight is not None and not owner:
+            flight.event.wait()
+            if flight.done:
+                self._record(key, level_key=level_key, hit=True)
+                return flight.value
+            # the computation has failed in the other thread and is attempted here
+            return self._get(key, fun=fun, level_key=level_key, default_level=default_level, force=force,
+                             persisting=persisting, destroy=destroy, compression=compression)
+        try:
+            # another thread may have saved the entry between the lookup and the flight
+            found, val = self._lookup(key, level_key) if owner else (False, None)
+            if not found:
+                # the path hashes the state of the sources, it is only computed once per miss
+                path = self._disk_path(key, level_key)
+                val = self._load(key, level_key, default_level, force, persisting, destroy, compression, path)
+                if val is None:
+                    val = self._compute(key, fun, level_key, default_level, force, persisting, destroy, compression,
+                                        path)
+            if owner:
+                flight.value, flight.done = val, True
+            return val
+        finally:
+            if owner:
+                self._land_flight(key, flight)
+
+    def _lookup(self, key, level_key=None) -> tuple:
+        r"""
+        Reads an entry in memory. The dictionary of the entries is only read once, as other threads may replace it.
+
+        :return: Whether a valid entry has been found and its value.
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        if not self._is_stale(key):
+            if not self._cache_frozen:
+                info = self._cache_info.get(key)
+                if info is not None:
+                    info[2] = next(_CLOCK)
+                self._record(key, level_key=level_key, hit=True)
+            val = entry[2]
+            return True, val.load() if isinstance(val, (_Spilled, _Reduced)) else val
+        if not self._cache_frozen:
+            self._logger.debug(f"The cache element {key} is stale and is computed again.")
+            with self._cache_lock:
+                if self._cache.get(key) is entry:
+                    self._pop_entry(key)
+        return False, None
+
+    def _load(self, key, level_key, default_level, force, persisting, destroy, compression, path) -> Any:
+        r"""
+        Loads an entry written on the disk at ``path``, by this or by another process. Returns ``None`` if there is
+        none.
+        """
+        if path is None:
+            return None
+        val = _disk_read(path, self._disk_device())
+        if val is None:
+            return None
+        self._logger.debug(f"The cache element {key} is loaded from the disk ({path}).")
+        self._record(key, level_key=level_key, disk=True)
+        level = self._entry_level(level_key, default_level)
+        if (level <= self._cache_level or force) and not destroy:
+            self._store_entry(key, level, persisting, val, compression=compression, level_key=level_key)
+        return val
+
+    def _compute(self, key, fun, level_key, default_level, force, persisting, destroy, compression, path) -> Any:
+        if self._cache_frozen:
+            return fun()
+        level = self._entry_level(level_key, default_level)
+        if not (level <= self._cache_level or force):
+            path = None
+        val = self._evaluate(key, fun, level_key, level, force, persisting, compression, path)
         if destroy:
             self._remove_from_cache(key)
         return val
 
+    def _join_flight(self, key) -> tuple:
+        r"""
+        Registers the computation of ``key`` by the current thread, or returns the one already ongoing in another
+        thread. A thread requiring again an entry it is computing (recursion) computes it without flight.
+
+        :return: The flight and whether the current thread owns it.
+        """
+        with self._cache_lock:
+            flight = self._cache_flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._cache_flights[key] = flight
+                return flight, True
+            if flight.thread == threading.get_ident():
+                return None, False
+            return flight, False
+
+    def _land_flight(self, key, flight: _Flight) -> None:
+        with self._cache_lock:
+            if self._cache_flights.get(key) is flight:
+                self._cache_flights.pop(key)
+        flight.event.set()
+
     def _reset_cache(self, reset_persisting: bool = True, avoid_classes: list | None = None) -> None:
         r"""
         This just resets the cache and makes it empty.
@@ -200,14 +884,10 @@ class Cache(Module,
 
         if reset_persisting and len(elements_avoided) == 0:
             self._logger.debug("The cache is fully resetted.")
-            self._cache = {}
+            self._clear_entries()
         else:
             self._logger.debug("The cache is resetted at the exception of the persisting elements and avoided classes.")
-            for key in list(self._cache.keys()):
-                if key in self._cache and key not in elements_avoided:
-                    val = self._cache[key]
-                    if not val[1] or reset_persisting:
-                        self._cache.pop(key)
+            self._retain(lambda key, val: key in elements_avoided or (val[1] and not reset_persisting))
 
     def _clean_cache(self, max_level: Union[str, int, None] = None):
         r"""
@@ -222,17 +902,15 @@ class Cache(Module,
             This method is documented for completeness, but it should never be required to call it directly.
 
         """
+        if self._cache_frozen:
+            return
         max_level = self._get_level(max_level)
         self._logger.debug(f"The cache is cleaned for levels {max_level} and above).")
         # for val in self._cache.values(): del val
         if max_level == 0:
             self._reset_cache()
         else:
-            for key in list(self._cache.keys()):
-                if key in self._cache.keys():
-                    value = self._cache[key]
-                    if value[0] > max_level:
-                        self._cache.pop(key)
+            self._retain(lambda key, val: val[0] <= max_level)
 
     def _remove_from_cache(self, key: Union[str, List[str]]) -> None:
         r"""
@@ -246,15 +924,11 @@ class Cache(Module,
 
         """
 
-        def _remove_entry(key_item) -> None:
-            if key_item in self._cache:
-                self._cache.pop(key_item)
-
-        if not hasattr(key, '__iter__'):
+        if not hasattr(key, '__iter__') or isinstance(key, str):
             key = [key]
 
         for key_item in key:
-            _remove_entry(key_item)
+            self._pop_entry(key_item)
 
     def reset(self, recurse=False, reset_persisting=True) -> None:
         r"""
@@ -274,6 +948,43 @@ class Cache(Module,
                 if isinstance(cache, Cache):
                     cache.reset(recurse=recurse, reset_persisting=reset_persisting)
 
+    @property
+    def cache_frozen(self) -> bool:
+        r"""
+        Indicates whether the cache is frozen (see :py:meth:`~kerch.feature.Cache.freeze`).
+        """
+        return self._cache_frozen
+
+    def freeze(self, recurse: bool = True) -> None:
+        r"""
+        Freezes the cache: the entries are read but the cache is not modified anymore. The missing entries are computed
+        without being saved and the transforms do not clean their out-of-sample entries, so that concurrent threads
+        (e.g. serving ``forward`` calls) read the same entries without contention. The statistics are not recorded
+        either. We refer to the :doc:`/features/cache` documentation for more information.
+
+        :param recurse: If ``True``, the children and the transforms are also frozen. Defaults to ``True``.
+        :type recurse: bool, optional
+        """
+        self._freeze_cache(True, recurse, set())
+
+    def unfreeze(self, recurse: bool = True) -> None:
+        r"""
+        Unfreezes the cache (see :py:meth:`~kerch.feature.Cache.freeze`).
+
+        :param recurse: If ``True``, the children and the transforms are also unfrozen. Defaults to ``True``.
+        :type recurse: bool, optional
+        """
+        self._freeze_cache(False, recurse, set())
+
+    def _freeze_cache(self, frozen: bool, recurse: bool, visited: set) -> None:
+        visited.add(id(self))
+        self._cache_frozen = frozen
+        if recurse:
+            caches = [entry[2] for entry in self._cache.values() if isinstance(entry[2], Cache)]
+            for other in itertools.chain(caches, self.children()):
+                if isinstance(other, Cache) and id(other) not in visited:
+                    other._freeze_cache(frozen, recurse, visited)
+
     def cache_keys(self, private: bool = False) -> Iterable[str]:
         r"""
         Returns an iterable containing the different cache keys.
@@ -8,7 +8,7 @@ import torch
 
 from abc import ABCMeta, abstractmethod
 from torch import Tensor
-from typing import Union
+from typing import Union, List
 
 from kerch import utils
 from .cache import Cache
@@ -50,6 +50,7 @@ class Sample(Stochastic,  # manager stochastic indices
     :type sample_transform: List[str]
     """
 
+    # cache elements that only depend on the sample, not on the other parameters of the module
     _cache_elements = ["sample_transform"]
 
     def __init__(self, *args, **kwargs):
@@ -70,6 +71,11 @@ class Sample(Stochastic,  # manager stochastic indices
         self.init_sample(sample, idx_sample=kwargs.pop('idx_sample', None), prop_sample=kwargs.pop('prop_sample', None))
 
 
+    def _cache_dependencies(self, key) -> Union[List[str], None]:
+        if any(key in cls._cache_elements for cls in type(self).__mro__ if issubclass(cls, Cache)):
+            return ['_sample', 'idx']
+        return super(Sample, self)._cache_dependencies(key)
+
     @property
     def dim_input(self) -> int:
         r"""
@@ -200,7 +206,8 @@ class Sample(Stochastic,  # manager stochastic indices
             self._sample = torch.nn.Parameter(sample.data,
                                               requires_grad=self._sample_trainable)
 
-        self.stochastic(idx=idx_sample, prop=prop_sample) # also resets
+        self._reset_cache(reset_persisting=False)
+        self.stochastic(idx=idx_sample, prop=prop_sample)
 
     @torch.no_grad()
     def update_sample(self, sample_values, idx_sample=None):
@@ -236,7 +243,7 @@ class Sample(Stochastic,  # manager stochastic indices
         if self._sample_trainable:
             self._sample.grad.data[idx_sample, :].zero_()
 
-        self._reset_cache(reset_persisting=False)
+        self._cache_touch('_sample')
 
     def _euclidean_parameters(self, recurse=True) -> Iterator[torch.nn.Parameter]:
         if not self.empty_sample:
@@ -45,6 +45,10 @@ class Stochastic(Cache,  # creates a transportable cache (e.g. for GPU)
     def _all_idx(self):
         return range(self._num_total)
 
+    def _cache_sources(self) -> dict:
+        return {'idx': self._cache_versions.get('idx', 0),
+                **super(Stochastic, self)._cache_sources()}
+
     def train(self, mode=True):
         r"""
         Activates the training mode, which disables the gradients computation and disables stochasticity. For the
@@ -57,6 +61,18 @@ class Stochastic(Cache,  # creates a transportable cache (e.g. for GPU)
             self.stochastic()
         return self
 
+    @staticmethod
+    def _same_idx(idx1, idx2) -> bool:
+        if idx1 is idx2:
+            return True
+        if isinstance(idx1, range) and isinstance(idx2, range):
+            return idx1 == idx2
+        if idx1 is None or idx2 is None:
+            return False
+        # the same indices may be given as a range, a list or a tensor (e.g. by a batch sampler)
+        idx1, idx2 = torch.as_tensor(idx1).cpu(), torch.as_tensor(idx2).cpu()
+        return idx1.shape == idx2.shape and torch.equal(idx1, idx2)
+
     def stochastic(self, idx=None, prop=None):
         r"""
         Resets which subset of the samples are to be used until the next call of this function. This is relevant in the
@@ -80,9 +96,9 @@ class Stochastic(Cache,  # creates a transportable cache (e.g. for GPU)
             self._logger.info("Setting stochastic indices cannot work before any value or dimensions have been fed.")
             return
 
-        self._reset_cache(reset_persisting=False)
         assert idx is None or prop is None, "Both idx_stochastic and prop_stochastic are not None. " \
                                                           "Please choose one non-None parameter only."
+        previous_idx = self._idx_stochastic
 
         if idx is not None:
             self._logger.debug("Using the provided indices for stochasticity.")
@@ -100,6 +116,10 @@ class Stochastic(Cache,  # creates a transportable cache (e.g. for GPU)
             self._logger.debug("Using all indices.")
             self._idx_stochastic = self._all_idx
 
+        # the cache entries depending on the indices are only computed again if these have changed
+        if not Stochastic._same_idx(previous_idx, self._idx_stochastic):
+            self._cache_touch('idx')
+
         for stochastic_module in self.children():
             if isinstance(stochastic_module, Stochastic):
                 stochastic_module.stochastic(idx=self._idx_stochastic)
@@ -19,13 +19,60 @@ from ..feature.sample import Sample
 
 @utils.extend_docstring(Sample)
 class _BaseKernel(Sample, metaclass=ABCMeta):
+    r"""
+    :param cache_subblocks: If ``True``, the raw kernel matrix (or explicit feature map) of the full sample is kept and
+        the ones of a stochastic selection of indices are gathered from it instead of being computed again. This only
+        applies when no sample transform is used, as its statistics depend on the selection. The kernel transforms are
+        still applied on the gathered sub-block. Defaults to ``False``.
+    :type cache_subblocks: bool, optional
+    """
+
     def __init__(self, *args, **kwargs):
         super(_BaseKernel, self).__init__(*args, **kwargs)
+        self.cache_subblocks = kwargs.pop('cache_subblocks', False)
 
     @abstractmethod
     def __str__(self):
         pass
 
+    def _cache_dependencies(self, key) -> list | None:
+        dependencies = super(_BaseKernel, self)._cache_dependencies(key)
+        if dependencies is None:
+            # the kernel does not depend on the parameters of the level it may be part of
+            level_parameters = getattr(self, '_level_parameters', [])
+            dependencies = [name for name in self._cache_sources() if name not in level_parameters]
+            if key in ["sample_K_full", "sample_phi_full"]:
+                # the sub-blocks are gathered from these entries, which are thus independent of the selected indices
+                dependencies.remove('idx')
+        return dependencies
+
+    @property
+    def cache_subblocks(self) -> bool:
+        r"""
+        If ``True``, the raw kernel matrix (or explicit feature map) of the full sample is kept in the cache and the
+        ones of a stochastic selection are gathered as sub-blocks of it. This is only effective without sample
+        transform, the statistics of which depend on the selection.
+        """
+        return self._cache_subblocks
+
+    @cache_subblocks.setter
+    def cache_subblocks(self, val: bool):
+        self._cache_subblocks = bool(val)
+        if not self._cache_subblocks:
+            self._remove_from_cache(["sample_K_full", "sample_phi_full"])
+
+    @property
+    def _use_subblocks(self) -> bool:
+        # the raw values of the full sample only coincide with the ones of the selection if no sample transform
+        # has statistics depending on the latter
+        return self._cache_subblocks and not self._default_sample_transform and not self.empty_sample
+
+    def _subblock_idx(self) -> Tensor | None:
+        idx = self.idx
+        if isinstance(idx, range) and len(idx) == self._num_total:
+            return None
+        return torch.as_tensor(idx, device=self._sample.device)
+
     # PROPERTIES
     @property
     @abstractmethod
@@ -87,6 +134,11 @@ class _BaseKernel(Sample, metaclass=ABCMeta):
 
     def _implicit_with_none(self, x=None, y=None) -> Tensor:
         # implicit raw
+        if x is None and y is None and self._use_subblocks:
+            K = self._get("sample_K_full", level_key="sample_K_full",
+                          fun=lambda: self._implicit(self._sample, self._sample))
+            idx = self._subblock_idx()
+            return K if idx is None else K[idx, :][:, idx]
         if x is None:
             x = self.current_sample_projected
         if y is None:
@@ -103,6 +155,10 @@ class _BaseKernel(Sample, metaclass=ABCMeta):
 
     def _explicit_with_none(self, x=None):
         # explicit raw
+        if x is None and self._use_subblocks:
+            phi = self._get("sample_phi_full", level_key="sample_phi_full", fun=lambda: self._explicit(self._sample))
+            idx = self._subblock_idx()
+            return phi if idx is None else phi[idx, :]
         if x is None:
             x = self.current_sample_projected
         return self._explicit(x)
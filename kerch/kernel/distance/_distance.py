@@ -5,7 +5,6 @@ import torch
 
 from ... import utils
 from ..implicit import Implicit
-from ...feature import Sample
 
 
 @utils.extend_docstring(Implicit)
@@ -55,9 +54,9 @@ class _Distance(Implicit, metaclass=ABCMeta):
     @sigma.setter
     def sigma(self, val):
         self._logger.debug(f"Setting sigma to {val}.")
-        self._reset_cache(reset_persisting=False, avoid_classes=[Sample, _Distance])
         self._sigma_defined = True
         self._sigma.data = utils.castf(val, tensor=False, dev=self._sigma.device)
+        self._cache_touch('_sigma')
 
     @property
     def sigma_trainable(self) -> bool:
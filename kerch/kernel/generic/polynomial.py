@@ -135,9 +135,8 @@ class Polynomial(Implicit, Explicit):
 
     @alpha.setter
     def alpha(self, val):
-        self._reset_cache(reset_persisting=False)
-        self._remove_from_cache("_poly_explicit")
         self._alpha.data = val
+        self._cache_touch('_alpha')
 
     @property
     def alpha_trainable(self) -> bool:
@@ -156,11 +155,10 @@ class Polynomial(Implicit, Explicit):
             return self._beta.detach().cpu().numpy().item()
         return self._beta
 
-    @alpha.setter
-    def alpha(self, val):
-        self._reset_cache(reset_persisting=False)
-        self._remove_from_cache("_poly_explicit")
+    @beta.setter
+    def beta(self, val):
         self._beta.data = val
+        self._cache_touch('_beta')
 
     @property
     def beta_trainable(self) -> bool:
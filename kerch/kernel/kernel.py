@@ -9,12 +9,13 @@ File containing the abstract kernel classes with transform.
 """
 from __future__ import annotations
 from abc import ABCMeta, abstractmethod
-from typing import List, Union
+from typing import List, Union, Iterator
 
 import torch
 from torch import Tensor
 
-from ..utils import kwargs_decorator, extend_docstring, castf, RepresentationError, equal
+from ..utils import kwargs_decorator, extend_docstring, castf, RepresentationError, ImplicitError, fingerprint
+from ..utils.type import EPS
 from ._base_kernel import _BaseKernel
 from ..transform import TransformTree
 from ..transform.all import MeanCentering, UnitSphereNormalization
@@ -192,6 +193,114 @@ class Kernel(_BaseKernel, metaclass=ABCMeta):
 
         return self._get("K", level_key="sample_K", fun=lambda: fun(explicit), overwrite=overwrite)
 
+    @staticmethod
+    def _blocks(num: int, block_size: int) -> Iterator[slice]:
+        for start in range(0, num, block_size):
+            yield slice(start, min(start + block_size, num))
+
+    def _K_block(self, rows: slice, statistics: list) -> Tensor:
+        r"""
+        Returns the rows ``rows`` of the kernel matrix on the sample with the default implicit transforms, given the
+        statistics of these transforms (see :py:meth:`_K_block_statistics`).
+        """
+        x = self.current_sample_projected
+        block = self._implicit(x[rows, :], x)
+        for transform, stat in statistics:
+            if transform is MeanCentering:
+                mean, mean_tot = stat
+                block = block - mean[rows, None] - mean[None, :] + mean_tot
+            else:
+                block = block / torch.clamp(stat[rows, None] * stat[None, :], min=EPS)
+        return block
+
+    def _K_block_statistics(self, block_size: int = 1024) -> tuple:
+        r"""
+        Statistics of the default implicit transforms on the sample, computed by successive passes over row blocks of
+        the kernel matrix: the row means and the total mean for a centering and the square root of the diagonal for a
+        normalization. The diagonal of the transformed kernel matrix is returned alongside.
+        """
+
+        def fun():
+            x = self.current_sample_projected
+            num = x.shape[0]
+            diag = torch.cat([torch.diagonal(self._implicit(x[rows, :], x[rows, :]))
+                              for rows in Kernel._blocks(num, block_size)])
+            statistics = []
+            for transform in self._default_kernel_transform:
+                if transform is MeanCentering:
+                    mean = torch.cat([torch.mean(self._K_block(rows, statistics), dim=1)
+                                      for rows in Kernel._blocks(num, block_size)])
+                    mean_tot = torch.mean(mean)
+                    statistics.append((transform, (mean, mean_tot)))
+                    diag = diag - 2 * mean + mean_tot
+                elif transform is UnitSphereNormalization:
+                    norm = torch.sqrt(torch.clamp(diag, min=0.))
+                    statistics.append((transform, norm))
+                    diag = diag / torch.clamp(norm * norm, min=EPS)
+                else:
+                    raise ImplicitError(cls=self, message=f"The transform {transform.__name__} cannot be applied "
+                                                          f"blockwise on the kernel matrix.")
+            return statistics, diag
+
+        return self._get("K_block_statistics", level_key="sample_K_statistics", fun=fun)
+
+    def K_matmul(self, v: Tensor, block_size: int = 1024) -> Tensor:
+        r"""
+        Returns the product :math:`Kv` of the kernel matrix on the sample (with the default transforms) with a matrix
+        :math:`v`, without forming :math:`K`. In the implicit case, the kernel is evaluated on row blocks of size
+        ``block_size``, so that the memory used scales as :math:`\mathcal{O}(\texttt{num_idx} \times
+        \texttt{block_size})` instead of :math:`\mathcal{O}(\texttt{num_idx}^2)`. If the kernel matrix has already been
+        computed and is in the cache, it is used directly.
+
+        :param v: Matrix to be multiplied.
+        :type v: Tensor[num_idx, r]
+        :param block_size: Number of rows of the kernel matrix evaluated at once. Defaults to 1024.
+        :type block_size: int, optional
+        :return: Product :math:`Kv`.
+        :rtype: Tensor[num_idx, r]
+
+        .. note::
+            In the implicit case, only the centering and the unit sphere normalization transforms are supported.
+        """
+        if "K" in self.cache_keys():
+            return self._K() @ v
+        if self.explicit:
+            phi = self._phi()
+            return phi @ (phi.T @ v)
+
+        statistics, _ = self._K_block_statistics(block_size)
+        num = self.num_idx
+        out = torch.empty((num, v.shape[1]), dtype=v.dtype, device=v.device)
+        for rows in Kernel._blocks(num, block_size):
+            out[rows, :] = self._K_block(rows, statistics) @ v
+        return out
+
+    def _K_rows(self, idx, block_size: int = 1024) -> Tensor:
+        r"""
+        Returns the rows ``idx`` of the kernel matrix on the sample (with the default transforms), without forming the
+        whole matrix unless it is already in the cache.
+        """
+        if "K" in self.cache_keys():
+            return self._K()[idx, :]
+        if self.explicit:
+            phi = self._phi()
+            return phi[idx, :] @ phi.T
+        statistics, _ = self._K_block_statistics(block_size)
+        return self._K_block(idx, statistics)
+
+    @property
+    def K_diag(self) -> Tensor:
+        r"""
+        Diagonal of the kernel matrix on the sample (with the default transforms), computed without forming the kernel
+        matrix. This suffices for instance to compute its trace.
+        """
+        if "K" in self.cache_keys():
+            return torch.diagonal(self._K())
+        if self.explicit:
+            phi = self._phi()
+            return torch.sum(phi * phi, dim=1)
+        return self._K_block_statistics()[1]
+
     # ACCESSIBLE METHODS
     def phi(self, x=None, transform=None) -> Tensor:
         r"""
@@ -243,17 +352,19 @@ class Kernel(_BaseKernel, metaclass=ABCMeta):
         x = castf(x)
         y = castf(y)
         transform = self._get_transform(transform)
+        # same values, without comparing them elementwise
+        symmetric = fingerprint(x) == fingerprint(y)
         if explicit:
             phi_x = self._kernel_explicit_transform.apply(x=self.transform_input(x),
                                                           transform=transform)
-            if equal(x, y):
+            if symmetric:
                 phi_y = phi_x
             else:
                 phi_y = self._kernel_explicit_transform.apply(x=self.transform_input(y),
                                                               transform=transform)
             return phi_x @ phi_y.T
         else:  # implicit
-            if equal(x, y):
+            if symmetric:
                 x = self.transform_input(x)
                 return self._kernel_implicit_transform.apply(x=x,
                                                              y=x,
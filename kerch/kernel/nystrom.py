@@ -113,15 +113,19 @@ class Nystrom(Explicit):
             self._base_kernel.init_sample(sample=self.current_sample_projected, idx_sample=self.idx)
 
     @torch.no_grad()
-    def _compute_decomposition(self):
-        if "H" not in self.cache_keys(private=True):
-            self._logger.info("Computing the eigendecomposition for the Nystrom kernel.")
-
-            if self._dim is None:
-                self.dim = self._num_total
+    def _compute_decomposition(self) -> tuple:
+        r"""
+        Returns the eigenvectors :math:`H`, the inverse square roots of the eigenvalues and the explicit feature map of
+        the sample, computed once from the kernel matrix of the base kernel.
+        """
+        if self._dim is None:
+            self.dim = self._num_total
 
+        def fun():
+            self._logger.info("Computing the eigendecomposition for the Nystrom kernel.")
+            dim = int(self._dim)
             K = self._base_kernel.K
-            lambdas, H = utils.eigs(K, k=self._dim)
+            lambdas, H = utils.eigs(K, k=dim)
 
             # verify that the decomposed kernel is PSD
             sum_neg = torch.sum(lambdas < 0)
@@ -135,32 +139,33 @@ class Nystrom(Explicit):
             sum_small = torch.sum(idx_small)
             if sum_small > 0:
                 self._logger.warning(
-                    f"{sum_small} very small or negative eigenvalues are detected on {self._dim}. "
+                    f"{sum_small} very small or negative eigenvalues are detected on {dim}. "
                     f"To avoid numerical instability, these values are pruned. "
-                    f"The new explicit dimension is now {self._dim - sum_small}.")
+                    f"The new explicit dimension is now {dim - sum_small}.")
                 keep_idx = torch.logical_not(idx_small)
                 lambdas = lambdas[keep_idx]
                 H = H[:, keep_idx]
-                self._dim -= sum_small
 
-            self._save(key="_nystrom_H", fun=lambda: H, level_key='_nystrom_elements')
             lambdas_sqrt = torch.sqrt(lambdas)
-            self._save(key="_nystrom_lambdas_sqrt_inv",
-                       fun=lambda: (torch.diag(1 / lambdas_sqrt)).data, level_key='_nystrom_elements')
-            self._save(key="_nystrom_sample_phi",
-                       fun=lambda: (H @ torch.diag(lambdas_sqrt)).data, level_key='_nystrom_elements')
+            return H, torch.diag(1 / lambdas_sqrt), H @ torch.diag(lambdas_sqrt)
+
+        decomposition = self._get(key="_nystrom_decomposition", level_key='_nystrom_elements', fun=fun)
+        # the dimension is only updated afterwards, as the decomposition on the disk is identified by the requested one
+        if decomposition[0].shape[1] != int(self._dim):
+            self._dim = utils.casti(decomposition[0].shape[1])
+        return decomposition
 
     def update_sample(self, sample_values, idx_sample=None):
         raise NotImplementedError
 
     def _explicit_with_none(self, x=None):
-        self._compute_decomposition()
+        H, lambdas_sqrt_inv, sample_phi = self._compute_decomposition()
 
         if x is None:
-            return self._get(key="_nystrom_sample_phi")
+            return sample_phi
 
         Kx = self._base_kernel.k(x)
-        return Kx @ self._get(key="_nystrom_H") @ self._get(key="_nystrom_lambdas_sqrt_inv")
+        return Kx @ H @ lambdas_sqrt_inv
 
     def _explicit(self, x):
         # should never happen
@@ -14,7 +14,6 @@ from math import sqrt, inf
 from typing import Union
 
 from ...utils import extend_docstring, FTYPE, castf, BijectionError
-from ...feature import Sample
 from ..kernel import Kernel
 
 
@@ -83,8 +82,8 @@ class RandomFeatures(Kernel, metaclass=ABCMeta):
 
     @sigma.setter
     def sigma(self, val):
-        self._reset_cache(reset_persisting=False, avoid_classes=[Sample, RandomFeatures])
         self._sigma.data.copy_(castf(val, tensor=False, dev=self._sigma.device))
+        self._cache_touch('_sigma')
 
     @property
     def sigma_trainable(self) -> bool:
@@ -148,6 +147,7 @@ class RandomFeatures(Kernel, metaclass=ABCMeta):
                                                    f"provided weights {val.shape[1]} (dim 1)."
             val = castf(val, dev=self._weights.device)
             self._weights.data = val
+            self._cache_touch('_weights')
 
             # zeroing the gradients if relevant
             if self.weights_trainable and self._weights.grad is not None:
@@ -212,5 +212,3 @@ class RandomFeatures(Kernel, metaclass=ABCMeta):
         dim_inv_sqrt = 1 / self.sigma
         return self.closed_form_kernel(dim_inv_sqrt * x, dim_inv_sqrt * y)
 
-    def after_step(self) -> None:
-        self._remove_from_cache('Kernel_RF_weights_pinv')
@@ -64,8 +64,8 @@ class Hat(Implicit):
 
     @lag.setter
     def lag(self, val):
-        self._reset_cache(reset_persisting=False)
         self._lag.data = utils.castf(val, tensor=False, dev=self._lag.device)
+        self._cache_touch('_lag')
 
     @property
     def lag_trainable(self) -> bool:
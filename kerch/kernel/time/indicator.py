@@ -96,8 +96,8 @@ class Indicator(Implicit):
 
     @lag.setter
     def lag(self, val):
-        self._reset_cache(reset_persisting=False)
         self._lag.data = utils.castf(val, tensor=False, dev=self._lag.device)
+        self._cache_touch('_lag')
 
     @property
     def lag_trainable(self) -> bool:
@@ -121,8 +121,8 @@ class Indicator(Implicit):
 
     @gamma.setter
     def gamma(self, val):
-        self._reset_cache(reset_persisting=False)
         self._gamma.data = utils.castf(val, tensor=False, dev=self._gamma.device)
+        self._cache_touch('_gamma')
 
     def _implicit(self, x, y):
         if self._link_training and self.lag_trainable:
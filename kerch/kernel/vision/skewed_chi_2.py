@@ -50,8 +50,8 @@ class SkewedChi2(Implicit):
 
     @p.setter
     def p(self, val):
-        self._reset_cache(reset_persisting=False)
         self._p.data = utils.castf(val, tensor=False, dev=self._p.device)
+        self._cache_touch('_p')
 
     def __str__(self):
         return f"Skewed Chi Squared kernel (p: {self.p})."
@@ -15,6 +15,15 @@ class _KPCA(_Level, metaclass=ABCMeta):
     Kernel Principal Component Analysis.
 
     :param prune_small_vals: Indicates whether the eigenvalues smaller than the machine precision should be pruned.
+    :param solver: Solver used in dual representation. The default ``'dense'`` forms the kernel matrix and
+        diagonalizes it. The ``'matrix_free'`` solver never forms the kernel matrix: it only relies on products with it,
+        computed by blocks of kernel evaluations, and on its diagonal. The leading eigenpairs are then computed by
+        randomized subspace iteration. This is relevant when the kernel matrix on the sample does not fit in memory.
+        Defaults to ``'dense'``.
+    :param block_size: Number of rows of the kernel matrix evaluated at once by the ``'matrix_free'`` solver.
+        Defaults to 1024.
+    :type solver: str, optional
+    :type block_size: int, optional
     """
 
     @utils.extend_docstring(_Level)
@@ -22,10 +31,32 @@ class _KPCA(_Level, metaclass=ABCMeta):
         super(_KPCA, self).__init__(*args, **kwargs)
         self._vals = torch.nn.Parameter(torch.empty(0, dtype=utils.FTYPE),
                                         requires_grad=False)
+        self._parameter_related_cache = [*self._parameter_related_cache, "sqrt_vals"]
         self._subloss_projected = None
         self._subloss_original = None
 
         self._prune_small_vals = kwargs.pop('prune_small_vals', False)
+        self.solver = kwargs.pop('solver', 'dense')
+        self._block_size = kwargs.pop('block_size', 1024)
+
+    @property
+    def solver(self) -> str:
+        r"""
+        Solver used in dual representation, either ``'dense'`` or ``'matrix_free'``.
+        """
+        return self._solver
+
+    @solver.setter
+    def solver(self, val: str):
+        val = val.lower()
+        if val not in ['dense', 'matrix_free']:
+            raise ValueError(f"Unknown solver {val}. The solver must be either 'dense' or 'matrix_free'.")
+        self._solver = val
+        self._remove_from_cache("eigs_dual")
+
+    @property
+    def _matrix_free(self) -> bool:
+        return self._solver == 'matrix_free'
 
     @property
     def vals(self) -> T:
@@ -42,6 +73,7 @@ class _KPCA(_Level, metaclass=ABCMeta):
     def vals(self, val):
         val = utils.castf(val, tensor=False, dev=self._vals.device)
         self._vals.data = val
+        self._cache_touch('_vals')
 
     def total_variance(self, as_tensor=False, normalize=True, representation=None) -> Union[float, T]:
         r"""
@@ -65,9 +97,10 @@ class _KPCA(_Level, metaclass=ABCMeta):
         if representation == 'primal':
             var = self._get("total_variance_primal", level_key=level_key, fun=lambda: torch.trace(self.C))
         else:
-            var = self._get("total_variance_dual", level_key=level_key, fun=lambda: torch.trace(self.K))
+            var = self._get("total_variance_dual", level_key=level_key, fun=self._trace_K)
         if normalize:
-            var /= self.num_idx
+            # not in place, the value is cached
+            var = var / self.num_idx
         if as_tensor:
             return var
         return var.detach().cpu().numpy()
@@ -104,13 +137,110 @@ class _KPCA(_Level, metaclass=ABCMeta):
             to ``False``
         :type as_tensor: bool, optional
         """
+        # in dual, the eigenvalues are the ones of the kernel matrix divided by the number of datapoints
         var = self.model_variance(as_tensor=as_tensor, normalize=False) / \
-              self.total_variance(as_tensor=as_tensor, normalize=False)
+              self.total_variance(as_tensor=as_tensor, normalize=self._representation == 'dual')
         return var
 
-    def _solve_primal(self) -> None:
-        C = self.C
+    def _decompose(self, representation: str, k: int, X=None) -> tuple:
+        if representation == 'dual' and self._matrix_free:
+            return utils.randomized_eigs(lambda m: self.K_matmul(m, self._block_size), num=self.num_idx, k=k,
+                                         device=self._dual_param.device, X=X)
+        return super(_KPCA, self)._decompose(representation, k, X)
+
+    ## SPECTRUM ESTIMATION
+
+    def spectral_density(self, num_probes: int = 10, num_steps: int = 30, representation=None) -> tuple:
+        r"""
+        Estimates the eigenvalue distribution of the model without any eigendecomposition, by stochastic Lanczos
+        quadrature on the covariance matrix (primal) or the kernel matrix (dual). The eigenvalues are scaled as
+        :py:attr:`vals`. This only requires ``num_probes * num_steps`` products with the matrix, which are computed
+        by blocks of kernel evaluations with the ``'matrix_free'`` solver. We refer to
+        :py:func:`kerch.utils.spectral_density` for more details.
+
+        :param num_probes: Number of random probe vectors. Defaults to 10.
+        :param num_steps: Number of Lanczos iterations per probe. Defaults to 30.
+        :param representation: Representation in which the spectrum is estimated. Defaults to the model
+            representation.
+        :type num_probes: int, optional
+        :type num_steps: int, optional
+        :type representation: str, optional
+        :return: nodes, weights. The weights sum up to the dimension of the decomposed matrix.
+        :rtype: Tuple[Tensor, Tensor]
+        """
+        representation = utils.check_representation(representation, self._representation, self)
+        if representation == 'primal':
+            C = self.C
+            matmul, num, fact = lambda m: C @ m, self.dim_feature, 1.
+        elif self._matrix_free:
+            matmul, num, fact = lambda m: self.K_matmul(m, self._block_size), self.num_idx, 1 / self.num_idx
+        else:
+            K = self.K
+            matmul, num, fact = lambda m: K @ m, self.num_idx, 1 / self.num_idx
+        nodes, weights = utils.spectral_density(matmul, num=num, num_probes=num_probes, num_steps=num_steps,
+                                                device=self._dual_param.device)
+        return fact * nodes, weights
+
+    def spectrum_histogram(self, bins: int = 50, num_probes: int = 10, num_steps: int = 30,
+                           representation=None) -> tuple:
+        r"""
+        Approximate histogram of the eigenvalues, based on :py:meth:`spectral_density`.
 
+        :param bins: Number of bins. Defaults to 50.
+        :type bins: int, optional
+        :return: counts, edges. The counts are the estimated number of eigenvalues in each bin.
+        :rtype: Tuple[Tensor[bins], Tensor[bins+1]]
+        """
+        nodes, weights = self.spectral_density(num_probes, num_steps, representation)
+        edges = torch.linspace(torch.min(nodes), torch.max(nodes), bins + 1, dtype=nodes.dtype, device=nodes.device)
+        idx = torch.clamp(torch.bucketize(nodes, edges, right=True) - 1, 0, bins - 1)
+        counts = torch.zeros(bins, dtype=weights.dtype, device=weights.device).index_add_(0, idx, weights)
+        return counts, edges
+
+    def effective_rank(self, num_probes: int = 10, num_steps: int = 30, representation=None,
+                       as_tensor=False) -> Union[float, T]:
+        r"""
+        Estimated effective rank :math:`\exp\left(-\sum_i p_i \log p_i\right)`, with
+        :math:`p_i = \lambda_i / \sum_j \lambda_j`, based on :py:meth:`spectral_density`.
+
+        :param as_tensor: Indicated whether the effective rank has to be returned as a float or a torch.Tensor.,
+            defaults to ``False``
+        :type as_tensor: bool, optional
+        """
+        nodes, weights = self.spectral_density(num_probes, num_steps, representation)
+        nodes = torch.clamp(nodes, min=0.)
+        p = nodes / torch.sum(weights * nodes)
+        erank = torch.exp(-torch.sum(weights * torch.xlogy(p, p)))
+        if as_tensor:
+            return erank
+        return erank.detach().cpu().numpy()
+
+    def explained_variance(self, num_probes: int = 10, num_steps: int = 30, representation=None) -> T:
+        r"""
+        Estimated explained variance curve, based on :py:meth:`spectral_density`. The element :math:`k-1` is the
+        proportion of the total variance contained in the :math:`k` leading components, i.e., an estimate of the
+        :py:meth:`relative_variance` the model would have with ``dim_output=k``. This allows to choose the output
+        dimension before any solve.
+
+        :return: Explained variance curve.
+        :rtype: Tensor[dim]
+        """
+        nodes, weights = self.spectral_density(num_probes, num_steps, representation)
+        nodes, order = torch.sort(torch.clamp(nodes, min=0.), descending=True)
+        weights = weights[order]
+        counts = torch.cumsum(weights, dim=0)
+        variance = torch.cumsum(weights * nodes, dim=0)
+        variance = variance / variance[-1]
+
+        k = torch.arange(1, round(counts[-1].item()) + 1, dtype=counts.dtype, device=counts.device)
+        idx = torch.clamp(torch.searchsorted(counts, k), max=counts.shape[0] - 1)
+        counts = torch.cat((torch.zeros(1, dtype=counts.dtype, device=counts.device), counts))
+        variance = torch.cat((torch.zeros(1, dtype=variance.dtype, device=variance.device), variance))
+        step = torch.clamp(counts[idx + 1] - counts[idx], min=utils.EPS)
+        curve = variance[idx] + (variance[idx + 1] - variance[idx]) * torch.clamp((k - counts[idx]) / step, max=1.)
+        return torch.clamp(curve, max=1.)
+
+    def _solve_primal(self) -> None:
         if self._dim_output is None:
             self._dim_output = self.dim_feature
             self._logger.warning(f"The output dimension has not been set and is now set to its maximum possible "
@@ -123,7 +253,7 @@ class _KPCA(_Level, metaclass=ABCMeta):
                               f"dimension is reduced to {self.dim_feature}.")
             self.dim_output = self.dim_feature
 
-        v, e = utils.eigs(C, k=self.dim_output, psd=True)
+        v, e = self._eigs('primal', self.dim_output)
 
         # prune very small eigenvalues if they exist to avoid unstability due to the later inversion
         idx_small = v < utils.EPS
@@ -136,14 +266,17 @@ class _KPCA(_Level, metaclass=ABCMeta):
             keep_idx = torch.logical_not(idx_small)
             v = v[keep_idx]
             e = e[:, keep_idx]
-            self._dim_output = self._dim_output - sum_small
+            self.dim_output = self._dim_output - sum_small
 
         self.primal_param = e
         self.vals = v
 
-    def _solve_dual(self) -> None:
-        K = self.K
+    def _trace_K(self) -> T:
+        if self._matrix_free:
+            return torch.sum(self.K_diag)
+        return torch.trace(self.K)
 
+    def _solve_dual(self) -> None:
         if self._dim_output is None:
             self._dim_output = self.num_idx
             self._logger.warning(f"The output dimension has not been set and is now set to its maximum possible "
@@ -156,7 +289,7 @@ class _KPCA(_Level, metaclass=ABCMeta):
                               f"dimension is reduced to {self.num_idx}.")
             self.dim_output = self.num_idx
 
-        v, e = utils.eigs(K, k=self.dim_output, psd=True)
+        v, e = self._eigs('dual', self.dim_output)
         fact = 1 / self.num_idx
 
         # prune very small eigenvalues if they exist to avoid unstability due to the later inversion
@@ -170,7 +303,7 @@ class _KPCA(_Level, metaclass=ABCMeta):
             keep_idx = torch.logical_not(idx_small)
             v = v[keep_idx]
             e = e[:, keep_idx]
-            self._dim_output = self._dim_output - sum_small
+            self.dim_output = self._dim_output - sum_small
 
         self.update_dual(e)
         self.vals = fact * v
@@ -222,10 +355,8 @@ class _KPCA(_Level, metaclass=ABCMeta):
 
         def fun():
             if representation == 'primal':
-                M = self.C
-            else:
-                M = self.K
-            return torch.trace(M)
+                return torch.trace(self.C)
+            return self._trace_K()
 
         return self._get(key='subloss_original_' + representation,
                          level_key=level_key, fun=fun)
@@ -241,6 +372,8 @@ class _KPCA(_Level, metaclass=ABCMeta):
                 M = self.C
             else:
                 U = self._dual_param  # transposed compared to dual_param
+                if self._matrix_free:
+                    return torch.sum(U.T * self.K_matmul(U.T, self._block_size))
                 M = self.K
             return torch.trace(U.T @ U @ M)
 
@@ -1,4 +1,6 @@
 # coding=utf-8
+from __future__ import annotations
+
 import torch
 from torch import Tensor as T
 from abc import ABCMeta, abstractmethod
@@ -91,6 +93,38 @@ class _Level(_View, metaclass=ABCMeta):
             _I_dual = self._get("Level_I_dual", level_key=level_key, fun=fun, overwrite=True, persisting=True)
         return _I_dual
 
+    def _eigs(self, representation: str, k: int) -> tuple:
+        r"""
+        Returns the ``k`` leading eigenpairs of the covariance matrix (primal) or of the kernel matrix (dual). The
+        decomposition is kept in the cache as long as the underlying matrix does not change. Requests for fewer
+        eigenpairs than already computed are served by slicing and requests for more are warm-started from the
+        eigenvectors already computed, so that changing ``dim_output`` does not require a new decomposition.
+        """
+        key = "eigs_" + representation
+        v, e = self._get(key, level_key="KPCA_eigs", fun=lambda: self._decompose(representation, k))
+        if v.shape[0] < k:
+            self._logger.debug(f"Extending the cached eigendecomposition from {v.shape[0]} to {k} eigenpairs.")
+            v, e = self._save(key, level_key="KPCA_eigs", fun=lambda: self._decompose(representation, k, e))
+        return v[:k], e[:, :k]
+
+    def _decompose(self, representation: str, k: int, X=None) -> tuple:
+        r"""
+        Computes at least the ``k`` leading eigenpairs of the covariance matrix (primal) or of the kernel matrix
+        (dual), starting from the eigenvectors ``X`` if provided. All the eigenpairs of a dense decomposition are
+        returned, so that they are all kept in the cache.
+        """
+        A = self.C if representation == 'primal' else self.K
+        return utils.eigs(A, k=k, psd=True, X=X, truncate=False)
+
+    def _cholesky(self, key: str, fun, level_key: str = "Level_cholesky") -> T:
+        r"""
+        Lower Cholesky factor of the symmetric positive definite matrix returned by ``fun``. The factor is stored in the
+        cache under ``"cholesky_" + key``, so that repeated solves with the same matrix only factorize it once. It is
+        used for the dual system of the LSSVM and the posterior of the PPCA, and can be passed to
+        :py:func:`kerch.utils.eigs` (argument ``L``) for generalized eigenvalue problems.
+        """
+        return self._get("cholesky_" + key, level_key=level_key, fun=lambda: torch.linalg.cholesky(fun()))
+
     @abstractmethod
     def _solve_primal(self) -> None:
         r"""
@@ -162,15 +196,8 @@ class _Level(_View, metaclass=ABCMeta):
             props[name] = val
         return props
 
-    def before_step(self) -> None:
-        r"""
-        Performs steps required before each training step.
-        """
-        losses_keys = self.losses().keys()
-        self._remove_from_cache(losses_keys)
-
-    def after_step(self) -> None:
-        r"""
-        Performs after-step operations, for example a transform of the parameters onto some manifold.
-        """
-        self._remove_from_cache(self._parameter_related_cache)
+    def _cache_dependencies(self, key) -> list | None:
+        # the outputs, the losses and the parameter related elements depend on all the parameters
+        if key in getattr(self, '_parameter_related_cache', []) or key.startswith(('forward_', 'subloss_')):
+            return None
+        return super(_Level, self)._cache_dependencies(key)
@@ -17,10 +17,13 @@ class _PPCA(_Level, metaclass=ABCMeta):
         super().__init__(*args, **kwargs)
         self.use_mean = kwargs["use_mean"]
         self.feature_noise = kwargs["feature_noise"]
+        # the noise is estimated by maximum likelihood when solving, unless it is provided
+        self._estimate_feature_noise = self._feature_noise is None
         self._vals = torch.nn.Parameter(torch.empty(0, dtype=utils.FTYPE),
                                         requires_grad=False)
         self._parameter_related_cache = [*self._parameter_related_cache,
-                                         "_B_primal", "_B_dual", "_Inv_primal", "_Inv_dual"]
+                                         "_B_primal", "_B_dual", "cholesky_PPCA_M_primal",
+                                         "cholesky_PPCA_M_dual", "sqrt_vals"]
 
     @property
     def use_mean(self) -> bool:
@@ -45,6 +48,7 @@ class _PPCA(_Level, metaclass=ABCMeta):
     def vals(self, val):
         val = utils.castf(val, tensor=False, dev=self._vals.device)
         self._vals.data = val
+        self._cache_touch('_vals')
 
     def total_variance(self, as_tensor=False, normalize=True, representation=None) -> float | T:
         r"""
@@ -114,7 +118,8 @@ class _PPCA(_Level, metaclass=ABCMeta):
     @property
     def feature_noise(self) -> float:
         r"""
-        Sigma value, acts as a regularization parameter.
+        Standard deviation :math:`\sigma` of the isotropic noise in the feature space, acts as a regularization
+        parameter. If not provided, it is estimated by maximum likelihood from the discarded eigenvalues.
         """
         return self._feature_noise
 
@@ -124,6 +129,7 @@ class _PPCA(_Level, metaclass=ABCMeta):
             self._feature_noise = None
         else:
             self._feature_noise = float(val)
+        self._reset_posterior()
 
     @property
     def mu(self) -> torch.nn.Parameter:
@@ -134,55 +140,81 @@ class _PPCA(_Level, metaclass=ABCMeta):
         self._mu.data = utils.castf(val, dev=self.sample.device, tensor=True)
 
     ########################################################################################################
+    @property
+    def H(self) -> T:
+        return self.dual_param
+
+    @property
+    def W(self) -> T:
+        return self.primal_param
+
+    def _reset_posterior(self) -> None:
+        self._remove_from_cache(["_B_primal", "_B_dual", "cholesky_PPCA_M_primal", "cholesky_PPCA_M_dual"])
+
     @property
     @torch.no_grad()
     def _B_primal(self) -> T:
+        r"""
+        Factor :math:`B = [W, \sigma I]^\top` of the marginal covariance :math:`B^\top B = WW^\top + \sigma^2 I` of
+        :math:`\phi`. As this covariance is low-rank plus diagonal, it does not need to be factorized.
+        """
+
         def compute() -> T:
-            return torch.cholesky(self.weight @ self.weight.T + self.feature_noise ** 2 * self._I_primal)
+            W = self.W
+            return torch.cat((W.T, self.feature_noise * torch.eye(W.shape[0], dtype=W.dtype, device=W.device)), dim=0)
 
         return self._get(key="_B_primal", level_key="PPCA_B_primal", fun=compute)
 
-    @_B_primal.setter
-    def _B_primal(self, val: T) -> None:
-        self._get(key="_B_primal", level_key="PPCA_B_primal", force=True, fun=lambda: val)
-
     @property
     @torch.no_grad()
     def _B_dual(self) -> T:
+        r"""
+        Factor :math:`B = [KH, \sigma R]^\top` of the marginal covariance :math:`B^\top B = KHH^\top K + \sigma^2 K` of
+        :math:`k`, with :math:`K = RR^\top`. The root :math:`R` is given by the explicit feature map if available and by
+        the Cholesky factor of the kernel matrix otherwise, its eigendecomposition being only used if the kernel matrix
+        is numerically singular.
+        """
+
         def compute() -> T:
-            return torch.cholesky(self.hidden.T @ self.hidden + self.feature_noise ** 2 * torch.inv(self.K))
+            K = self.K
+            if self.explicit:
+                R = self.phi()
+            else:
+                R, info = torch.linalg.cholesky_ex(K)
+                if info > 0:
+                    vals, vecs = torch.linalg.eigh(K)
+                    R = vecs * torch.sqrt(torch.clamp(vals, min=0.))[None, :]
+            return torch.cat(((K @ self.H).T, self.feature_noise * R.T), dim=0)
 
         return self._get(key="_B_dual", level_key="PPCA_B_dual", fun=compute)
 
-    @_B_dual.setter
-    def _B_dual(self, val: T) -> None:
-        self._get(key="_B_dual", level_key="PPCA_B_dual", force=True, fun=lambda: val)
-
     @property
     @torch.no_grad()
-    def _Inv_primal(self) -> T:
-        def compute() -> T:
-            return torch.inv(self.weight.T @ self.weight + self.feature_noise ** 2 * self._I_primal)
+    def _M_primal(self) -> T:
+        r"""
+        Cholesky factor of the :math:`q \times q` matrix :math:`M = W^\top W + \sigma^2 I` of the posterior of
+        :math:`h` given :math:`\phi`.
+        """
 
-        return self._get(key="_Inv_primal", level_key="PPCA_Inv_primal", fun=compute)
+        def compute() -> T:
+            W = self.W
+            return W.T @ W + self.feature_noise ** 2 * torch.eye(W.shape[1], dtype=W.dtype, device=W.device)
 
-    @_Inv_primal.setter
-    @torch.no_grad()
-    def _Inv_primal(self, val: T) -> None:
-        self._get(key="_Inv_primal", level_key="PPCA_Inv_primal", fun=lambda: val, overwrite=True)
+        return self._cholesky("PPCA_M_primal", fun=compute, level_key="PPCA_M_primal")
 
     @property
     @torch.no_grad()
-    def _Inv_dual(self) -> T:
-        def compute() -> T:
-            return torch.inv(self.hidden.T @ self.K @ self.hidden + self.feature_noise ** 2 * self._I_dual)
+    def _M_dual(self) -> T:
+        r"""
+        Cholesky factor of the :math:`q \times q` matrix :math:`M = H^\top K H + \sigma^2 I` of the posterior of
+        :math:`h` given :math:`k`. This is the same matrix as in primal, as :math:`W = \Phi^\top H`.
+        """
 
-        return self._get(key="_Inv_dual", level_key="PPCA_Inv_dual", fun=compute)
+        def compute() -> T:
+            H = self.H
+            return H.T @ self.K @ H + self.feature_noise ** 2 * torch.eye(H.shape[1], dtype=H.dtype, device=H.device)
 
-    @_Inv_dual.setter
-    @torch.no_grad()
-    def _Inv_dual(self, val: T) -> None:
-        self._get(key="_Inv_dual", level_key="PPCA_Inv_dual", fun=lambda: val, overwrite=True)
+        return self._cholesky("PPCA_M_dual", fun=compute, level_key="PPCA_M_dual")
 
     ########################################################################################################################
 
@@ -190,7 +222,9 @@ class _PPCA(_Level, metaclass=ABCMeta):
     def h_map(self, phi: Optional[T] = None, k: Optional[T] = None) -> T:
         r"""
         Draws a `h` given the maximum a posteriori of the distribution. By choosing the input, you either
-        choose a primal or dual representation.
+        choose a primal or dual representation. This is given by :math:`M^{-1}W^\top\phi` in primal and
+        :math:`M^{-1}H^\top k` in dual, which only requires triangular solves with the cached Cholesky factor of the
+        :math:`q \times q` matrix :math:`M`.
 
         :param phi: Primal representation.
         :param k: Dual representation.
@@ -201,9 +235,11 @@ class _PPCA(_Level, metaclass=ABCMeta):
         """
 
         if phi is not None and k is None:
-            return phi @ self.weight.T @ self._Inv_primal
+            if self.use_mean:
+                phi = phi - self.mu
+            return torch.cholesky_solve(self.W.T @ phi.T, self._M_primal).T
         if phi is None and k is not None:
-            return k @ self.hidden.T @ self._Inv_dual
+            return torch.cholesky_solve(self.H.T @ k.T, self._M_dual).T
         else:
             raise AttributeError("One and only one attribute phi or k has to be specified.")
 
@@ -218,8 +254,8 @@ class _PPCA(_Level, metaclass=ABCMeta):
         :rtype: Tensor[N, dim_input]
         """
         if self.use_mean:
-            return h @ self.weight.T + self.mu
-        return h @ self.weight.T
+            return h @ self.W.T + self.mu
+        return h @ self.W.T
 
     @torch.no_grad()
     def k_map(self, h: T) -> T:
@@ -233,7 +269,7 @@ class _PPCA(_Level, metaclass=ABCMeta):
         """
         if self.use_mean:
             raise NotImplementedError
-        return h @ self.hidden.T @ self.K
+        return h @ self.H.T @ self.K
 
     @torch.no_grad()
     def draw_h(self, num: int = 1) -> T:
@@ -250,7 +286,8 @@ class _PPCA(_Level, metaclass=ABCMeta):
     @torch.no_grad()
     def draw_phi(self, num: int = 1, posterior: bool = True) -> T:
         r"""
-        Draws a primal representation phi given its posterior distribution.
+        Draws a primal representation phi given its posterior distribution. All samples are obtained at once by the
+        product of a standard normal matrix with the factor of the covariance.
 
         :param posterior: Indicates whether phi has to be drawn from its posterior distribution or its conditional
             given the prior of h. Defaults to True.
@@ -261,17 +298,19 @@ class _PPCA(_Level, metaclass=ABCMeta):
         :rtype: Tensor[num, dim_input]
         """
         if posterior:
-            u = torch.randn((num, self.dim_feature), dtype=utils.FTYPE, device=self.sample.device)
+            B = self._B_primal
+            u = torch.randn((num, B.shape[0]), dtype=B.dtype, device=B.device)
             if self.use_mean:
-                return u @ self._B_primal + self.mu
-            return u @ self._B_primal
+                return u @ B + self.mu
+            return u @ B
         h = self.draw_h(num)
         return self.phi_map(h)
 
     @torch.no_grad()
     def draw_k(self, num: int = 1, posterior: bool = False) -> T:
         r"""
-        Draws a dual representation k given its posterior distribution.
+        Draws a dual representation k given its posterior distribution. All samples are obtained at once by the
+        product of a standard normal matrix with the factor of the covariance.
 
         :param posterior: Indicates whether phi has to be drawn from its posterior distribution or its conditional
             given the prior of h. Defaults to True.
@@ -282,10 +321,11 @@ class _PPCA(_Level, metaclass=ABCMeta):
         :rtype: Tensor[num, num_idx]
         """
         if posterior:
-            u = torch.randn((num, self.num_idx), dtype=utils.FTYPE, device=self.sample.device)
             if self.use_mean:
                 raise NotImplementedError
-            return u @ self._B_dual
+            B = self._B_dual
+            u = torch.randn((num, B.shape[0]), dtype=B.dtype, device=B.device)
+            return u @ B
         h = self.draw_h(num)
         return self.k_map(h)
 
@@ -409,7 +409,7 @@ class _View(Stochastic, metaclass=ABCMeta):
 
     def forward(self, x=None, representation=None):
         representation = utils.check_representation(representation, default=self._representation)
-        name = f"forward_{id(x)}_{representation}"
+        name = f"forward_{self._fingerprint(x)}_{representation}"
 
         def get_level_key() -> str:
             if representation == self._representation:
@@ -420,4 +420,4 @@ class _View(Stochastic, metaclass=ABCMeta):
                     else "forward_oos_other_representation"
             return level_key
 
-        return self._get(name, level_key=lambda: get_level_key(), fun=lambda: self._forward(representation, x))
+        return self._get(name, level_key=get_level_key(), fun=lambda: self._forward(representation, x))
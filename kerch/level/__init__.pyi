@@ -1,6 +1,7 @@
 # coding=utf-8
 from .single_view import (KPCA as KPCA,
                           LSSVM as LSSVM,
+                          FixedSizeLSSVM as FixedSizeLSSVM,
                           PPCA as PPCA,
                           Ridge as Ridge,
                           Level as Level)
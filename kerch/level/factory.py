@@ -19,8 +19,8 @@ def factory(level_type='kpca', **kwargs) -> Level:
         Only supports single view levels.
     """
 
-    if level_type.lower() not in ["kpca", "lssvm", "ridge"]:
-        raise NameError(f"Invalid level type, currently only KPCA, LSSVM and Ridge supported.")
+    if level_type.lower() not in ["kpca", "lssvm", "ridge", "fixedsizelssvm"]:
+        raise NameError(f"Invalid level type, currently only KPCA, LSSVM, FixedSizeLSSVM and Ridge supported.")
 
     def case_insensitive_getattr(obj, attr):
         for a in dir(obj):
@@ -4,6 +4,7 @@ from torch import Tensor as T
 from .MVLevel import MVLevel
 from .._KPCA import _KPCA
 from ... import utils
+from ...method import smoother
 
 
 class MVKPCA(_KPCA, MVLevel):
@@ -15,30 +16,51 @@ class MVKPCA(_KPCA, MVLevel):
     @utils.extend_docstring(MVLevel)
     def __init__(self, *args, **kwargs):
         super(MVKPCA, self).__init__(*args, **kwargs)
+        self._projection_keys = set()
 
     def __str__(self):
         return "multi-view KPCA(" + MVLevel.__str__(self) + "\n)"
 
+    def _reset_projections(self) -> None:
+        self._remove_from_cache(list(self._projection_keys))
+        self._projection_keys = set()
+
+    def solve(self, sample=None, target=None, representation=None, **kwargs) -> None:
+        super(MVKPCA, self).solve(sample=sample, target=target, representation=representation, **kwargs)
+        self._reset_projections()
+
+    def _projector(self, to_predict: list, representation: str) -> T:
+        r"""
+        Right factor :math:`P = M^{-1}B^\top` of the projection on the views ``to_predict``, with
+        :math:`M = \mathrm{diag}(\lambda) - B^\top B` in primal (:math:`B` the weights of the views to predict) and
+        :math:`M = \mathrm{diag}(\lambda) - H^\top K_{\mathrm{predict}} H` in dual (:math:`B^\top = H^\top
+        K_{\mathrm{predict}}`). It is obtained by a solve with the LU factorization of the :math:`q \times q` matrix
+        :math:`M` and is cached for each combination of views to predict, so that repeated projections only amount to
+        matrix products.
+        """
+        key = f"MVKPCA_projector_{representation}_" + "_".join(to_predict)
+
+        def fun():
+            if representation == 'primal':
+                weight_predict = self.weights_by_name(to_predict)
+                M = torch.diag(self.vals) - weight_predict.T @ weight_predict
+                rhs = weight_predict.T
+            else:
+                rhs = self.H.T @ self.k(to_predict)
+                M = torch.diag(self.vals) - rhs @ self.H
+            return torch.linalg.lu_solve(*torch.linalg.lu_factor(M), rhs)
+
+        self._projection_keys.add(key)
+        return self._get(key, level_key="MVKPCA_projector", fun=fun)
+
     def _project_primal(self, known, to_predict):
         phi_known = self.phi(known)
         weight_known = self.weights_by_name(list(known.keys()))
-        weight_predict = self.weights_by_name(to_predict)
-
-        Inv = torch.linalg.inv(torch.diag(self.vals) - weight_predict.T @ weight_predict)
-        return phi_known @ weight_known @ Inv @ weight_predict.T
+        return phi_known @ weight_known @ self._projector(to_predict, 'primal')
 
     def _project_dual(self, known, to_predict):
         k_known = self.k(known)
-        K_predict = self.k(to_predict)
-
-        sqrt_vals = torch.sqrt(self.vals).unsqueeze(0)
-        Norm = sqrt_vals.T @ sqrt_vals
-
-        Inv = torch.linalg.inv(torch.diag(self.vals) - self.H.T @ K_predict @ self.H)
-        # Inv = torch.linalg.inv(self.H.T @ K_predict @ self.H / Norm)
-
-        # return K_predict @ self.H.T @ Inv @ self.H @ k_known
-        return k_known @ self.H @ Inv @ self.H.T @ K_predict
+        return k_known @ self.H @ self._projector(to_predict, 'dual')
 
     def _project(self, known: dict, representation: str):
         r"""
@@ -92,23 +114,29 @@ class MVKPCA(_KPCA, MVLevel):
         method = kwargs["method"]
 
         sol = {}
+        views = list(self.views_by_name(to_predict))
         if representation == 'primal':
             dim = 0
-            for view, name in zip(self.views_by_name(to_predict), to_predict):
-                view_phi = transform[:, dim:view.dim_feature]
-                dim = view.dim_feature
+            for view, name in zip(views, to_predict):
+                view_phi = transform[:, dim:dim + view.dim_feature]
+                dim += view.dim_feature
                 if method == 'smoother':
-                    sol[name] = view.kernel.implicit_preimage(view_phi @ view.phi().T, kwargs["knn"])
+                    sol[name] = view.kernel.implicit_preimage(view_phi @ view.phi().T, method='smoother',
+                                                              num=kwargs["knn"])
                 elif method == 'pinv':
                     sol[name] = view.kernel.explicit_preimage(view_phi)
                 else:
                     raise NotImplementedError
         elif representation == 'dual':
-            for view, name in zip(self.views_by_name(to_predict), to_predict):
-                if method == 'smoother':
-                    sol[name] = view.kernel.implicit_preimage(transform, kwargs["knn"])
-                else:
-                    raise NotImplementedError
+            if method == 'smoother':
+                # the coefficients are shared by all views: their pre-images are obtained at once
+                observations = torch.cat([view.current_sample for view in views], dim=1)
+                preimages = smoother(coefficients=transform, observations=observations, num=kwargs["knn"])
+                dims = [view.dim_input for view in views]
+                for name, preimage in zip(to_predict, torch.split(preimages, dims, dim=1)):
+                    sol[name] = preimage
+            else:
+                raise NotImplementedError
 
         return sol
 
@@ -23,9 +23,10 @@ class MultiView(_View):
         "prop": None
     })
     def __init__(self, *views, **kwargs):
-        super(MultiView, self).__init__(*args, **kwargs)
+        # the views are required by the resets during the initialization
         self._views = OrderedDict()
         self._num_views = 0
+        super(MultiView, self).__init__(**kwargs)
 
         self._logger.debug("The output dimension, the sample and the hidden variables of each View will be overwritten "
                         "by the general value passed as an argument, possibly with None.")
@@ -46,16 +47,15 @@ class MultiView(_View):
         """
         Adds a view
         """
-        # get or create the view
+        # get or create the view, the parameters being those of the multi-view
+        name = None
         if isinstance(view, View):
-            view.dim_output = self._dim_output
-            view.hidden = self.hidden_as_param
+            pass
         elif isinstance(view, dict):
+            view = dict(view)
+            name = view.pop("name", None)
             view = View(**{"representation": self._representation,
-                           **view,
-                           "dim_output": self._dim_output,
-                           "hidden": self.hidden,
-                           })
+                           **view})
         else:
             self._logger.error(f"View {view} could not be added as it is nor a view object nor a dictionnary of "
                             f"parameters")
@@ -68,9 +68,7 @@ class MultiView(_View):
             self._num_total = view.num_sample
 
         # append to dict and meta variables for the known
-        try:
-            name = view.name
-        except AttributeError:
+        if name is None:
             name = str(self._num_views)
         self._views[name] = view
         self.add_module(name, view)
@@ -82,14 +80,9 @@ class MultiView(_View):
         # add a view to the count
         self._num_views += 1
 
-    def _reset_dual(self) -> None:
-        super(MultiView, self)._reset_dual()
-        for v in self.views:
-            v.hidden = self.hidden
-
     def _reset_primal(self) -> None:
-        for view in self._views.values():
-            view._reset_weight()
+        self._primal_param = torch.nn.Parameter(torch.empty(0, dtype=utils.FTYPE, device=self._primal_param.device),
+                                                requires_grad=self._primal_param.requires_grad)
 
     ##################################################################"
     @property
@@ -152,15 +145,15 @@ class MultiView(_View):
 
     ## WEIGHT
     def weights_by_name(self, names: List[str]):
-        weights = [v.weight for v in self.views_by_name(names)]
+        weights = [v.primal_param for v in self.views_by_name(names)]
         return torch.cat(weights, dim=0)
 
     def _weight_from_view(self, id: int) -> T:
         dim = self.dims_feature_cumulative
         if id == 0:
-            return self.weight[:dim[0], :]
+            return self.primal_param[:dim[0], :]
         else:
-            return self.weight[dim[id - 1]:dim[id], :]
+            return self.primal_param[dim[id - 1]:dim[id], :]
 
     def _update_primal_from_dual(self):
         for v in self._views:
@@ -219,5 +212,12 @@ class MultiView(_View):
     def K(self) -> T:
         return sum(self.Ks)
 
+    def K_matmul(self, v: T, block_size: int = 1024) -> T:
+        return sum(view.K_matmul(v, block_size) for view in self.views)
+
+    @property
+    def K_diag(self) -> T:
+        return sum(view.K_diag for view in self.views)
+
     def _forward(self, representation, x=None):
         raise NotImplementedError
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import torch
+from torch import Tensor as T
+
+from .LSSVM import LSSVM
+from ... import utils
+
+
+class FixedSizeLSSVM(LSSVM):
+    r"""
+    Fixed-size least squares support vector machine.
+
+    A subset of ``num_prototypes`` points of the sample, the prototypes, is selected by maximizing the quadratic Rényi
+    entropy :math:`H_R = -\log\left(\frac{1}{m^2}\sum_{i,j=1}^m k(x_i, x_j)\right)` of the subset. Starting from a
+    random subset, a prototype is randomly swapped with a point of the sample and the swap is kept if the entropy
+    increases. As the criterion only depends on the sum of the kernel matrix of the prototypes, each swap is evaluated
+    in :math:`\mathcal{O}(m)` from the row sums of this matrix.
+
+    The model is then trained in primal on the Nyström features :math:`\phi(x) = k(x, P)U\Lambda^{-1/2}` of the
+    prototypes :math:`P`, with :math:`K_{PP} = U\Lambda U^\top`. The inference thus costs :math:`\mathcal{O}(m)`
+    kernel evaluations per point instead of :math:`\mathcal{O}(N)` in dual.
+
+    .. note::
+        These are the features of :py:class:`kerch.kernel.Nystrom`, which are not built on it: a Nyström kernel
+        evaluates its own base kernel on its own sample, whereas the prototypes are evaluated with the kernel of the
+        level and its current (possibly trainable) hyperparameters.
+
+    .. note::
+        The out-of-sample kernel evaluations of a centered or normalized kernel still require statistics over the
+        whole sample. A kernel without default transforms (e.g. RBF) is the natural choice here.
+
+    :param num_prototypes: Number of prototypes :math:`m`. Defaults to 100.
+    :param num_swaps: Number of swaps tried during the selection of the prototypes. Defaults to ``None``, which
+        corresponds to 10 times the number of prototypes.
+    :type num_prototypes: int, optional
+    :type num_swaps: int, optional
+    """
+
+    @utils.extend_docstring(LSSVM)
+    @utils.kwargs_decorator({
+        "representation": "primal"
+    })
+    def __init__(self, *args, **kwargs):
+        # the features are required by the initialization of the primal parameters
+        self._num_prototypes = kwargs.pop('num_prototypes', 100)
+        self._num_swaps = kwargs.pop('num_swaps', None)
+        self._prototypes = None
+        super(FixedSizeLSSVM, self).__init__(*args, **kwargs)
+        if self._representation != 'primal':
+            raise utils.RepresentationError(cls=self, message="A fixed-size LSSVM is only defined in primal.")
+
+    def __str__(self):
+        return "Fixed-size LSSVM with " + LSSVM.__str__(self)
+
+    @property
+    def num_prototypes(self) -> int:
+        r"""
+        Number of prototypes.
+        """
+        return self._num_prototypes
+
+    @num_prototypes.setter
+    def num_prototypes(self, val: int):
+        self._num_prototypes = int(val)
+        self._reset_prototypes()
+
+    @property
+    def prototypes(self) -> T:
+        r"""
+        Prototypes on which the features are built. They are selected on the first call if not set.
+        """
+        if self._prototypes is None:
+            self.select_prototypes()
+        return self._prototypes
+
+    def _reset_prototypes(self) -> None:
+        self._prototypes = None
+        self._remove_from_cache(["fixed_size_projection", "fixed_size_phi"])
+        self._reset_primal()
+
+    def init_sample(self, sample=None, idx_sample=None, prop_sample=None):
+        super(FixedSizeLSSVM, self).init_sample(sample=sample, idx_sample=idx_sample, prop_sample=prop_sample)
+        if self._prototypes is not None:
+            self._reset_prototypes()
+
+    @torch.no_grad()
+    def select_prototypes(self) -> T:
+        r"""
+        Selects the prototypes among the current sample by maximizing their quadratic Rényi entropy.
+
+        :return: Indices of the prototypes relative to the current sample.
+        :rtype: Tensor[num_prototypes]
+        """
+        x = self.kernel.current_sample_projected
+        num = x.shape[0]
+        m = min(self._num_prototypes, num)
+        num_swaps = 10 * m if self._num_swaps is None else self._num_swaps
+
+        perm = torch.randperm(num, device=x.device)
+        idx, rest = perm[:m].clone(), perm[m:].clone()
+        K = self.kernel._implicit(x[idx, :], x[idx, :])
+        sums = torch.sum(K, dim=1)
+        total = torch.sum(sums)
+
+        if rest.numel() > 0:
+            swaps_in = torch.randint(rest.numel(), (num_swaps,))
+            swaps_out = torch.randint(m, (num_swaps,))
+            num_accepted = 0
+            for j, i in zip(swaps_in.tolist(), swaps_out.tolist()):
+                # sum of the kernel matrix once the prototype i is replaced by the candidate j
+                k_new = self.kernel._implicit(x[rest[j:j + 1], :], x[idx, :]).squeeze(0)
+                k_jj = self.kernel._implicit(x[rest[j:j + 1], :], x[rest[j:j + 1], :]).squeeze()
+                k_new[i] = k_jj
+                new_total = total - 2 * sums[i] + K[i, i] + 2 * (torch.sum(k_new) - k_jj) + k_jj
+                # a larger entropy corresponds to a smaller sum
+                if new_total < total:
+                    sums = sums - K[:, i] + k_new
+                    sums[i] = torch.sum(k_new)
+                    K[i, :], K[:, i] = k_new, k_new
+                    total = new_total
+                    idx[i], rest[j] = rest[j].clone(), idx[i].clone()
+                    num_accepted += 1
+            self._logger.info(f"{num_accepted} swaps accepted out of {num_swaps} for the selection of the "
+                              f"prototypes (entropy {-torch.log(total / m ** 2).item():.4e}).")
+
+        self._reset_prototypes()
+        self._prototypes = self.current_sample[idx, :].data
+        return idx
+
+    @property
+    def _projection(self) -> T:
+        r"""
+        Map :math:`U\Lambda^{-1/2}` from the kernel evaluations on the prototypes to the features, with the very small
+        eigenvalues of :math:`K_{PP} = U\Lambda U^\top` pruned.
+        """
+
+        def fun():
+            K = self.k(self.prototypes, self.prototypes)
+            vals, vecs = torch.linalg.eigh(K)
+            keep = vals > utils.EPS * torch.max(vals)
+            if not torch.all(keep):
+                self._logger.warning(f"{torch.sum(~keep)} very small eigenvalues of the kernel matrix of the "
+                                     f"prototypes are pruned.")
+            return vecs[:, keep] / torch.sqrt(vals[keep])[None, :]
+
+        return self._get("fixed_size_projection", level_key="FixedSizeLSSVM_features", fun=fun)
+
+    @property
+    def dim_feature(self) -> int:
+        return self._projection.shape[1]
+
+    def phi(self, x=None, transform=None) -> T:
+        if x is None:
+            return self._get("fixed_size_phi", level_key="FixedSizeLSSVM_features",
+                             fun=lambda: self.k(None, self.prototypes) @ self._projection)
+        return self.k(x, self.prototypes) @ self._projection
+
+    def _solve_dual(self) -> None:
+        raise utils.RepresentationError(cls=self, message="A fixed-size LSSVM can only be solved in primal.")
+
+    def _path_eigs(self, representation: str) -> tuple:
+        if representation == 'dual':
+            raise utils.RepresentationError(cls=self, message="A fixed-size LSSVM can only be solved in primal.")
+        return super(FixedSizeLSSVM, self)._path_eigs(representation)
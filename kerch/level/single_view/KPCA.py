@@ -4,7 +4,9 @@ from torch import Tensor as T
 
 from .Level import Level
 from .._KPCA import _KPCA
-from ...utils import check_representation, extend_docstring, kwargs_decorator
+from ...utils import check_representation, extend_docstring, kwargs_decorator, castf
+from ...utils.type import EPS
+from ...transform.all import MeanCentering, UnitSphereNormalization
 
 
 class KPCA(_KPCA, Level):
@@ -55,3 +57,191 @@ class KPCA(_KPCA, Level):
 
     def _update_dual_from_primal(self):
         self.hidden = self._forward(representation='primal') @ torch.diag(1 / self.vals)
+
+    ## INCREMENTAL UPDATES
+
+    @property
+    def _incremental(self) -> bool:
+        r"""
+        Indicates whether the model can be updated incrementally instead of being solved again.
+        """
+        transforms = self._default_kernel_transform
+        return self._representation == 'dual' \
+            and self._dual_param_exists \
+            and self._vals.nelement() > 0 \
+            and not self._default_sample_transform \
+            and self.num_idx == self._num_total \
+            and transforms in ([], [MeanCentering], [UnitSphereNormalization],
+                               [UnitSphereNormalization, MeanCentering])
+
+    def _incremental_statistics(self) -> tuple:
+        r"""
+        Statistics of the uncentered kernel matrix on the sample required by the incremental updates: the norms of the
+        sample points if the kernel is normalized and the row means and total mean if it is centered. These are
+        computed once and then updated together with the sample.
+        """
+
+        def fun():
+            statistics = dict(self.kernel._K_block_statistics(self._block_size)[0])
+            mean, mean_tot = statistics.get(MeanCentering, (None, None))
+            return statistics.get(UnitSphereNormalization, None), mean, mean_tot
+
+        return self._get("incremental_statistics", level_key="KPCA_incremental_statistics", fun=fun)
+
+    def _k_uncentered(self, x: T, y: T, norm_x: T | None, norm_y: T | None) -> T:
+        k = self._implicit(x, y)
+        if norm_x is not None:
+            k = k / torch.clamp(norm_x[:, None] * norm_y[None, :], min=EPS)
+        return k
+
+    def _rayleigh_ritz(self, basis: T, matmul, centered: bool) -> tuple:
+        r"""
+        Returns the hidden vectors and eigenvalues given by the leading eigenpairs of the kernel matrix restricted to the
+        span of ``basis``, the kernel matrix being only accessed through ``matmul``.
+        """
+        if centered:
+            basis = basis - torch.mean(basis, dim=0, keepdim=True)
+        s, u = torch.linalg.eigh(basis.T @ basis)
+        keep = s > EPS * torch.max(s)
+        basis = basis @ (u[:, keep] / torch.sqrt(s[keep]))
+        if centered:
+            basis = basis - torch.mean(basis, dim=0, keepdim=True)
+
+        m = basis.T @ matmul(basis)
+        s, u = torch.linalg.eigh(.5 * (m + m.T))
+        k = min(self.dim_output, s.shape[0])
+        s = torch.flip(s, dims=(0,))[:k]
+        u = torch.flip(u, dims=(1,))[:, :k]
+
+        return basis @ u, s / basis.shape[0]
+
+    @torch.no_grad()
+    def partial_fit(self, x_new: T) -> None:
+        r"""
+        Adds the points ``x_new`` to the sample and updates the model accordingly. Instead of a new eigendecomposition
+        of the kernel matrix, the current hidden vectors and eigenvalues are updated by a Rayleigh-Ritz projection on
+        their span augmented with the new points (and the constant vector and row means if the kernel is centered).
+        The cost of an update scales as :math:`\mathcal{O}(\texttt{num_idx} \times (\texttt{dim_output} + m)^2)` for
+        :math:`m` new points, instead of :math:`\mathcal{O}(\texttt{num_idx}^3)` for a new fit.
+
+        :param x_new: New sample points.
+        :type x_new: Tensor[m, dim_input]
+
+        .. note::
+            The update is exact with respect to the rank ``dim_output`` approximation of the kernel matrix on the
+            previous sample. If the model is not fitted yet, works in primal, on a stochastic subset of the sample or
+            uses other transforms than the kernel centering and unit sphere normalization, a new fit on the whole
+            sample is performed instead.
+        """
+        x_new = castf(x_new, dev=self._sample.device)
+
+        if not self._incremental:
+            self._logger.info("The model cannot be updated incrementally. It is solved again on the whole sample.")
+            self._reset_dual()
+            self.init_sample(torch.cat((self.sample.data, x_new), dim=0))
+            self.solve()
+            return
+
+        x = self.current_sample_projected
+        n, m = x.shape[0], x_new.shape[0]
+        norm, mean, mean_tot = self._incremental_statistics()
+        norm_new = None if norm is None else torch.sqrt(torch.clamp(self._implicit_self(x_new), min=0.))
+        B = self._k_uncentered(x, x_new, norm, norm_new)
+        C = self._k_uncentered(x_new, x_new, norm_new, norm_new)
+
+        H, vals = self.dual_param, self.vals * n
+        kappa = self.kappa
+        centered = mean is not None
+
+        def matmul(v):
+            top, bottom = v[:n, :], v[n:, :]
+            out_top = H @ (vals[:, None] * (H.T @ top)) + kappa * (B @ bottom)
+            if centered:
+                sum_top = torch.sum(top, dim=0, keepdim=True)
+                out_top = out_top + kappa * (mean[:, None] * sum_top + (mean @ top)[None, :]
+                                             - mean_tot * sum_top)
+            return torch.cat((out_top, kappa * (B.T @ top + C @ bottom)), dim=0)
+
+        basis = [torch.cat((H, torch.zeros((m, H.shape[1]), dtype=H.dtype, device=H.device)), dim=0),
+                 torch.cat((torch.zeros((n, m), dtype=H.dtype, device=H.device),
+                            torch.eye(m, dtype=H.dtype, device=H.device)), dim=0)]
+        if centered:
+            basis.append(torch.cat((mean, torch.zeros(m, dtype=H.dtype, device=H.device)))[:, None])
+        dual_param, vals = self._rayleigh_ritz(torch.cat(basis, dim=1), matmul, centered)
+
+        # updating the statistics to the new sample
+        if norm is not None:
+            norm = torch.cat((norm, norm_new))
+        if centered:
+            mean = torch.cat((n * mean + torch.sum(B, dim=1), torch.sum(B, dim=0) + torch.sum(C, dim=1))) / (n + m)
+            mean_tot = torch.mean(mean)
+
+        self.init_sample(torch.cat((self.sample.data, x_new), dim=0))
+        self.dual_param = dual_param
+        self.vals = vals
+        self._save("incremental_statistics", level_key="KPCA_incremental_statistics",
+                   fun=lambda: (norm, mean, mean_tot))
+
+    @torch.no_grad()
+    def forget(self, idx) -> None:
+        r"""
+        Removes the points of indices ``idx`` from the sample and updates the model accordingly. The current hidden
+        vectors and eigenvalues are downdated by a Rayleigh-Ritz projection of the rank ``dim_output`` approximation of
+        the kernel matrix on the remaining points. Apart from the update of the centering statistics, which requires
+        the kernel between the remaining and the removed points, no new kernel evaluation is necessary.
+
+        :param idx: Indices of the sample points to be removed.
+        :type idx: int[]
+
+        .. note::
+            If the model cannot be updated incrementally (see :py:meth:`partial_fit`), it is solved again on the
+            remaining sample.
+        """
+        keep = torch.ones(self._num_total, dtype=torch.bool, device=self._sample.device)
+        keep[idx] = False
+
+        if not self._incremental:
+            self._logger.info("The model cannot be updated incrementally. It is solved again on the whole sample.")
+            self._reset_dual()
+            self.init_sample(self.sample.data[keep, :])
+            self.solve()
+            return
+
+        x = self.current_sample_projected
+        n = x.shape[0]
+        norm, mean, mean_tot = self._incremental_statistics()
+
+        H, vals = self.dual_param[keep, :], self.vals * n
+        kappa = self.kappa
+        centered = mean is not None
+
+        def matmul(v):
+            out = H @ (vals[:, None] * (H.T @ v))
+            if centered:
+                sum_v = torch.sum(v, dim=0, keepdim=True)
+                out = out + kappa * (mean[keep, None] * sum_v + (mean[keep] @ v)[None, :] - mean_tot * sum_v)
+            return out
+
+        basis = [H]
+        if centered:
+            basis.append(mean[keep, None])
+        dual_param, vals = self._rayleigh_ritz(torch.cat(basis, dim=1), matmul, centered)
+
+        # updating the statistics to the new sample
+        if centered:
+            removed = torch.logical_not(keep)
+            norm_keep = None if norm is None else norm[keep]
+            norm_removed = None if norm is None else norm[removed]
+            k_removed = self._k_uncentered(x[keep, :], x[removed, :], norm_keep, norm_removed)
+            mean = (n * mean[keep] - torch.sum(k_removed, dim=1)) / torch.sum(keep)
+            mean_tot = torch.mean(mean)
+        else:
+            mean = None
+        if norm is not None:
+            norm = norm[keep]
+
+        self.init_sample(self.sample.data[keep, :])
+        self.dual_param = dual_param
+        self.vals = vals
+        self._save("incremental_statistics", level_key="KPCA_incremental_statistics",
+                   fun=lambda: (norm, mean, mean_tot))
@@ -1,3 +1,4 @@
+from __future__ import annotations
 from typing import Iterator
 
 import torch
@@ -5,14 +6,36 @@ from torch import Tensor as T
 
 from .Level import Level
 from ... import utils
+from ...transform.all import UnitSphereNormalization
 
 
 class LSSVM(Level):
     r"""
     Least squares support vector machine.
 
+    In dual, the model is fitted by a Cholesky factorization :math:`K + \gamma I = LL^\top`, the bias being
+    recovered by the Schur complement of the constant vector. The factorization is kept in the cache, so that fitting
+    new targets on the same sample only requires triangular solves.
+
+    For large samples, the dual can also be solved iteratively by preconditioned conjugate gradient (``solver='pcg'``).
+    The products with the kernel matrix are then computed by blocks of kernel evaluations and the preconditioner is
+    built from a Nyström approximation on ``num_landmarks`` randomly chosen points of the sample, so that the memory
+    scales as :math:`\mathcal{O}(N \times \texttt{num_landmarks})`. The previous solution is used as warm start.
+
     :param gamma: Regularization parameter of the LSSVM. Defaults to 1.
+    :param solver: Solver used in dual, either ``'dense'`` (Cholesky factorization) or ``'pcg'``. Defaults to
+        ``'dense'``.
+    :param num_landmarks: Number of landmarks of the Nyström preconditioner of the ``'pcg'`` solver. Defaults to 100.
+    :param tol: Relative tolerance on the residuals for the early stopping of the ``'pcg'`` solver. Defaults to 1e-6.
+    :param max_iter: Maximum number of iterations of the ``'pcg'`` solver. Defaults to 100.
+    :param block_size: Number of rows of the kernel matrix evaluated at once by the ``'pcg'`` solver.
+        Defaults to 1024.
     :type gamma: float, optional
+    :type solver: str, optional
+    :type num_landmarks: int, optional
+    :type tol: float, optional
+    :type max_iter: int, optional
+    :type block_size: int, optional
     """
 
     @utils.extend_docstring(Level)
@@ -24,10 +47,22 @@ class LSSVM(Level):
         gamma = kwargs.pop('gamma', 1.)
         self._gamma = torch.nn.Parameter(torch.tensor(gamma, dtype=utils.FTYPE))
         self._mse_loss = torch.nn.MSELoss()
+        self.solver = kwargs.pop('solver', 'dense')
+        self._num_landmarks = kwargs.pop('num_landmarks', 100)
+        self._tol = kwargs.pop('tol', 1e-6)
+        self._max_iter = kwargs.pop('max_iter', 100)
+        self._block_size = kwargs.pop('block_size', 1024)
 
     def __str__(self):
         return "LSSVM with " + Level.__str__(self)
 
+    def _cache_dependencies(self, key) -> list | None:
+        dependencies = super(LSSVM, self)._cache_dependencies(key)
+        # the factorizations depend on the kernel and on the regularization, not on the solution
+        if key in ["cholesky_LSSVM_dual", "LSSVM_dual_ones", "LSSVM_preconditioner"] and dependencies is not None:
+            return [*dependencies, '_gamma']
+        return dependencies
+
     @property
     def gamma(self) -> float:
         return self._gamma.data.cpu().numpy().item()
@@ -36,69 +71,467 @@ class LSSVM(Level):
     def gamma(self, val):
         val = utils.castf(val, dev=self._gamma.device, tensor=False)
         self._gamma.data = val
+        self._cache_touch('_gamma')
         self._reset_dual()
         self._reset_primal()
 
+    @property
+    def solver(self) -> str:
+        r"""
+        Solver used in dual, either ``'dense'`` or ``'pcg'``.
+        """
+        return self._solver
+
+    @solver.setter
+    def solver(self, val: str):
+        val = val.lower()
+        if val not in ['dense', 'pcg']:
+            raise ValueError(f"Unknown solver {val}. The solver must be either 'dense' or 'pcg'.")
+        self._solver = val
+
     def _center_hidden(self):
         if self._dual_param_exists:
             self._dual_param.data -= torch.mean(self._dual_param.data, dim=1)
+            self._cache_touch('_dual_param')
         else:
             self._logger.debug("The hidden variables cannot be centered as they are not set.")
 
+    def _regularization(self, gamma):
+        r"""
+        Diagonal term added to the kernel matrix (dual) or to the uncentered covariance matrix (primal) for the
+        regularization parameter ``gamma``.
+        """
+        return gamma
+
     def _solve_primal(self) -> None:
-        C = self.kernel.C
-        phi = self.kernel.phi_sample
-        dev = C.device
-        dim_output = phi.shape[1]
+        # the primal system [[Phi^T Phi + gamma I, p], [p^T, N]] [w; b] = [Phi^T Y; 1^T Y], with p = Phi^T 1,
+        # is solved by block elimination as in dual.
+        phi = self.phi()
+        target = self.current_target
+        L = torch.linalg.cholesky(phi.T @ phi + self._regularization(self._gamma.data) * self._I_primal)
+        nu = torch.cholesky_solve(phi.T @ target, L)
+        if self.requires_bias:
+            p = torch.sum(phi, dim=0, keepdim=True).T
+            eta = torch.cholesky_solve(p, L)
+            bias = (torch.sum(target, dim=0, keepdim=True) - p.T @ nu) / (self.num_idx - p.T @ eta)
+            self.bias = bias.data
+            nu = nu - eta @ bias
+
+        self.primal_param = nu.data
 
-        N = torch.tensor([[self.num_sample]],
-                         dtype=utils.FTYPE,
-                         device=dev)
+    @property
+    def _cholesky_dual(self) -> T:
+        r"""
+        Lower Cholesky factor of :math:`K + \gamma I`.
+        """
+        return self._cholesky("LSSVM_dual", level_key="LSSVM_factorization",
+                              fun=lambda: self.kernel.K + self._regularization(self._gamma.data) * self._I_dual)
 
-        P = torch.sum(phi, dim=0, keepdim=True)
-        S = torch.sum(self.current_target, dim=0, keepdim=True)
-        Y = phi.t() @ self.current_target
+    @property
+    def _dual_ones(self) -> T:
+        r"""
+        Solution :math:`\eta` of :math:`(K + \gamma I)\eta = 1`, required for the Schur complement of the bias.
+        """
 
-        A = torch.cat((torch.cat((C + self._gamma * self._I_primal, P.t()), dim=1),
-                       torch.cat((P, N), dim=1)), dim=0)
-        B = torch.cat((Y, S), dim=0)
+        def fun():
+            ones = torch.ones((self.num_idx, 1), dtype=utils.FTYPE, device=self._cholesky_dual.device)
+            return torch.cholesky_solve(ones, self._cholesky_dual)
+
+        return self._get("LSSVM_dual_ones", level_key="LSSVM_factorization", fun=fun)
 
-        sol = torch.linalg.solve(A, B)
-        weight = sol[0:-1].data
-        bias = sol[-1].data
+    @property
+    def _preconditioner(self) -> tuple:
+        r"""
+        Nyström preconditioner :math:`ZZ^\top + \gamma I` of :math:`K + \gamma I`, with :math:`Z = K_{nm}L^{-\top}`
+        and :math:`K_{mm} = LL^\top` on the landmarks. Its inverse is applied by the Woodbury identity.
+        """
 
-        self.weight = weight
-        self.bias = bias
+        def fun():
+            num = self.num_idx
+            num_landmarks = min(self._num_landmarks, num)
+            landmarks = torch.randperm(num)[:num_landmarks]
+            K_mn = self.kernel._K_rows(landmarks, self._block_size)
+            K_mm = K_mn[:, landmarks]
+            jitter = utils.EPS * torch.trace(K_mm)
+            L = torch.linalg.cholesky(K_mm + jitter * torch.eye(num_landmarks, dtype=K_mm.dtype, device=K_mm.device))
+            Z = torch.linalg.solve_triangular(L, K_mn, upper=False).T
+            shift = self._regularization(self._gamma.data)
+            core = torch.linalg.cholesky(Z.T @ Z + shift * torch.eye(num_landmarks, dtype=Z.dtype, device=Z.device))
+            return Z, core, shift
+
+        return self._get("LSSVM_preconditioner", level_key="LSSVM_factorization", fun=fun)
+
+    def _solve_pcg(self, rhs: T, x0: T | None = None) -> T:
+        Z, core, shift = self._preconditioner
+
+        def matmul(v):
+            return self.kernel.K_matmul(v, self._block_size) + shift * v
+
+        def precond(v):
+            return (v - Z @ torch.cholesky_solve(Z.T @ v, core)) / shift
+
+        sol, num_iter = utils.pcg(matmul, rhs, precond=precond, x0=x0, tol=self._tol, max_iter=self._max_iter)
+        if num_iter == self._max_iter:
+            self._logger.warning(f"The conjugate gradient did not converge within {num_iter} iterations. Consider "
+                                 f"increasing max_iter or num_landmarks.")
+        return sol
+
+    def _solve_dual_pcg(self) -> tuple:
+        target = self.current_target
+        warm = self._dual_param_exists and self._dual_param.shape == (target.shape[1], self._num_total)
+        eta = None
+        if self.requires_bias:
+            ones = torch.ones((self.num_idx, 1), dtype=utils.FTYPE, device=target.device)
+            eta = self._get("LSSVM_dual_ones", level_key="LSSVM_factorization",
+                            fun=lambda: self._solve_pcg(ones))
+        # warm start from the previous solution alpha = nu - eta b
+        x0 = None
+        if warm:
+            x0 = self.H.data
+            if self.requires_bias and self._bias_exists:
+                x0 = x0 + eta @ self.bias.data[None, :]
+        return self._solve_pcg(target, x0), eta
 
     def _solve_dual(self) -> None:
-        K = self.kernel.K
-        dev = K.device
+        # the bordered system [[K + gamma I, 1], [1^T, 0]] [alpha; b] = [Y; 0] is solved by block elimination:
+        # with (K + gamma I) nu = Y and (K + gamma I) eta = 1, we have b = 1^T nu / 1^T eta and alpha = nu - eta b.
+        if self._solver == 'pcg':
+            nu, eta = self._solve_dual_pcg()
+        else:
+            nu, eta = torch.cholesky_solve(self.current_target, self._cholesky_dual), None
+        if self.requires_bias:
+            if eta is None:
+                eta = self._dual_ones
+            bias = torch.sum(nu, dim=0, keepdim=True) / torch.sum(eta)
+            self.bias = bias.data
+            nu = nu - eta @ bias
+
+        self.update_dual(nu.data, idx_sample=self.idx)
+
+    @torch.no_grad()
+    def loo_residuals(self, folds=None, gammas=None) -> T:
+        r"""
+        Cross-validation residuals :math:`y_i - f^{(-i)}(x_i)` in closed form, where :math:`f^{(-i)}` is the model
+        fitted without the point :math:`x_i` (leave-one-out), or without the fold containing it. With :math:`A` the
+        matrix of the dual (bordered) system and :math:`\alpha` the dual solution, these are given by
+        :math:`\alpha_i / [A^{-1}]_{ii}` for the leave-one-out and by :math:`[A^{-1}]_{FF}^{-1}\alpha_F` for a fold
+        :math:`F`. Only the factorization of the model is required, no new fit.
+
+        :param folds: Indices of the folds, relative to the current sample. Defaults to ``None``, which corresponds
+            to the leave-one-out.
+        :param gammas: Values of the regularization parameter. In that case, the residuals are computed for all values
+            from one eigendecomposition of the kernel matrix, as for :py:meth:`solve_path`. Defaults to ``None``,
+            which uses the current value of ``gamma`` and the cached Cholesky factorization.
+        :type folds: List[Tensor[int]], optional
+        :type gammas: List[float] or Tensor[G], optional
+        :return: Residuals, with a first dimension indexing the values of ``gammas`` if provided.
+        :rtype: Tensor[num_idx, dim_output] or Tensor[G, num_idx, dim_output]
+        """
+        target = self.current_target
+        ones = torch.ones((self.num_idx, 1), dtype=utils.FTYPE, device=target.device)
+
+        if gammas is None:
+            L = self._cholesky_dual
+            L_inv = torch.linalg.solve_triangular(L, torch.eye(self.num_idx, dtype=L.dtype, device=L.device),
+                                                  upper=False)
+            nu = torch.cholesky_solve(target, L)[None, :, :]
+            eta = self._dual_ones[None, :, :]
+
+            def inv_diag():
+                return torch.sum(L_inv ** 2, dim=0)[None, :]
+
+            def inv_block(fold):
+                return (L_inv[:, fold].T @ L_inv[:, fold])[None, :, :]
+        else:
+            gammas = utils.castf(gammas, dev=self._gamma.device, tensor=False).flatten()
+            vals, vecs = self._path_eigs('dual')
+            inv = 1 / (vals[None, :] + self._regularization(gammas)[:, None])
+            nu = vecs[None, :, :] @ (inv[:, :, None] * (vecs.T @ target)[None, :, :])
+            eta = vecs[None, :, :] @ (inv[:, :, None] * (vecs.T @ ones)[None, :, :])
+
+            def inv_diag():
+                return inv @ (vecs ** 2).T
+
+            def inv_block(fold):
+                return (vecs[None, fold, :] * inv[:, None, :]) @ vecs[fold, :].T[None, :, :]
+
+        # the bias adds a rank-one correction to the upper-left block of the inverse of the bordered matrix
+        if self.requires_bias:
+            eta_sum = torch.sum(eta, dim=(1, 2), keepdim=True)
+            alpha = nu - eta @ (torch.sum(nu, dim=1, keepdim=True) / eta_sum)
+        else:
+            alpha = nu
 
-        Ones = torch.ones((self.num_sample, 1),
-                          dtype=utils.FTYPE,
-                          device=dev)
+        if folds is None:
+            diag = inv_diag()[:, :, None]
+            if self.requires_bias:
+                diag = diag - eta ** 2 / eta_sum
+            residuals = alpha / diag
+        else:
+            residuals = torch.empty_like(alpha)
+            for fold in folds:
+                block = inv_block(fold)
+                if self.requires_bias:
+                    block = block - eta[:, fold, :] @ eta[:, fold, :].transpose(1, 2) / eta_sum
+                residuals[:, fold, :] = torch.linalg.solve(block, alpha[:, fold, :])
+
+        if gammas is None:
+            return residuals.squeeze(0)
+        return residuals
+
+    def _path_eigs(self, representation: str) -> tuple:
+        r"""
+        Full eigendecomposition of the kernel matrix (dual) or of the uncentered covariance matrix (primal), used by
+        :py:meth:`solve_path`.
+        """
 
-        Zero = torch.zeros((1, 1),
-                           dtype=utils.FTYPE,
-                           device=dev)
+        def fun():
+            if representation == 'primal':
+                phi = self.phi()
+                return torch.linalg.eigh(phi.T @ phi)
+            return torch.linalg.eigh(self.kernel.K)
+
+        return self._get("path_eigs_" + representation, level_key="LSSVM_factorization", fun=fun)
+
+    @torch.no_grad()
+    def solve_path(self, gammas, representation=None, x_val=None, y_val=None) -> dict:
+        r"""
+        Solves the model for all the regularization parameters ``gammas`` at once. The kernel matrix (dual) or the
+        uncentered covariance matrix (primal) is eigendecomposed once, after which each solution only requires
+        products with the eigenvectors, vectorized over all values of ``gamma``. This way, the cost of a path is one
+        decomposition in :math:`\mathcal{O}(N^3)` and :math:`\mathcal{O}(N^2)` for each value of ``gamma``,
+        instead of :math:`\mathcal{O}(N^3)` for each.
+
+        The model itself is not modified. A solution of the path can be assigned afterwards, e.g.
+        ``model.gamma = gammas[i]`` followed by ``model.update_dual(path['hidden'][i])`` and
+        ``model.bias = path['bias'][i]``.
+
+        :param gammas: Values of the regularization parameter.
+        :param representation: Representation of the model (``"primal"`` or ``"dual"``)., defaults to the
+            representation of the model.
+        :param x_val: Validation inputs. Defaults to ``None`` (no validation).
+        :param y_val: Validation targets. Defaults to ``None`` (no validation).
+        :type gammas: List[float] or Tensor[G]
+        :type representation: str, optional
+        :type x_val: Tensor[M, dim_input], optional
+        :type y_val: Tensor[M, dim_output], optional
+        :return: Dictionary with the values ``'gamma'`` [G], the solutions ``'hidden'`` [G, num_idx, dim_output] in
+            dual or ``'weight'`` [G, dim_feature, dim_output] in primal, ``'bias'`` [G, dim_output], the training
+            ``'loss'`` [G] and ``'mse'`` [G], and the validation ``'val_mse'`` [G] if validation data is provided.
+        :rtype: dict
+        """
+        representation = utils.check_representation(representation, self._representation, self)
+        gammas = utils.castf(gammas, dev=self._gamma.device, tensor=False).flatten()
+        shift = self._regularization(gammas)[:, None, None]
+        target = self.current_target
+        vals, vecs = self._path_eigs(representation)
+
+        if representation == 'primal':
+            phi = self.phi()
+            rhs, p = phi.T @ target, torch.sum(phi, dim=0, keepdim=True).T
+        else:
+            rhs, p = target, torch.ones((self.num_idx, 1), dtype=utils.FTYPE, device=vals.device)
 
-        Zeros = torch.zeros((1, self.dim_output),
-                            dtype=utils.FTYPE,
-                            device=dev)
+        # all solutions are expressed in the eigenbasis: (M + shift I)^-1 v = U diag(1 / (vals + shift)) U^T v
+        inv = 1 / (vals[None, :, None] + shift)
+        nu, eta = inv * (vecs.T @ rhs)[None, :, :], inv * (vecs.T @ p)[None, :, :]
+        if self.requires_bias:
+            p_eig = (vecs.T @ p)[None, :, :]
+            if representation == 'primal':
+                bias = (torch.sum(target, dim=0)[None, None, :] - p_eig.transpose(1, 2) @ nu) \
+                       / (self.num_idx - p_eig.transpose(1, 2) @ eta)
+            else:
+                bias = (p_eig.transpose(1, 2) @ nu) / (p_eig.transpose(1, 2) @ eta)
+            nu = nu - eta @ bias
+        else:
+            bias = torch.zeros((gammas.shape[0], 1, target.shape[1]), dtype=utils.FTYPE, device=vals.device)
+        param = vecs[None, :, :] @ nu
 
-        N1 = Ones
-        N2 = self.current_target
+        # training losses, consistent with loss()
+        if representation == 'primal':
+            regularization = torch.sum(nu ** 2, dim=(1, 2))
+            pred = phi[None, :, :] @ param + bias
+        else:
+            regularization = torch.sum(vals[None, :, None] * nu ** 2, dim=(1, 2))
+            pred = vecs[None, :, :] @ (vals[None, :, None] * nu) + bias
+        mse = torch.mean((pred - target[None, :, :]) ** 2, dim=(1, 2))
+        path = {'gamma': gammas,
+                'bias': bias.squeeze(1),
+                'loss': regularization / self.num_idx + gammas * mse,
+                'mse': mse}
+        path['weight' if representation == 'primal' else 'hidden'] = param
+
+        if x_val is not None and y_val is not None:
+            y_val = utils.castf(y_val, dev=vals.device)
+            if representation == 'primal':
+                pred_val = self.phi(x_val)[None, :, :] @ param + bias
+            else:
+                pred_val = self.kernel.k(x_val)[None, :, :] @ param + bias
+            path['val_mse'] = torch.mean((pred_val - y_val[None, :, :]) ** 2, dim=(1, 2))
 
-        A = torch.cat((torch.cat((K + self._gamma * self._I_dual, N1), dim=1),
-                       torch.cat((N1.t(), Zero), dim=1)), dim=0)
-        B = torch.cat((N2, Zeros), dim=0)
+        return path
 
-        sol = torch.linalg.solve(A, B)
-        hidden = sol[0:-1].data
-        bias = sol[-1].data
+    def _prune_error(self, x_val=None, y_val=None) -> float:
+        r"""
+        Validation mean squared error of the current model, or its leave-one-out error if no validation data is given.
+        """
+        if x_val is None or y_val is None:
+            return torch.mean(self.loo_residuals() ** 2).item()
+        y_val = utils.castf(y_val, dev=self._param_device)
+        return torch.mean((self._forward('dual', x_val) - y_val) ** 2).item()
 
-        self.update_dual(hidden, idx_sample=self.idx)
-        self.bias = bias
+    @property
+    def _updatable(self) -> bool:
+        r"""
+        Indicates whether the Cholesky factor of the dual system can be updated when sample points are added or
+        removed. This requires the kernel matrix on a subset of the points to be a submatrix of the kernel matrix on
+        all of them, which is not the case if the kernel or the sample is centered or standardized.
+        """
+        return self._representation == 'dual' \
+            and self._solver == 'dense' \
+            and not self._default_sample_transform \
+            and self._default_kernel_transform in ([], [UnitSphereNormalization])
+
+    def _solve_on(self, sample: T, target: T, factor: T | None) -> None:
+        r"""
+        Sets the sample and the target to the given ones and solves the model again, with the Cholesky factor
+        ``factor`` of the new system if provided.
+        """
+        self._reset_dual()
+        self.init_sample(sample)
+        self.target = target
+        if factor is not None:
+            self._get("cholesky_LSSVM_dual", level_key="LSSVM_factorization", fun=lambda: factor)
+        self.solve()
+
+    @torch.no_grad()
+    def prune(self, ratio: float = .05, budget: float = .05, x_val=None, y_val=None) -> T:
+        r"""
+        Prunes the support vectors of the model. The dual solution of an LSSVM being dense, each prediction requires
+        the kernel between the input and all sample points. At each iteration, the proportion ``ratio`` of the sample
+        points with the smallest dual variables :math:`\|\alpha_i\|` is removed and the model is solved again on the
+        remaining ones. The Cholesky factor of the dual system being downdated, no new factorization is required.
+        The pruning stops before the validation error exceeds the error of the unpruned model by more than the
+        relative ``budget``.
+
+        The sample, the target and the hidden variables of the model are then restricted to the retained support
+        vectors.
+
+        :param ratio: Proportion of the support vectors removed at each iteration. Defaults to 0.05.
+        :param budget: Relative increase of the validation error tolerated. Defaults to 0.05.
+        :param x_val: Validation inputs. Defaults to ``None``, in which case the leave-one-out error is used (see
+            :py:meth:`loo_residuals`).
+        :param y_val: Validation targets. Defaults to ``None``.
+        :type ratio: float, optional
+        :type budget: float, optional
+        :type x_val: Tensor[M, dim_input], optional
+        :type y_val: Tensor[M, dim_output], optional
+        :return: Indices of the retained support vectors relative to the original sample.
+        :rtype: Tensor[int]
+
+        .. note::
+            The downdate of the factorization requires the kernel matrix on the retained points to be a submatrix of
+            the kernel matrix on the whole sample. This is not the case if the kernel or the sample is centered or
+            standardized, in which case the system is factorized again at each iteration.
+        """
+        assert 0 < ratio < 1, "The pruning ratio must be comprised between 0 and 1."
+        if self._representation != 'dual':
+            raise utils.RepresentationError(cls=self, message="Only the dual representation can be pruned.")
+        assert self.num_idx == self._num_total, "The pruning requires the whole sample to be used (non-stochastic)."
+        downdate = self._updatable
+
+        if not self._dual_param_exists:
+            self._solve_dual()
+        threshold = (1 + budget) * self._prune_error(x_val, y_val)
+        retained = torch.arange(self._num_total, device=self._sample.device)
+
+        while True:
+            num = self._num_total
+            num_removed = max(1, int(ratio * num))
+            if num - num_removed < 2:
+                break
+            sample, target = self.sample.data, self.target.data
+            factor = self._cholesky_dual if downdate else None
+
+            removed = torch.argsort(torch.sum(self.H.data ** 2, dim=1))[:num_removed]
+            keep = torch.ones(num, dtype=torch.bool, device=sample.device)
+            keep[removed] = False
+            self._solve_on(sample[keep, :], target[keep, :],
+                           utils.cholesky_delete(factor, removed) if downdate else None)
+
+            if self._prune_error(x_val, y_val) > threshold:
+                # the last iteration is reverted
+                self._solve_on(sample, target, factor)
+                break
+            retained = retained[keep]
+
+        self._logger.info(f"{retained.shape[0]} support vectors are retained.")
+        return retained
+
+    @torch.no_grad()
+    def partial_fit(self, x_new, y_new) -> None:
+        r"""
+        Adds the points ``x_new`` with targets ``y_new`` to the sample and updates the model. Instead of a new
+        factorization of the dual system, its Cholesky factor is extended by a block: with :math:`A = LL^\top` the
+        current system and :math:`B` the kernel between the sample and the :math:`b` new points, the factor of the
+        extended system is :math:`\begin{bmatrix} L & 0 \\ S^\top & L_D \end{bmatrix}`, with :math:`S = L^{-1}B` and
+        :math:`L_D L_D^\top = D - S^\top S`, :math:`D` being the regularized kernel matrix of the new points.
+        A batch thus costs :math:`\mathcal{O}(N^2b)` instead of :math:`\mathcal{O}(N^3)`.
+
+        :param x_new: New sample points.
+        :param y_new: Targets of the new sample points.
+        :type x_new: Tensor[b, dim_input]
+        :type y_new: Tensor[b, dim_output]
+
+        .. note::
+            If the factor cannot be updated (primal representation, ``'pcg'`` solver, centered or standardized
+            kernel or sample), the model is solved again on the whole sample.
+        """
+        x_new = utils.castf(x_new, dev=self._sample.device)
+        y_new = utils.castf(y_new, dev=self._sample.device)
+        sample = torch.cat((self.sample.data, x_new), dim=0)
+        target = torch.cat((self.target.data, y_new), dim=0)
+
+        factor = None
+        if self._updatable and self.num_idx == self._num_total:
+            L = self._cholesky_dual
+            # without the scaling kappa of the view, as the factor of the dual system
+            B = self.kernel.k(x_new).T
+            D = self.kernel.k(x_new, x_new) + \
+                self._regularization(self._gamma.data) * torch.eye(x_new.shape[0], dtype=L.dtype, device=L.device)
+            S = torch.linalg.solve_triangular(L, B, upper=False)
+            L_D = torch.linalg.cholesky(D - S.T @ S)
+            factor = torch.cat((torch.cat((L, torch.zeros_like(B)), dim=1),
+                                torch.cat((S.T, L_D), dim=1)), dim=0)
+        else:
+            self._logger.info("The factorization cannot be updated. The model is solved again on the whole sample.")
+        self._solve_on(sample, target, factor)
+
+    @torch.no_grad()
+    def remove(self, idx) -> None:
+        r"""
+        Removes the points of indices ``idx`` from the sample and updates the model. The Cholesky factor of the dual
+        system is downdated for all the removed points at once (see :py:func:`kerch.utils.cholesky_delete`), which
+        costs :math:`\mathcal{O}(N^2r)` for :math:`r` removed points instead of :math:`\mathcal{O}(N^3)` for a new
+        factorization. When many points are removed, the remaining block is factorized again.
+
+        :param idx: Indices of the sample points to be removed.
+        :type idx: int[]
+
+        .. note::
+            If the factor cannot be downdated (see :py:meth:`partial_fit`), the model is solved again on the remaining
+            sample.
+        """
+        keep = torch.ones(self._num_total, dtype=torch.bool, device=self._sample.device)
+        keep[idx] = False
+
+        factor = None
+        if self._updatable and self.num_idx == self._num_total:
+            factor = utils.cholesky_delete(self._cholesky_dual, torch.nonzero(~keep).flatten())
+        else:
+            self._logger.info("The factorization cannot be updated. The model is solved again on the remaining "
+                              "sample.")
+        self._solve_on(self.sample.data[keep, :], self.target.data[keep, :], factor)
 
     def _euclidean_parameters(self, recurse=True) -> Iterator[torch.nn.Parameter]:
         yield from super(LSSVM, self)._euclidean_parameters(recurse)
@@ -131,11 +564,11 @@ class LSSVM(Level):
 
         def fun():
             if representation == 'primal':
-                weight = self.weight
-                return torch.einsum('ij,ji',weight, weight)
+                weight = self.W
+                return torch.einsum('ij,ij',weight, weight)
                 # torch.trace(weight.T @ weight)
             else:
-                hidden = self.hidden
+                hidden = self.H
                 return torch.einsum('ji,jk,ki',hidden,self.K,hidden)
                 # torch.trace(hidden.T @ self.K @ hidden)
 
@@ -1,7 +1,5 @@
 # coding=utf-8
-from typing import Optional
 import torch
-from torch import Tensor as T
 
 from .._PPCA import _PPCA
 from .Level import Level
@@ -10,31 +8,24 @@ from ... import utils
 class PPCA(_PPCA, Level):
     def __init__(self, *args, **kwargs):
         super(PPCA, self).__init__(*args, **kwargs)
-    @torch.no_grad()
-    def h_map(self, phi: Optional[T] = None, k: Optional[T] = None) -> T:
+
+    def _set_feature_noise(self, discarded, num: int) -> None:
         r"""
-        Draws a `h` given the maximum a posteriori of the distribution. By choosing the input, you either
-        choose a primal or dual representation.
-        :param phi: Primal representation.
-        :param k: Dual representation.
-        :type phi: Tensor[N, dim_input], optional
-        :type k: Tensor[N, num_idx], optional
-        :return: MAP of h given phi or k.
-        :rtype: Tensor[N, dim_output]
+        Maximum likelihood estimate of the noise, given the sum of the discarded normalized eigenvalues and their
+        number.
         """
-
-        if phi is not None and k is None:
-            return (phi - self.mu) @ self.weight @ torch.diag(1 / self.vals) * self.num_idx
-        if phi is None and k is not None:
-            return k @ self.hidden @ torch.diag(1 / self.vals) * self.num_idx
+        if not self._estimate_feature_noise:
+            return
+        if num <= 0:
+            self.feature_noise = 0.
         else:
-            raise AttributeError("One and only one attribute phi or k has to be specified.")
+            self.feature_noise = torch.sqrt(torch.clamp(discarded / num, min=0.)).item()
 
     @torch.no_grad()
     def _solve_primal(self) -> None:
         C = self.C
 
-        if self.dim_output is None:
+        if self._dim_output is None:
             self._dim_output = self.dim_feature
         elif self.dim_output > self.dim_feature:
             self._logger.warning(f"In primal, the output dimension {self.dim_output} (the number of "
@@ -43,20 +34,18 @@ class PPCA(_PPCA, Level):
                               f"dimension is reduced to {self.dim_feature}.")
             self.dim_output = self.dim_feature
 
-        v, w = utils.eigs(C, k=self.dim_output, psd=True)
+        v, w = self._eigs('primal', self.dim_output)
 
-        if self.dim_output == self.num_idx:
-            self.sigma = 0.
-        else:
-            self.sigma = (torch.trace(C) - torch.sum(v)) / (self.num_idx * (self.num_idx - self.dim_output))
+        self._set_feature_noise(torch.trace(C) - torch.sum(v), self.dim_feature - self.dim_output)
         self.vals = v
-        self.weight = w @ torch.diag(torch.sqrt(v / self.num_idx - self.sigma ** 2))
+        self.primal_param = w @ torch.diag(torch.sqrt(torch.clamp(v - self.feature_noise ** 2, min=0.)))
+        self._reset_posterior()
 
     @torch.no_grad()
     def _solve_dual(self) -> None:
         K = self.K
 
-        if self.dim_output is None:
+        if self._dim_output is None:
             self._dim_output = self.num_idx
         elif self.dim_output > self.num_idx:
             self._logger.warning(f"In dual, the output dimension {self.dim_output} (the number of "
@@ -65,11 +54,10 @@ class PPCA(_PPCA, Level):
                               f"dimension is reduced to {self.num_idx}.")
             self.dim_output = self.num_idx
 
-        v, h = utils.eigs(K, k=self.dim_output, psd=True)
+        v, h = self._eigs('dual', self.dim_output)
 
-        if self.dim_output == self.num_idx:
-            self.sigma = 0.
-        else:
-            self.sigma = (torch.trace(K) - torch.sum(v)) / (self.num_idx * (self.num_idx - self.dim_output))
+        self._set_feature_noise((torch.trace(K) - torch.sum(v)) / self.num_idx, self.num_idx - self.dim_output)
         self.vals = v
-        self.hidden = h @ torch.diag(torch.sqrt(1 / self.num_idx - self.sigma ** 2 / v))
+        self.dual_param = h @ torch.diag(torch.sqrt(torch.clamp(1 / self.num_idx - self.feature_noise ** 2 / v,
+                                                                min=0.)))
+        self._reset_posterior()
@@ -1,6 +1,5 @@
 from .LSSVM import LSSVM
 from ... import utils
-import torch
 
 
 class Ridge(LSSVM):
@@ -15,31 +14,5 @@ class Ridge(LSSVM):
                               'The bias parameter is overwritten to False.')
         super(Ridge, self).__init__(*args, **kwargs)
 
-    def _solve_primal(self, target=None) -> None:
-        C = self.kernel.C
-        phi = self.kernel.phi_sample
-        dev = C.device
-        dim_output = phi.shape[1]
-
-        I = torch.eye(dim_output,
-                      dtype=utils.FTYPE,
-                      device=dev)
-        Y = phi.t() @ target
-
-        A = C + (1 / self._gamma) * I
-
-        sol = torch.linalg.solve(A, Y)
-        self.weight = sol
-
-    def _solve_dual(self, target=None) -> None:
-        K = self.kernel.K
-        dev = K.device
-
-        I = torch.eye(self.num_sample,
-                      dtype=utils.FTYPE,
-                      device=dev)
-
-        A = K + (1 / self._gamma) * I
-
-        sol = torch.linalg.solve(A, target)
-        self.hidden = sol
+    def _regularization(self, gamma):
+        return 1 / gamma
@@ -36,6 +36,9 @@ class View(Kernel, _View, Sample):
     :type kernel_type: str, optional
     :type kernel_class: kerch.kernel._Kernel, optional
     """
+
+    # parameters of the levels, the cache entries of the kernel being independent of them
+    _level_parameters = ['_dual_param', '_primal_param', '_bias', '_weight', '_target', '_vals', '_gamma']
     def __new__(cls, *args, **kwargs):
         kernel_type = kwargs.pop('kernel_type', DEFAULT_KERNEL_TYPE)
         kernel_class = kwargs.pop('kernel_class', None)
@@ -66,7 +69,7 @@ class View(Kernel, _View, Sample):
         self._bias_trainable = kwargs.pop('bias_trainable', False)
         self._requires_bias = kwargs.pop('requires_bias', False)
         self._bias = torch.nn.Parameter(torch.empty(0, dtype=FTYPE),
-                                        requires_grad=self._requires_bias and self._param_trainable)
+                                        requires_grad=self._requires_bias and self._level_trainable)
         if bias is not None and self._requires_bias:
             self.bias = bias
 
@@ -94,7 +97,7 @@ class View(Kernel, _View, Sample):
         assert self._num_total is not None, "No data has been initialized yet."
         assert self._dim_output is not None, "No output dimension has been provided."
         self.bias = torch.zeros((self.dim_output), dtype=FTYPE, device=self._bias.device)
-        self._log.info('The bias is initialized.')
+        self._logger.info('The bias is initialized.')
 
     @property
     def _bias_exists(self) -> bool:
@@ -107,7 +110,7 @@ class View(Kernel, _View, Sample):
     @requires_bias.setter
     def requires_bias(self, val: bool):
         self._requires_bias = val
-        self._bias.requires_grad = val and self._param_trainable
+        self._bias.requires_grad = val and self._level_trainable
 
     def _reset_primal(self) -> None:
         self._weight = torch.nn.Parameter(torch.empty(0, dtype=FTYPE,
@@ -146,24 +149,25 @@ class View(Kernel, _View, Sample):
                 self._bias = torch.nn.Parameter(val, requires_grad=self.bias_trainable)
             else:
                 self._bias.data = val
+                self._cache_touch('_bias')
                 # zeroing the gradients if relevant
                 if self._bias_trainable:
                     self._bias.grad.data.zero_()
 
     @property
     def bias_trainable(self) -> bool:
-        return self._requires_bias and self._param_trainable
+        return self._requires_bias and self._level_trainable
 
     @property
     def param_trainable(self) -> bool:
         r"""
         Specifies whether the parameters weight and hidden are trainable or not.
         """
-        return self._param_trainable
+        return self._level_trainable
 
     @param_trainable.setter
     def level_trainable(self, val: bool) -> None:
-        self._param_trainable = val
+        self._level_trainable = val
         self._dual_param.requires_grad = val
         self._weight.requires_grad = val
         self._bias.requires_grad = self.bias_trainable
@@ -217,6 +221,14 @@ class View(Kernel, _View, Sample):
     def _update_dual_from_primal(self):
         raise NotImplementedError
 
+    @property
+    def H(self) -> Tensor:
+        return self.dual_param
+
+    @property
+    def W(self) -> Tensor:
+        return self.primal_param
+
     ## MATHS
     def phi(self, x=None, transform=None) -> Tensor:
         return self._kappa_sqrt * self.kernel.phi(x, transform)
@@ -228,6 +240,13 @@ class View(Kernel, _View, Sample):
     def K(self) -> Tensor:
         return self.kappa * self.kernel.K
 
+    def K_matmul(self, v: Tensor, block_size: int = 1024) -> Tensor:
+        return self.kappa * self.kernel.K_matmul(v, block_size)
+
+    @property
+    def K_diag(self) -> Tensor:
+        return self.kappa * self.kernel.K_diag
+
     def _forward(self, representation, x=None):
         if self.requires_bias:
             return self.phiw(x, representation) + self._kappa_sqrt * self._bias[None, :]
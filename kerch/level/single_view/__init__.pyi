@@ -2,4 +2,5 @@
 from .KPCA import KPCA as KPCA
 from .Ridge import Ridge as Ridge
 from .LSSVM import LSSVM as LSSVM
+from .FixedSizeLSSVM import FixedSizeLSSVM as FixedSizeLSSVM
 from .PPCA import PPCA as PPCA
\ No newline at end of file
@@ -0,0 +1,224 @@
+# coding=utf-8
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import torch
+from torch import Tensor as T
+
+from .Model import Model
+from ..level import factory
+from .. import utils
+
+
+def _solve_shard(level_type: str, level_kwargs: dict, sample: T, target: T, num_threads: int) -> dict:
+    r"""
+    Solves one level on its shard and returns its parameters. This is defined at the module level to be pickled to
+    the worker processes.
+    """
+    torch.set_num_threads(num_threads)
+    level = factory(level_type=level_type, **level_kwargs, sample=sample, target=target)
+    level.solve()
+    return _level_parameters(level)
+
+
+def _level_parameters(level) -> dict:
+    params = {'bias': level.bias.data if level.requires_bias else None}
+    if level.representation == 'primal':
+        params['primal'] = level.primal_param.data
+    else:
+        params['dual'] = level.dual_param.data
+    return params
+
+
+class Ensemble(Model):
+    r"""
+    Divide-and-conquer ensemble of least squares levels (:py:class:`kerch.level.LSSVM`, :py:class:`kerch.level.Ridge`
+    or :py:class:`kerch.level.FixedSizeLSSVM`). The sample is partitioned into ``num_shards`` shards, either randomly
+    or by clustering, and an independent level is solved on each of them. As each dual system only has
+    :math:`N/P` unknowns, the cost of the training drops from :math:`\mathcal{O}(N^3)` to
+    :math:`\mathcal{O}(N^3/P^2)`. The levels being independent, they can be solved in parallel processes.
+
+    The predictions of the levels are either averaged (``combination='mean'``), which is the natural choice for random
+    shards, or only the level of the shard with the closest centroid is used (``combination='nearest'``), which is the
+    natural choice for clustered shards.
+
+    :param level_type: Type of the levels, either ``'lssvm'``, ``'ridge'`` or ``'fixedsizelssvm'``. Defaults to
+        ``'lssvm'``.
+    :param num_shards: Number of shards :math:`P`. Defaults to 4.
+    :param partition: Partition of the sample, either ``'random'`` or ``'cluster'`` (k-means on the inputs).
+        Defaults to ``'random'``.
+    :param combination: Combination of the predictions of the levels, either ``'mean'`` or ``'nearest'``. Defaults to
+        ``'mean'`` for a random partition and ``'nearest'`` for a clustered one.
+    :param num_workers: Number of processes used to solve the levels. Defaults to 1 (sequential, in the current
+        process).
+    :param sample: Sample of the model.
+    :param target: Target of the model.
+    :param \**kwargs: Other arguments passed to each level, e.g. ``kernel_type``, ``sigma`` or ``gamma``.
+    :type level_type: str, optional
+    :type num_shards: int, optional
+    :type partition: str, optional
+    :type combination: str, optional
+    :type num_workers: int, optional
+    :type sample: Tensor[N, dim_input], optional
+    :type target: Tensor[N, dim_output], optional
+    :type \**kwargs: dict, optional
+
+    .. note::
+        The worker processes are spawned, so that a script using ``num_workers > 1`` must be protected by an
+        ``if __name__ == '__main__':`` clause. Starting them has a fixed cost, which only pays off for large shards.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Ensemble, self).__init__(*args, **kwargs)
+        self._level_type = kwargs.pop('level_type', 'lssvm').lower()
+        assert self._level_type in ['lssvm', 'ridge', 'fixedsizelssvm'], \
+            "The levels of an ensemble must be of type LSSVM, Ridge or FixedSizeLSSVM."
+        self._num_shards = kwargs.pop('num_shards', 4)
+        self._partition = kwargs.pop('partition', 'random').lower()
+        if self._partition not in ['random', 'cluster']:
+            raise ValueError(f"Unknown partition {self._partition}. The partition must be either 'random' or "
+                             f"'cluster'.")
+        self.combination = kwargs.pop('combination', 'mean' if self._partition == 'random' else 'nearest')
+        self._num_workers = kwargs.pop('num_workers', 1)
+
+        self._ensemble_sample = utils.castf(kwargs.pop('sample', None))
+        self._ensemble_target = utils.castf(kwargs.pop('target', None))
+        self._level_kwargs = kwargs
+        self._shards: list[T] | None = None
+        self._centroids: T | None = None
+
+    def __str__(self):
+        return f"[Model] Ensemble of {self._num_shards} {self._level_type.upper()} levels"
+
+    @property
+    def num_shards(self) -> int:
+        return self._num_shards
+
+    @property
+    def combination(self) -> str:
+        r"""
+        Combination of the predictions of the levels, either ``'mean'`` or ``'nearest'``.
+        """
+        return self._combination
+
+    @combination.setter
+    def combination(self, val: str):
+        val = val.lower()
+        if val not in ['mean', 'nearest']:
+            raise ValueError(f"Unknown combination {val}. The combination must be either 'mean' or 'nearest'.")
+        self._combination = val
+
+    @property
+    def shards(self) -> list[T]:
+        r"""
+        Indices of the sample points of each shard.
+        """
+        if self._shards is None:
+            raise utils.NotInitializedError(cls=self, message="The ensemble has not been solved yet.")
+        return self._shards
+
+    def _partition_sample(self) -> None:
+        x = self._ensemble_sample
+        num = x.shape[0]
+        assert self._num_shards <= num, f"The number of shards ({self._num_shards}) cannot exceed the number of " \
+                                        f"sample points ({num})."
+        if self._partition == 'random':
+            self._shards = list(torch.tensor_split(torch.randperm(num, device=x.device), self._num_shards))
+            self._centroids = torch.stack([torch.mean(x[shard, :], dim=0) for shard in self._shards])
+            return
+
+        # k-means on the inputs, the empty clusters being reinitialized on random points
+        centroids = x[torch.randperm(num, device=x.device)[:self._num_shards], :]
+        for _ in range(100):
+            assignment = torch.argmin(torch.cdist(x, centroids), dim=1)
+            new_centroids = centroids.clone()
+            for shard in range(self._num_shards):
+                members = assignment == shard
+                if torch.any(members):
+                    new_centroids[shard, :] = torch.mean(x[members, :], dim=0)
+                else:
+                    new_centroids[shard, :] = x[torch.randint(num, (1,)), :]
+            if torch.allclose(new_centroids, centroids):
+                break
+            centroids = new_centroids
+        assignment = torch.argmin(torch.cdist(x, centroids), dim=1)
+        self._shards = [torch.nonzero(assignment == shard).flatten() for shard in range(self._num_shards)]
+        self._shards = [shard for shard in self._shards if shard.numel() > 0]
+        self._centroids = torch.stack([torch.mean(x[shard, :], dim=0) for shard in self._shards])
+
+    @torch.no_grad()
+    def solve(self, sample=None, target=None) -> None:
+        r"""
+        Partitions the sample and solves a level on each shard.
+
+        :param sample: Input sample of the model, defaults to the sample provided at construction.
+        :param target: Target of the model, defaults to the target provided at construction.
+        :type sample: Tensor[N, dim_input], optional
+        :type target: Tensor[N, dim_output], optional
+        """
+        if sample is not None:
+            self._ensemble_sample = utils.castf(sample)
+        if target is not None:
+            self._ensemble_target = utils.castf(target)
+        if self._ensemble_sample is None or self._ensemble_target is None:
+            raise utils.NotInitializedError(cls=self, message="The sample and the target must be provided to solve "
+                                                              "the ensemble.")
+
+        self._partition_sample()
+        x, y = self._ensemble_sample, self._ensemble_target
+        self._levels = [factory(level_type=self._level_type, **self._level_kwargs,
+                                sample=x[shard, :], target=y[shard, :]) for shard in self._shards]
+
+        if self._num_workers > 1:
+            num_threads = max(1, torch.get_num_threads() // self._num_workers)
+            with ProcessPoolExecutor(max_workers=self._num_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_solve_shard, self._level_type, self._level_kwargs,
+                                           x[shard, :], y[shard, :], num_threads) for shard in self._shards]
+                parameters = [future.result() for future in futures]
+            for level, params in zip(self._levels, parameters):
+                if 'primal' in params:
+                    level.primal_param = params['primal']
+                else:
+                    level.dual_param = params['dual']
+                if params['bias'] is not None:
+                    level.bias = params['bias']
+        else:
+            for level in self._levels:
+                level.solve()
+        self._logger.info(f"{len(self._levels)} levels solved on shards of sizes "
+                          f"{[shard.numel() for shard in self._shards]}.")
+
+    def forward(self, x: T | None = None) -> T:
+        r"""
+        Combined predictions of the levels.
+
+        :param x: Inputs, defaults to the sample of the model.
+        :type x: Tensor[M, dim_input], optional
+        :rtype: Tensor[M, dim_output]
+        """
+        self._check_levels()
+        if x is None:
+            x = self._ensemble_sample
+        x = utils.castf(x)
+        if self._combination == 'mean':
+            return torch.mean(torch.stack([level(x) for level in self.levels]), dim=0)
+
+        nearest = torch.argmin(torch.cdist(x, self._centroids), dim=1)
+        out = torch.empty((x.shape[0], self.dim_output), dtype=utils.FTYPE, device=x.device)
+        for num, level in enumerate(self.levels):
+            members = nearest == num
+            if torch.any(members):
+                out[members, :] = level(x[members, :])
+        return out
+
+    @property
+    def num_sample(self) -> int:
+        return self._ensemble_sample.shape[0]
+
+    def init_sample(self, sample=None):
+        self._ensemble_sample = utils.castf(sample)
+        self._levels = list()
+        self._shards = None
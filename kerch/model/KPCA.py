@@ -4,4 +4,4 @@ class KPCA(Model):
     def __init__(self, *args, **kwargs):
         super(KPCA, self).__init__(*args, **kwargs)
         kwargs['level_type'] = 'kpca'
-        self._add_level(*args, **kwargs)
\ No newline at end of file
+        self._append_level(*args, **kwargs)
\ No newline at end of file
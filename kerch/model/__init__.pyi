@@ -3,4 +3,5 @@ from .RKM import RKM as RKM
 from .LSSVM import LSSVM as LSSVM
 from .KPCA import KPCA as KPCA
 from .Model import Model as Model
+from .Ensemble import Ensemble as Ensemble
 from .factory import factory as factory
\ No newline at end of file
@@ -68,3 +68,5 @@ class WandB(Plotter):
                                       'test_error': test_error}, step=epoch)
         if epoch % self._num_epochs_plot == 0:
             self._wandb_run.log(data=self.model.watched_properties, step=epoch)
+        if self._num_epochs_cache is not None and epoch % self._num_epochs_cache == 0:
+            self._wandb_run.log(data=self.cache_metrics(), step=epoch)
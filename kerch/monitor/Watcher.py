@@ -21,6 +21,8 @@ class Watcher(metaclass=ABCMeta):
     :param num_epochs_save: The model will be saved every `num_epochs_save`. Defaults to 1.
     :param num_epochs_params: The model parameters will be logged every `num_epochs_params`. Defaults to 1.
     :param num_epochs_plot: The watched properties will be logged/plotted every `num_epochs_plot`. Defaults to 1.
+    :param num_epochs_cache: The cache statistics of the model will be logged every `num_epochs_cache`. Defaults to
+        None (not logged).
     :type model: kerch.model.Model
     :type opt: kerch.opt.Optimizer
     :type expe_name: str
@@ -29,6 +31,7 @@ class Watcher(metaclass=ABCMeta):
     :type num_epochs_save: int, optional
     :type num_epochs_params: int, optional
     :type num_epochs_plot: int, optional
+    :type num_epochs_cache: int, optional
     """
 
     def __init__(self, model: Model, opt: Optimizer | None, expe_name: str, verbose: bool = False, **kwargs):
@@ -38,6 +41,7 @@ class Watcher(metaclass=ABCMeta):
         self._num_epochs_params = kwargs.pop('num_epochs_params', 1)
         self._num_epochs_save = kwargs.pop('num_epochs_save', 1)
         self._num_epochs_plot = kwargs.pop('num_epochs_plot', 1)
+        self._num_epochs_cache = kwargs.pop('num_epochs_cache', None)
 
         # MODEL
         self._model = model
@@ -96,6 +100,19 @@ class Watcher(metaclass=ABCMeta):
         """
         return self._dir_project
 
+    def cache_metrics(self) -> dict:
+        r"""
+        Totals of the cache statistics of the model (see :py:meth:`kerch.feature.Cache.cache_stats`), per default
+        level key and overall.
+        """
+        stats = self._model.cache_stats()
+        metrics = dict()
+        for num, level_key in enumerate(stats['level_key']):
+            for field in ['hits', 'misses', 'bytes', 'compute_time']:
+                for name in ['cache/' + field, f"cache/{level_key}/{field}"]:
+                    metrics[name] = metrics.get(name, 0) + stats[field][num]
+        return metrics
+
     def save_model(self, epoch: int) -> str:
         r"""
         Saves the model current state.
@@ -10,6 +10,8 @@ def factory(watcher_type:str='saver', **kwargs) -> Watcher | None:
     """
 
     watcher = class_factory(watcher_type)
+    if watcher is None:
+        return None
     return watcher(**kwargs)
 
 
@@ -24,7 +26,7 @@ def class_factory(watcher_type:str='saver'):
         return None
 
     import kerch.monitor
-    watcher_class = case_insensitive_getattr(kerch.watch, watcher_type)
+    watcher_class = case_insensitive_getattr(kerch.monitor, watcher_type)
     if watcher_class is None:
         raise NameError("Invalid watcher type.")
     return watcher_class
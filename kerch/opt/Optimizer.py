@@ -12,7 +12,7 @@ import torch
 from .stiefel import stiefel_optimizer
 
 from .. import utils
-from kerch.feature.feature import Module
+from ..feature.module import Module
 
 
 class Optimizer():
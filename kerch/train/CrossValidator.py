@@ -0,0 +1,117 @@
+# coding=utf-8
+from __future__ import annotations
+
+import torch
+from torch import Tensor as T
+
+from ..feature.logger import Logger
+from ..level.single_view.LSSVM import LSSVM
+from .. import utils
+
+
+@utils.extend_docstring(Logger)
+class CrossValidator(Logger):
+    r"""
+    Closed-form cross-validation of least squares models (:py:class:`kerch.level.LSSVM` and
+    :py:class:`kerch.level.Ridge`). The validation residuals are obtained from the factorization of the model on the
+    whole sample, without any new fit (see :py:meth:`kerch.level.LSSVM.loo_residuals`). Combined with a list of
+    values for ``gamma``, one eigendecomposition of the kernel matrix suffices for the whole scan.
+
+    :param level: Level to be cross-validated.
+    :param num_folds: Number of folds. Defaults to ``None``, which corresponds to the leave-one-out.
+    :param shuffle: Indicates whether the points are randomly assigned to the folds. Defaults to ``True``.
+    :type level: :py:class:`kerch.level.LSSVM`
+    :type num_folds: int, optional
+    :type shuffle: bool, optional
+    """
+
+    def __init__(self, level: LSSVM, **kwargs):
+        super(CrossValidator, self).__init__(**kwargs)
+        assert isinstance(level, LSSVM), "Closed-form cross-validation is only available for LSSVM and Ridge levels."
+        self._level = level
+        self._shuffle = kwargs.pop('shuffle', True)
+        self.num_folds = kwargs.pop('num_folds', None)
+
+    @property
+    def level(self) -> LSSVM:
+        return self._level
+
+    @property
+    def num_folds(self) -> int | None:
+        r"""
+        Number of folds, ``None`` corresponding to the leave-one-out.
+        """
+        return self._num_folds
+
+    @num_folds.setter
+    def num_folds(self, val: int | None):
+        assert val is None or 1 < val <= self._level.num_idx, \
+            f"The number of folds must be comprised between 2 and the number of points ({self._level.num_idx})."
+        self._num_folds = val
+        self._folds = None
+
+    @property
+    def folds(self) -> list | None:
+        r"""
+        Indices of the folds relative to the current sample of the level. These are drawn once and kept for all
+        subsequent computations, so that the errors for different values of ``gamma`` are comparable.
+        """
+        if self._num_folds is None:
+            return None
+        if self._folds is None:
+            num = self._level.num_idx
+            idx = torch.randperm(num) if self._shuffle else torch.arange(num)
+            self._folds = list(torch.tensor_split(idx, self._num_folds))
+        return self._folds
+
+    def residuals(self, gammas=None) -> T:
+        r"""
+        Cross-validation residuals.
+
+        :param gammas: Values of the regularization parameter. Defaults to ``None`` (current value of the level).
+        :type gammas: List[float] or Tensor[G], optional
+        :rtype: Tensor[num_idx, dim_output] or Tensor[G, num_idx, dim_output]
+        """
+        return self._level.loo_residuals(folds=self.folds, gammas=gammas)
+
+    def errors(self, gammas=None) -> T:
+        r"""
+        Cross-validation mean squared errors.
+
+        :param gammas: Values of the regularization parameter. Defaults to ``None`` (current value of the level).
+        :type gammas: List[float] or Tensor[G], optional
+        :rtype: Tensor[] or Tensor[G]
+        """
+        residuals = self.residuals(gammas)
+        return torch.mean(residuals ** 2, dim=(-2, -1))
+
+    def scan(self, gammas) -> dict:
+        r"""
+        Cross-validation errors for all values of ``gammas``, from one eigendecomposition of the kernel matrix.
+
+        :param gammas: Values of the regularization parameter.
+        :type gammas: List[float] or Tensor[G]
+        :return: Dictionary with the values ``'gamma'``, the corresponding ``'error'`` and the ``'best_gamma'``.
+        :rtype: dict
+        """
+        gammas = utils.castf(gammas, tensor=False).flatten()
+        errors = self.errors(gammas)
+        best_gamma = gammas[torch.argmin(errors)].item()
+        self._logger.info(f"Best cross-validation error {torch.min(errors).item():.2e} for gamma={best_gamma:.2e}.")
+        return {'gamma': gammas,
+                'error': errors,
+                'best_gamma': best_gamma}
+
+    def fit(self, gammas) -> float:
+        r"""
+        Scans the values ``gammas``, sets the level to the best one and solves it.
+
+        :param gammas: Values of the regularization parameter.
+        :type gammas: List[float] or Tensor[G]
+        :return: Best value of ``gamma``.
+        :rtype: float
+        """
+        best_gamma = self.scan(gammas)['best_gamma']
+        self._level.gamma = best_gamma
+        self._level.solve()
+        return best_gamma
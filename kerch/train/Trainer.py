@@ -218,12 +218,14 @@ class Trainer(Logger):
             train_loss = self._problem_loss(self._training_data, self._training_labels)
             val_loss = self._problem_loss(self._validation_data, self._validation_labels)
             test_loss = self._problem_loss(self._test_data, self._test_labels)
-            watcher.update(epoch=epoch,
-                           objective_loss=batch_loss,
-                           training_error=train_loss,
-                           validation_error=val_loss,
-                           test_error=test_loss)
-
-        watcher.finish()
+            if watcher is not None:
+                watcher.update(epoch=epoch,
+                               objective_loss=batch_loss,
+                               training_error=train_loss,
+                               validation_error=val_loss,
+                               test_error=test_loss)
+
+        if watcher is not None:
+            watcher.finish()
         self.model.eval()
         return self.model
@@ -1,3 +1,4 @@
 # coding=utf-8
 from .Trainer import Trainer as Trainer
-from .Hyper import Hyper as Hyper
\ No newline at end of file
+from .Hyper import Hyper as Hyper
+from .CrossValidator import CrossValidator as CrossValidator
\ No newline at end of file
@@ -39,17 +39,8 @@ class Transform(Cache, metaclass=ABCMeta):
             return self._name + " (default)"
         return self._name
 
-    @staticmethod
-    def _get_names(x=None, y=None) -> Tuple[str, str]:
-        if x is not None:
-            x_name = id(x)
-        else:
-            x_name = 0
-        if y is not None:
-            y_name = id(y)
-        else:
-            y_name = 0
-        return str(x_name), str(y_name)
+    def _get_names(self, x=None, y=None) -> Tuple[str, str]:
+        return self._fingerprint(x), self._fingerprint(y)
 
     @property
     def parent(self) -> Union[Transform, None]:
@@ -142,7 +133,7 @@ class Transform(Cache, metaclass=ABCMeta):
         raise BijectionError
 
     def statistics_oos(self, x=None, y=None, oos=None) -> Union[torch.Tensor, (torch.Tensor, torch.Tensor)]:
-        x_name, y_name = Transform._get_names(x, y)
+        x_name, y_name = self._get_names(x, y)
 
         if self.explicit:
             if x is None:
@@ -174,7 +165,7 @@ class Transform(Cache, metaclass=ABCMeta):
             return (x_stat, y_stat)
 
     def oos(self, x=None, y=None) -> torch.Tensor:
-        x_name, y_name = Transform._get_names(x, y)
+        x_name, y_name = self._get_names(x, y)
 
         if self.explicit:
             if x is None:
@@ -235,11 +226,19 @@ class Transform(Cache, metaclass=ABCMeta):
                 o.print_cache(private)
         except AttributeError:
             pass
+    def _freeze_cache(self, frozen: bool, recurse: bool, visited: set) -> None:
+        super(Transform, self)._freeze_cache(frozen, recurse, visited)
+        if recurse:
+            for o in list(self._offspring.values()):
+                if id(o) not in visited:
+                    o._freeze_cache(frozen, recurse, visited)
+
     @extend_docstring(Cache._clean_cache)
     def _clean_cache(self, max_level: Union[str, int, None] = None):
         super(Transform, self)._clean_cache(max_level)
         try:
-            for o in self._offspring.values():
+            # the offspring may be extended by another thread in the meantime
+            for o in list(self._offspring.values()):
                 o._clean_cache(max_level)
         except AttributeError:
             pass
\ No newline at end of file
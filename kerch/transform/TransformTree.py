@@ -201,14 +201,17 @@ class TransformTree(Transform):
             transform = self._default_transforms
 
         tree_path = [self]
-        for tr_class in transform:
-            current_tr = tree_path[-1]
-            if tr_class in current_tr.offspring:
-                offspring = current_tr.offspring[tr_class]
-            else:
-                offspring = tr_class(explicit=self.explicit, cache_level=self.cache_level)
-                current_tr.add_offspring(offspring)
-            tree_path.append(offspring)
+        # the tree is only grown by one thread at a time, so that two threads do not create the same node twice
+        with self._cache_lock:
+            for tr_class in transform:
+                current_tr = tree_path[-1]
+                if tr_class in current_tr.offspring:
+                    offspring = current_tr.offspring[tr_class]
+                else:
+                    offspring = tr_class(explicit=self.explicit, cache_level=self.cache_level)
+                    offspring._cache_frozen = self._cache_frozen
+                    current_tr.add_offspring(offspring)
+                tree_path.append(offspring)
         return tree_path
 
     def apply(self, oos=None, x=None, y=None, transform: List[str] = None) -> Tensor:
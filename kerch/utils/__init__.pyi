@@ -4,7 +4,9 @@ from .cast import (castf as castf, casti as casti, check_representation as check
                    capitalize_only_first as capitalize_only_first)
 from .type import (set_eps as set_eps, set_ftype as set_ftype, set_itype as set_itype, gpu_available as gpu_available,
                    FTYPE as FTYPE, ITYPE as ITYPE, EPS as EPS)
-from .math import eigs as eigs
+from .math import (eigs as eigs, randomized_eigs as randomized_eigs,
+                   spectral_density as spectral_density, pcg as pcg,
+                   cholesky_update as cholesky_update, cholesky_delete as cholesky_delete)
 from .errors import (ImplicitError as ImplicitError,
                      ExplicitError as ExplicitError,
                      RepresentationError as RepresentationError,
@@ -12,7 +14,9 @@ from .errors import (ImplicitError as ImplicitError,
                      NotInitializedError as NotInitializedError,
                      MultiViewError as MultiViewError,
                      KerchError as KerchError)
-from .tensor import (eye_like as eye_like, ones_like as ones_like, equal as equal)
+from .tensor import (eye_like as eye_like, ones_like as ones_like, equal as equal, fingerprint as fingerprint)
 from .defaults import (DEFAULT_KERNEL_TYPE as DEFAULT_KERNEL_TYPE,
-                       DEFAULT_CACHE_LEVEL as DEFAULT_CACHE_LEVEL)
+                       DEFAULT_CACHE_LEVEL as DEFAULT_CACHE_LEVEL,
+                       DEFAULT_CACHE_DISK as DEFAULT_CACHE_DISK,
+                       DEFAULT_CACHE_EXACT as DEFAULT_CACHE_EXACT)
 from .dict import reverse_dict as reverse_dict
\ No newline at end of file
@@ -7,14 +7,23 @@ DEFAULT_CACHE_LEVEL = {"forward_sample_default_representation": "light",
                        "sample_phi": "light",
                        "sample_C": "light",
                        "sample_K": "light",
+                       "sample_K_statistics": "light",
+                       "sample_phi_full": "light",
+                       "sample_K_full": "light",
                        "Level_I_default_representation": "normal",
                        "Level_I_other_representation": "total",
+                       "Level_cholesky": "normal",
+                       "LSSVM_factorization": "light",
+                       "FixedSizeLSSVM_features": "normal",
+                       "MVKPCA_projector": "normal",
                        "PPCA_B_primal": "normal",
                        "PPCA_B_dual": "normal",
-                       "PPCA_Inv_primal": "normal",
-                       "PPCA_Inv_dual": "normal",
+                       "PPCA_M_primal": "normal",
+                       "PPCA_M_dual": "normal",
                        "KPCA_total_variance_default_representation": "normal",
                        "KPCA_total_variance_other_representation": "total",
+                       "KPCA_eigs": "light",
+                       "KPCA_incremental_statistics": "light",
                        "Level_subloss_default_representation": "normal",
                        "Level_subloss_other_representation": "total",
                        "sample_transform": "none",
@@ -33,3 +42,38 @@ DEFAULT_CACHE_LEVEL = {"forward_sample_default_representation": "light",
                        "_rsf_piv": "normal",
                        "_nystrom_elements": "light"
                        }
+
+# cache entries that may be written to the disk directory (see kerch.set_cache_directory)
+DEFAULT_CACHE_DISK = ["sample_phi",
+                      "sample_C",
+                      "sample_K",
+                      "sample_phi_full",
+                      "sample_K_full",
+                      "KPCA_eigs",
+                      "_nystrom_elements"]
+
+# cache entries kept in their computed type whatever the storage policy, as they feed or result from decompositions
+# (see kerch.feature.Cache.cache_storage_dtype)
+DEFAULT_CACHE_EXACT = ["sample_phi",
+                       "sample_C",
+                       "sample_K",
+                       "sample_phi_full",
+                       "sample_K_full",
+                       "sample_K_statistics",
+                       "transform_sample_data_default",
+                       "transform_sample_data_nondefault",
+                       "transform_sample_statistics_default",
+                       "transform_sample_statistics_nondefault",
+                       "Wasserstein_kernel_dist",
+                       "Level_cholesky",
+                       "LSSVM_factorization",
+                       "FixedSizeLSSVM_features",
+                       "MVKPCA_projector",
+                       "PPCA_B_primal",
+                       "PPCA_B_dual",
+                       "PPCA_M_primal",
+                       "PPCA_M_dual",
+                       "KPCA_eigs",
+                       "KPCA_incremental_statistics",
+                       "_rsf_piv",
+                       "_nystrom_elements"]
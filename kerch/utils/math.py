@@ -3,7 +3,7 @@ import torch
 from ..feature.logger import _GLOBAL_LOGGER
 
 
-def eigs(A, k=None, B=None, psd=True, sym=True):
+def eigs(A, k=None, B=None, psd=True, sym=True, X=None, L=None, truncate=True):
     r"""
     Eigenvalue decomposition. This method is a wrapper calling other methods depending on the context. In a kernel 
     context, most matrices are symmetric because kernels also are. Hence, they are Hermitian and a faster SVD can be 
@@ -13,10 +13,21 @@ def eigs(A, k=None, B=None, psd=True, sym=True):
     
     :param A: Matrix to be decomposed.
     :param k: Number of greatest eigenpairs requested. Defaults to `None`, which corresponds to computing all of them.
-    :param B: Matrix in the case of a generalized eigenvalue problem. Specify `None` (default) for a classical
-        eigenvalue decomposition.
+    :param B: Symmetric positive definite matrix in the case of a generalized eigenvalue problem
+        :math:`Av = \lambda Bv`. Specify `None` (default) for a classical eigenvalue decomposition. Outside LOBPCG,
+        the problem is reduced to a classical one by a Cholesky factorization :math:`B = LL^\top`: the matrix
+        :math:`L^{-1}AL^{-\top}` is decomposed and the eigenvectors are recovered by back-substitution.
     :param psd: Specifies whether the matrix `A` is positive semi-definite. Defaults to `True`.
     :param sym: Specifies whether the matrix `A` is positive symmetric. Defaults to `True`.
+    :param X: Initial approximation of (some of) the requested eigenvectors, for example the eigenvectors of a
+        previous call with a smaller `k`. The missing columns are completed randomly. This is only used by LOBPCG.
+        Defaults to `None`.
+    :param L: Lower Cholesky factor of `B` if already available, so that repeated generalized problems with the same
+        `B` do not factorize it again. The problem is then directly reduced with it, `B` being neither required nor
+        formed. Defaults to `None`.
+    :param truncate: If `False`, all the eigenpairs computed by a dense decomposition are returned, sorted, instead of
+        the `k` greatest only. This way, a later request for more eigenpairs can be served without a new
+        decomposition. Defaults to `True`.
     :return: eigenvalues, eigenvectors.
 
     :type A: torch.Tensor
@@ -24,6 +35,9 @@ def eigs(A, k=None, B=None, psd=True, sym=True):
     :type B: torch.Tensor, optional
     :type psd: bool, optional
     :type sym: bool, optional
+    :type X: torch.Tensor, optional
+    :type L: torch.Tensor, optional
+    :type truncate: bool, optional
     :rtype: Tuple[torch.Tensor, torch.Tensor]
     """
     assert A is not None, 'Cannot decompose an empty matrix.'
@@ -32,35 +46,294 @@ def eigs(A, k=None, B=None, psd=True, sym=True):
     if k is None: k = k1
     assert k <= k1, f'Requested eigenvectors ({k}) exceeds matrix dimensions ({k1}).'
 
+    if X is not None:
+        X = torch.cat((X[:, :k], torch.randn((k1, max(k - X.shape[1], 0)), dtype=A.dtype, device=A.device)), dim=1)
+
+    if L is not None:
+        # reduction to a classical eigenvalue problem with the given factor, B is never formed
+        A = torch.linalg.solve_triangular(L, A, upper=False)
+        A = torch.linalg.solve_triangular(L, A.T, upper=False).T
+        if X is not None:
+            X = L.T @ X
+        s, v = eigs(.5 * (A + A.T) if sym else A, k=k, psd=psd, sym=sym, X=X, truncate=truncate)
+        # back-substitution, the eigenvectors are B-orthonormal
+        return s, torch.linalg.solve_triangular(L.T.to(v.dtype), v, upper=True)
+
     try:
-        s, v = torch.lobpcg(A, k=k, B=B, largest=True)
+        s, v = torch.lobpcg(A, k=k, B=B, X=X, largest=True)
         _GLOBAL_LOGGER._logger.info('Using LOBPCG for eigendecomposition.')
     except:
+        if B is not None:
+            # reduction to a classical eigenvalue problem: A v = s B v  <=>  (L^-1 A L^-T) (L^T v) = s (L^T v)
+            L = torch.linalg.cholesky(B)
+            A = torch.linalg.solve_triangular(L, A, upper=False)
+            A = torch.linalg.solve_triangular(L, A.T, upper=False).T
+            _GLOBAL_LOGGER._logger.info('Reducing the generalized eigenvalue problem by Cholesky factorization.')
+
         if sym:
-            if B is None:
-                s, v = torch.linalg.eigh(A)
-            else:
-                s, v = torch.linalg.eigh(torch.linalg.inv(B) @ A)
+            s, v = torch.linalg.eigh(.5 * (A + A.T) if B is not None else A)
             _GLOBAL_LOGGER._logger.info('Using hermitian eigendecomposition (eigh).')
-            v = v[:, -k:]  # eigenvectors are vertical components of v
-            s = s[-k:]
+            if truncate:
+                v = v[:, -k:]  # eigenvectors are vertical components of v
+                s = s[-k:]
             v = torch.flip(v, dims=(1,))
             s = torch.flip(s, dims=(0,))
         elif psd:
-            if B is None:
-                _, s, v = torch.svd(A)
-            else:
-                _, s, v = torch.svd(torch.linalg.inv(B) @ A)
+            _, s, v = torch.svd(A)
             _GLOBAL_LOGGER._logger.info('Using SVD for eigendecomposition (svd).')
-            v = v[:, :k]  # eigenvectors are vertical components of v
-            s = s[:k]
+            if truncate:
+                v = v[:, :k]  # eigenvectors are vertical components of v
+                s = s[:k]
         else:
-            if B is None:
-                s, v = torch.linalg.eig(A)
-            else:
-                s, v = torch.linalg.eig(torch.linalg.inv(B) @ A)
+            s, v = torch.linalg.eig(A)
             _GLOBAL_LOGGER._logger.info('Using classical eigendecomposition (eig).')
             v = v[:, :k]  # eigenvectors are vertical components of v
             s = s[:k]
 
+        if B is not None:
+            # back-substitution, the eigenvectors are B-orthonormal
+            v = torch.linalg.solve_triangular(L.T.to(v.dtype), v, upper=True)
+
     return s.data, v.data
+
+
+def randomized_eigs(matmul, num: int, k: int, dtype=None, device=None, oversampling: int = 10, num_iter: int = 4,
+                    X=None):
+    r"""
+    Matrix-free eigenvalue decomposition of a symmetric positive semi-definite operator by randomized subspace
+    iteration followed by a Rayleigh-Ritz projection. The matrix itself is never required: it is only accessed
+    through its products with blocks of vectors. This way, only matrices of size ``num`` times ``k + oversampling``
+    are stored.
+
+    :param matmul: Function returning the product of the operator with a matrix of size [num, r].
+    :param num: Dimension of the (square) operator.
+    :param k: Number of greatest eigenpairs requested.
+    :param dtype: Data type of the random test matrix. Defaults to :attr:`kerch.FTYPE`.
+    :param device: Device of the random test matrix. Defaults to `None` (default device).
+    :param oversampling: Number of additional vectors in the subspace to improve the accuracy. Defaults to 10.
+    :param num_iter: Number of power (subspace) iterations. Defaults to 4.
+    :param X: Initial subspace, for example the eigenvectors of a previous call with a smaller `k`. It is completed
+        with random vectors. Defaults to `None`.
+    :return: eigenvalues, eigenvectors.
+
+    :type matmul: Callable[[torch.Tensor], torch.Tensor]
+    :type num: int
+    :type k: int
+    :type dtype: torch.dtype, optional
+    :type device: torch.device, optional
+    :type oversampling: int, optional
+    :type num_iter: int, optional
+    :type X: torch.Tensor, optional
+    :rtype: Tuple[torch.Tensor, torch.Tensor]
+    """
+    from .type import FTYPE
+    assert k <= num, f'Requested eigenvectors ({k}) exceeds the operator dimensions ({num}).'
+    if dtype is None:
+        dtype = FTYPE
+    r = min(k + oversampling, num)
+
+    if X is None:
+        X = torch.randn((num, r), dtype=dtype, device=device)
+    else:
+        X = torch.cat((X[:, :r], torch.randn((num, r - min(X.shape[1], r)), dtype=dtype, device=device)), dim=1)
+    q, _ = torch.linalg.qr(matmul(X))
+    for _ in range(num_iter):
+        q, _ = torch.linalg.qr(matmul(q))
+
+    t = q.T @ matmul(q)
+    s, u = torch.linalg.eigh(.5 * (t + t.T))
+    _GLOBAL_LOGGER._logger.info('Using randomized subspace iteration for eigendecomposition.')
+    s = torch.flip(s, dims=(0,))[:k]
+    v = q @ torch.flip(u, dims=(1,))[:, :k]
+    return s.data, v.data
+
+
+def spectral_density(matmul, num: int, num_probes: int = 10, num_steps: int = 30, dtype=None, device=None):
+    r"""
+    Estimates the spectral density of a symmetric operator by stochastic Lanczos quadrature. For each of the
+    ``num_probes`` random Rademacher vectors, ``num_steps`` Lanczos iterations are performed and the eigendecomposition
+    of the resulting tridiagonal matrix provides the nodes and weights of a Gauss quadrature of the spectral measure.
+    The spectrum is thus approximated by
+
+    .. math::
+        \sum_{i=1}^{\texttt{num}} \delta(\lambda - \lambda_i) \approx \sum_{j} w_j \delta(\lambda - \theta_j),
+
+    without computing any eigendecomposition of the operator itself. The cost is dominated by the
+    ``num_probes * num_steps`` products with the operator, which are computed by blocks of ``num_probes`` vectors.
+
+    :param matmul: Function returning the product of the operator with a matrix of size [num, r].
+    :param num: Dimension of the (square) operator.
+    :param num_probes: Number of random probe vectors. Defaults to 10.
+    :param num_steps: Number of Lanczos iterations per probe. Defaults to 30.
+    :param dtype: Data type of the probe vectors. Defaults to :attr:`kerch.FTYPE`.
+    :param device: Device of the probe vectors. Defaults to `None` (default device).
+    :return: nodes, weights. The weights sum up to ``num``, so that they can be interpreted as eigenvalue counts.
+
+    :type matmul: Callable[[torch.Tensor], torch.Tensor]
+    :type num: int
+    :type num_probes: int, optional
+    :type num_steps: int, optional
+    :type dtype: torch.dtype, optional
+    :type device: torch.device, optional
+    :rtype: Tuple[torch.Tensor, torch.Tensor]
+    """
+    from .type import FTYPE, EPS
+    if dtype is None:
+        dtype = FTYPE
+    num_steps = min(num_steps, num)
+
+    q = (2 * torch.randint(0, 2, (num, num_probes), device=device) - 1).to(dtype) / (num ** .5)
+    basis = torch.zeros((num_steps, num, num_probes), dtype=dtype, device=device)
+    alpha = torch.zeros((num_probes, num_steps), dtype=dtype, device=device)
+    beta = torch.zeros((num_probes, num_steps - 1), dtype=dtype, device=device)
+    for j in range(num_steps):
+        basis[j] = q
+        w = matmul(q)
+        alpha[:, j] = torch.sum(q * w, dim=0)
+        # full reorthogonalization (twice is enough), which also removes the three-term recurrence components
+        for _ in range(2):
+            w = w - torch.einsum('jnp,jp->np', basis[:j + 1], torch.einsum('jnp,np->jp', basis[:j + 1], w))
+        if j < num_steps - 1:
+            b = torch.linalg.norm(w, dim=0)
+            beta[:, j] = b
+            # in case of breakdown, the Krylov subspace is invariant and the remaining steps are decoupled
+            q = torch.where(b > EPS, w / torch.clamp(b, min=EPS), torch.zeros_like(w))
+
+    tridiag = torch.diag_embed(alpha) + torch.diag_embed(beta, offset=1) + torch.diag_embed(beta, offset=-1)
+    theta, u = torch.linalg.eigh(tridiag)
+    weights = (num / num_probes) * u[:, 0, :] ** 2
+    _GLOBAL_LOGGER._logger.info('Using stochastic Lanczos quadrature for spectral density estimation.')
+    return theta.flatten().data, weights.flatten().data
+
+
+def pcg(matmul, b, precond=None, x0=None, tol: float = 1e-6, max_iter: int = 100):
+    r"""
+    Preconditioned conjugate gradient for a symmetric positive definite system :math:`Ax = b`, with possibly several
+    right-hand sides (columns of `b`), each one being solved independently. The matrix is only accessed through its
+    products with blocks of vectors.
+
+    :param matmul: Function returning the product of the matrix with a matrix of size [n, r].
+    :param b: Right-hand sides.
+    :param precond: Function applying the inverse of the preconditioner to a matrix of size [n, r]. Defaults to
+        `None` (no preconditioning).
+    :param x0: Initial guess (warm start). Defaults to `None` (zeros).
+    :param tol: Relative tolerance on the residual norm of each column for the early stopping. Defaults to 1e-6.
+    :param max_iter: Maximum number of iterations. Defaults to 100.
+    :return: solution, number of iterations performed.
+
+    :type matmul: Callable[[torch.Tensor], torch.Tensor]
+    :type b: torch.Tensor [n, r]
+    :type precond: Callable[[torch.Tensor], torch.Tensor], optional
+    :type x0: torch.Tensor [n, r], optional
+    :type tol: float, optional
+    :type max_iter: int, optional
+    :rtype: Tuple[torch.Tensor, int]
+    """
+    if precond is None:
+        precond = lambda v: v
+    if x0 is None:
+        x = torch.zeros_like(b)
+        r = b.clone()
+    else:
+        x = x0.clone()
+        r = b - matmul(x)
+    threshold = tol * torch.linalg.norm(b, dim=0)
+
+    z = precond(r)
+    p = z
+    rz = torch.sum(r * z, dim=0)
+    num_iter = 0
+    while num_iter < max_iter and torch.any(torch.linalg.norm(r, dim=0) > threshold):
+        num_iter += 1
+        q = matmul(p)
+        # converged columns are not updated anymore (zero step)
+        active = torch.linalg.norm(r, dim=0) > threshold
+        step = torch.where(active, rz / torch.sum(p * q, dim=0), torch.zeros_like(rz))
+        x = x + step * p
+        r = r - step * q
+        z = precond(r)
+        rz_new = torch.sum(r * z, dim=0)
+        p = z + torch.where(active, rz_new / rz, torch.zeros_like(rz)) * p
+        rz = rz_new
+
+    _GLOBAL_LOGGER._logger.info(f'Preconditioned conjugate gradient stopped after {num_iter} iterations.')
+    return x, num_iter
+
+
+def cholesky_update(L, x, block_size=None):
+    r"""
+    Low-rank update of a Cholesky factorization: returns the lower factor of :math:`LL^\top + XX^\top` in
+    :math:`\mathcal{O}(n^2k)` instead of :math:`\mathcal{O}(n^3)` for a new factorization, :math:`k` being the rank of
+    the update. The rows are processed by blocks: the factor of each diagonal block and the update of the rows below
+    are given by a QR decomposition of :math:`\begin{bmatrix} L_{BB} & X_B \end{bmatrix}^\top`, its orthogonal
+    complement carrying the update to the next blocks.
+
+    :param L: Lower Cholesky factor.
+    :param x: Update vector, or update matrix :math:`X` with one column per rank.
+    :param block_size: Number of rows processed at once. Defaults to ``None``, which corresponds to the largest of 32
+        and the rank of the update.
+    :return: Updated lower Cholesky factor.
+
+    :type L: torch.Tensor [n, n]
+    :type x: torch.Tensor [n] or [n, k]
+    :type block_size: int, optional
+    :rtype: torch.Tensor [n, n]
+    """
+    X = x[:, None] if x.dim() == 1 else x
+    L = L.clone()
+    num, rank = L.shape[0], X.shape[1]
+    if rank == 0:
+        return L
+    if block_size is None:
+        block_size = max(32, rank)
+    for start in range(0, num, block_size):
+        stop = min(start + block_size, num)
+        # the rows of the block and below, with the remaining update vectors appended as columns
+        H = torch.cat((L[start:, start:stop], X), dim=1)
+        Q, R = torch.linalg.qr(H[:stop - start, :].T, mode='complete')
+        # positive diagonal
+        signs = torch.sign(torch.diagonal(R))
+        signs[signs == 0] = 1
+        Q = H @ Q
+        L[start:, start:stop] = Q[:, :stop - start] * signs
+        X = Q[stop - start:, stop - start:]
+        # the entries above the diagonal are zeroed, as the rounding errors of the product make them tiny
+        L[start:stop, start:stop] = torch.tril(L[start:stop, start:stop])
+    return L
+
+
+def cholesky_delete(L, idx):
+    r"""
+    Cholesky factorization of a matrix after the deletion of some of its rows and columns. If :math:`A = LL^\top`, the
+    factor of :math:`A` without the rows and columns :math:`R` is obtained from :math:`L` without these rows and
+    columns, all at once: the rows and columns before the first deleted index are unchanged and the trailing block
+    is updated with the removed columns :math:`L_{:,R}` by a single rank-:math:`|R|` update (see
+    :py:func:`cholesky_update`). This costs :math:`\mathcal{O}(n^2|R|)` instead of :math:`\mathcal{O}(n^3)` for a new
+    factorization. When many indices are deleted, the trailing block is factorized again instead, which is then
+    cheaper.
+
+    :param L: Lower Cholesky factor.
+    :param idx: Indices of the rows and columns to be deleted.
+    :return: Lower Cholesky factor of the remaining matrix.
+
+    :type L: torch.Tensor [n, n]
+    :type idx: int[]
+    :rtype: torch.Tensor [n - len(idx), n - len(idx)]
+    """
+    idx = torch.unique(torch.as_tensor(idx, device=L.device).flatten(), sorted=True)
+    if idx.numel() == 0:
+        return L.clone()
+    keep = torch.ones(L.shape[0], dtype=torch.bool, device=L.device)
+    keep[idx] = False
+    first = int(idx[0])
+
+    factor = L[keep, :][:, keep]
+    # the trailing block of the remaining indices, which lost the contribution of the removed columns
+    removed = L[first:, :][keep[first:], :][:, idx]
+    block = factor[first:, first:]
+    if 4 * removed.shape[1] >= block.shape[0]:
+        block = torch.linalg.cholesky(block @ block.T + removed @ removed.T)
+    else:
+        block = cholesky_update(block, removed)
+    factor[first:, first:] = block
+    return factor
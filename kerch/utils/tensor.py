@@ -1,9 +1,14 @@
 # coding=utf-8
 from typing import Union
+import hashlib
+import itertools
 
 import torch
 from torch import Tensor as T
 
+# tokens identifying the storages of the fingerprinted tensors, never reused
+_STORAGE_TOKENS = itertools.count(1)
+
 
 def eye_like(m: T) -> T:
     r"""
@@ -50,3 +55,49 @@ def equal(val1: Union[T, None], val2: Union[T, None]) -> bool:
         return True
     else:
         return False
+
+
+def fingerprint(x: Union[T, None], content: bool = False, num_sampled: Union[int, None] = None) -> str:
+    r"""
+    Fingerprint of a tensor, meant to identify its values in the cache keys.
+
+    By default, the fingerprint is built from the storage of the data, the version counter of the tensor (which
+    is incremented by each in-place operation), its offset, shape, strides, data type and device. The storage is
+    identified by a token attached to it on the first call and never reused: contrary to ``id(x)`` or to the memory
+    address, the fingerprint of a garbage collected tensor is not given to different values. The views of a tensor share
+    its storage.
+
+    With ``content=True``, the fingerprint is instead built from a hash of the values of the tensor, so that identical
+    values passed as different tensors share the same fingerprint. Hashing can be restricted to ``num_sampled`` evenly
+    spaced values, but the values that are not sampled are then not taken into account: different inputs only
+    differing there share the same fingerprint. This is never used for the cache keys.
+
+    :param x: Tensor to identify. The fingerprint of ``None`` is ``'0'``.
+    :param content: Indicates whether the fingerprint is based on the content instead of the memory. Defaults to
+        ``False``.
+    :param num_sampled: Number of values hashed when ``content=True``, ``None`` corresponding to all of them. Defaults
+        to ``None``.
+    :return: Fingerprint of the tensor.
+
+    :type x: Union[T, None]
+    :type content: bool, optional
+    :type num_sampled: int, optional
+    :rtype: str
+    """
+    if x is None:
+        return '0'
+    description = f"{tuple(x.shape)}_{x.dtype}_{x.device}"
+    if content:
+        values = x.detach().reshape(-1)
+        if num_sampled is not None and values.numel() > num_sampled:
+            values = values[torch.linspace(0, values.numel() - 1, num_sampled, device=x.device).long()]
+        values = values.contiguous().cpu().view(torch.uint8).numpy()
+        return hashlib.blake2b(values.tobytes(), digest_size=8).hexdigest() + "_" + description
+
+    # the python object of a storage lives as long as the storage itself, so that the token follows the data
+    storage = x.untyped_storage()
+    token = getattr(storage, '_kerch_token', None)
+    if token is None:
+        token = next(_STORAGE_TOKENS)
+        storage._kerch_token = token
+    return f"{token}_{x.storage_offset()}_{x.stride()}_{x._version}_{description}"
@@ -0,0 +1,391 @@
+import unittest
+import unittest.mock
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import torch
+import kerch
+
+kerch.set_logging_level(40)  # only print errors
+unittest.TestCase.__str__ = lambda x: ""
+
+
+class TestCache(unittest.TestCase):
+    r"""
+    These tests verify the management of the cache.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(TestCache, self).__init__(*args, **kwargs)
+
+        self.NUM_DATA = 100
+        self.DIM_INPUT = 4
+
+        self.x = torch.randn(self.NUM_DATA, self.DIM_INPUT)
+
+    def test_budget(self):
+        """
+        The cache of a module remains within its budget, the entries of the highest levels being evicted first and the
+        persisting ones never.
+        """
+        for eviction in ['lru', 'cost']:
+            kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_level='total', cache_eviction=eviction)
+            kernel._get("persisting", fun=lambda: torch.randn(100, 100), persisting=True)
+            K = kernel.K
+            kernel.cache_budget = kernel.cache_bytes + 50 * 50 * 4  # room for a single out-of-sample entry
+            for _ in range(10):
+                kernel._get("oos_" + str(_), fun=lambda: torch.randn(50, 50), default_level='heavy', force=True)
+                self.assertLessEqual(kernel.cache_bytes, kernel.cache_budget)
+            self.assertEqual(kernel.cache_evictions, 9)
+            self.assertIn("persisting", kernel.cache_keys())
+            self.assertIs(kernel.K, K)
+
+    def test_batch_eviction(self):
+        """
+        The entries over budget are evicted together, the dictionaries of the cache being only replaced once.
+        """
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_level='total')
+        for _ in range(20):
+            kernel._get("oos_" + str(_), fun=lambda: torch.randn(10, 10), default_level='heavy', force=True)
+        calls = []
+        retain = kernel._retain
+        kernel._retain = lambda condition: calls.append(1) or retain(condition)
+        kernel.cache_budget = kernel.cache_bytes - 15 * 10 * 10 * 4
+        self.assertEqual(calls, [1])
+        self.assertEqual(kernel.cache_evictions, 15)
+        self.assertLessEqual(kernel.cache_bytes, kernel.cache_budget)
+        self.assertEqual(sum("oos_" in key for key in kernel.cache_keys(private=True)), 5)
+
+    def test_global_budget(self):
+        """
+        The out-of-sample entries of all modules remain within the global budget.
+        """
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., kernel_transform=['center'], cache_level='heavy')
+        K = kernel.K
+        kerch.set_cache_budget(0)
+        try:
+            for _ in range(10):
+                kernel.k(torch.randn(20, self.DIM_INPUT))
+            self.assertNotIn('K', kernel.cache_keys())
+            self.assertTrue(torch.allclose(kernel.K, K))
+        finally:
+            kerch.set_cache_budget(None)
+
+    def test_fingerprint(self):
+        """
+        The out-of-sample entries follow the in-place modifications of the inputs and, with content fingerprints, are
+        shared by different tensors with the same values.
+        """
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., sample_transform=['standardize'], cache_level='total')
+        x = torch.randn(10, self.DIM_INPUT)
+        k = kernel.k(x)
+        x.mul_(2)
+        self.assertTrue(torch.allclose(kernel.k(x), kernel.k(x.clone())))
+        self.assertFalse(torch.allclose(kernel.k(x), k))
+
+        self.assertIsNot(kernel.k(x), kernel.k(x.clone()))
+        kerch.set_cache_fingerprint('content')
+        try:
+            self.assertIs(kernel.k(x), kernel.k(x.clone()))
+        finally:
+            kerch.set_cache_fingerprint('pointer')
+
+        y = torch.randn(10, self.DIM_INPUT)
+        fingerprint = kerch.utils.fingerprint(y)
+        ptr = y.data_ptr()
+        del y
+        z = torch.randn(10, self.DIM_INPUT)
+        if z.data_ptr() == ptr:
+            self.assertNotEqual(kerch.utils.fingerprint(z), fingerprint)
+
+        # the views share the storage of the tensor, a replaced storage is a new one
+        fingerprint = kerch.utils.fingerprint(x)
+        view = x[:5]
+        del view
+        self.assertEqual(kerch.utils.fingerprint(x), fingerprint)
+        x.data = torch.randn(10, self.DIM_INPUT)
+        self.assertNotEqual(kerch.utils.fingerprint(x), fingerprint)
+
+        # all the values are hashed, not a sample of them
+        x = torch.randn(2000, self.DIM_INPUT)
+        y = x.clone()
+        y[2] += 5
+        kerch.set_cache_fingerprint('content')
+        try:
+            self.assertIsNot(kernel.k(y), kernel.k(x))
+            self.assertTrue(torch.allclose(kernel.k(y), kernel.k(y.clone())))
+        finally:
+            kerch.set_cache_fingerprint('pointer')
+
+    def test_dependencies(self):
+        """
+        The cache entries are only computed again if the sources they depend on have changed.
+        """
+        y = torch.randn(self.NUM_DATA, 1)
+        model = kerch.level.LSSVM(sample=self.x, target=y, sigma=1., cache_level='total')
+        model.solve()
+        K, factor = model.kernel.K, model._cholesky_dual
+        model.stochastic()
+        self.assertIs(model.kernel.K, K)
+        model.dual_param = torch.randn(self.NUM_DATA, 1)
+        self.assertIs(model.kernel.K, K)
+        self.assertIs(model._cholesky_dual, factor)
+
+        model.gamma = 2.
+        self.assertIs(model.kernel.K, K)
+        self.assertIsNot(model._cholesky_dual, factor)
+
+        model.sigma = 2.
+        self.assertTrue(torch.allclose(model.kernel.K, kerch.kernel.RBF(sample=self.x, sigma=2.).K))
+
+        with torch.no_grad():
+            model._sigma.mul_(2.)
+        self.assertTrue(torch.allclose(model.kernel.K, kerch.kernel.RBF(sample=self.x, sigma=4.).K))
+
+        model.stochastic(idx=torch.arange(10))
+        self.assertEqual(model.kernel.K.shape, (10, 10))
+
+    def test_staleness(self):
+        """
+        After a change, the sources are gathered once for the module and the entries it does not concern are read again
+        without gathering them.
+        """
+        model = kerch.level.LSSVM(sample=self.x, target=torch.randn(self.NUM_DATA, 1), sigma=1., cache_level='total')
+        for _ in range(10):
+            model._get("entry_" + str(_), fun=lambda: torch.randn(5, 5), force=True)
+        calls = []
+        sources = model._cache_sources
+        model._cache_sources = lambda: calls.append(1) or sources()
+        model.gamma = 2.
+        for _ in range(2):
+            for key in range(10):
+                self.assertFalse(model._is_stale("entry_" + str(key)))
+        self.assertEqual(len(calls), 1)
+
+    def test_training(self):
+        """
+        The entries follow the parameters updated in place by the optimizers, through their data, during full-batch
+        epochs.
+        """
+        torch.manual_seed(0)
+        learning_set = kerch.data.TwoMoons(num_training=50, num_validation=0, num_test=0)
+        model = kerch.model.KPCA(sample=learning_set.training_set[:][0], sigma=1., dim_output=1,
+                                 representation='dual')
+        trainer = kerch.train.Trainer(model=model, learning_set=learning_set, epochs=3, stiefel_lr=1e-1,
+                                      watcher={'watcher_type': 'none'})
+        trainer.fit()
+        level = next(model.levels)
+        loss = level.loss().item()
+        level.reset(recurse=True)
+        self.assertAlmostEqual(level.loss().item(), loss, places=4)
+
+    def test_subblocks(self):
+        """
+        The kernel matrices and feature maps of a stochastic selection are gathered from the ones of the full sample,
+        the kernel transforms being still applied on the selection.
+        """
+        idx = torch.randperm(self.NUM_DATA)[:20]
+        for kernel_type in ['rbf', 'linear']:
+            kernel = kerch.kernel.factory(kernel_type=kernel_type, sample=self.x, kernel_transform=['center'],
+                                          cache_subblocks=True, cache_level='normal')
+            K = kernel.K
+            full = kernel._cache["sample_phi_full" if kernel.explicit else "sample_K_full"][2]
+            kernel.stochastic(idx=idx)
+            reference = kerch.kernel.factory(kernel_type=kernel_type, sample=self.x[idx, :],
+                                             kernel_transform=['center'], sigma=getattr(kernel, 'sigma', None))
+            self.assertTrue(torch.allclose(kernel.K, reference.K, atol=1e-5))
+            self.assertIs(kernel._cache["sample_phi_full" if kernel.explicit else "sample_K_full"][2], full)
+            kernel.stochastic()
+            self.assertTrue(torch.allclose(kernel.K, K))
+
+    def test_disk(self):
+        """
+        The entries written to the disk are loaded by a new module in the same state, and only by such a module.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_directory=directory)
+            model = kerch.level.KPCA(sample=self.x, sigma=1., dim_output=3, kernel_transform=['center'],
+                                     cache_directory=directory)
+            K = kernel.K
+            model.solve()
+
+            same = kerch.kernel.RBF(sample=self.x.clone(), sigma=1., cache_directory=directory)
+            self.assertTrue(torch.equal(same.K, K))
+            self.assertIn("K", same.cache_keys())
+            other = kerch.kernel.RBF(sample=self.x, sigma=2., cache_directory=directory)
+            paths = []
+            disk_path = other._disk_path
+            other._disk_path = lambda key, level_key: paths.append(key) or disk_path(key, level_key)
+            self.assertFalse(torch.allclose(other.K, K))
+            # the path of a missing entry is only computed once
+            self.assertEqual(len(paths), len(set(paths)))
+
+            # the parameters are only hashed again after a change
+            hashed = []
+            fingerprint = kerch.feature._cache_disk.fingerprint
+            with unittest.mock.patch('kerch.feature._cache_disk.fingerprint',
+                                     lambda x, **kwargs: hashed.append(x) or fingerprint(x, **kwargs)):
+                for key in range(5):
+                    other._disk_path("entry_" + str(key), 'sample_K')
+                self.assertEqual(len(hashed), 0)
+                other.sample = torch.randn(self.NUM_DATA, self.DIM_INPUT)
+                for key in range(5):
+                    other._disk_path("entry_" + str(key), 'sample_K')
+                self.assertEqual(sum(x is other._sample for x in hashed), 1)
+
+            restarted = kerch.level.KPCA(sample=self.x, sigma=1., dim_output=3, kernel_transform=['center'],
+                                         cache_directory=directory)
+            restarted.solve()
+            self.assertNotIn("K", restarted.cache_keys())
+            self.assertTrue(torch.allclose(restarted.vals, model.vals))
+
+    def test_spill(self):
+        """
+        The spilled entries leave the memory and are paged back in when read, with the most compact representation.
+        """
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., kernel_transform=['center'], cache_spill_level='light')
+        K = kernel.K
+        self.assertEqual(kernel.cache_bytes, 0)
+        self.assertGreater(kernel.cache_spilled_bytes, 0)
+        self.assertTrue(torch.allclose(kernel.K, K))
+
+        kernel = kerch.kernel.factory(kernel_type='triangular', sample=self.x, sigma=.5, cache_spill_bytes=0)
+        K = kernel.K
+        self.assertEqual(kernel._cache["K"][2].compression, 'sparse')
+        self.assertLess(kernel.cache_spilled_bytes, K.numel() * K.element_size())
+        self.assertTrue(torch.equal(kernel.K, K))
+
+    def test_stats(self):
+        """
+        The hits and misses of the entries are recorded and aggregated over the children and the transforms.
+        """
+        model = kerch.level.KPCA(sample=self.x, sigma=1., dim_output=3, kernel_transform=['center'])
+        model.solve()
+        model.K
+        model.K
+        stats = model.cache_stats()
+        self.assertEqual(len(set(len(column) for column in stats.values())), 1)
+        row = stats['key'].index('K')
+        self.assertEqual(stats['misses'][row], 1)
+        self.assertGreaterEqual(stats['hits'][row], 2)
+        self.assertEqual(stats['bytes'][row], self.NUM_DATA ** 2 * 4)
+        self.assertTrue(any(module.startswith('KPCA[kernel_implicit_transform]') for module in stats['module']))
+
+        model.reset_cache_stats()
+        self.assertEqual(len(model.cache_stats()['key']), 0)
+
+    def test_auto(self):
+        """
+        The automatic level saves the entries that are reused, not the others, and its measurements can be restored
+        by another job.
+        """
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_level='auto')
+        for _ in range(3):
+            kernel._get("reused", fun=lambda: torch.randn(10, 10), level_key="test_auto_reused", default_level='total')
+        stats = kernel.cache_stats()
+        row = stats['key'].index("reused")
+        self.assertEqual((stats['misses'][row], stats['hits'][row]), (2, 1))
+
+        for num in range(3):
+            kernel._get(f"once_{num}", fun=lambda: torch.randn(10, 10), level_key="test_auto_once", default_level='light')
+        self.assertIn("once_0", kernel.cache_keys())
+        self.assertNotIn("once_1", kernel.cache_keys())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + '/profile.json'
+            kerch.save_cache_profile(path)
+            kerch.feature._cache_stats._PROFILE.clear()
+            # the profile is only written at exit once a file has been set
+            registered = kerch.feature._cache_stats._PROFILE_AT_EXIT
+            kerch.feature._cache_stats._PROFILE_AT_EXIT = False
+            try:
+                with unittest.mock.patch('atexit.register') as register:
+                    kerch.set_cache_profile(None)
+                    self.assertEqual(register.call_count, 0)
+                    kerch.set_cache_profile(path)
+                    kerch.set_cache_profile(path)
+                    self.assertEqual(register.call_count, 1)
+                kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_level='auto')
+                kernel._get("once", fun=lambda: torch.randn(10, 10), level_key="test_auto_once", default_level='light')
+                self.assertNotIn("once", kernel.cache_keys())
+            finally:
+                kerch.set_cache_profile(None)
+                kerch.feature._cache_stats._PROFILE_AT_EXIT = registered
+
+    def test_threads(self):
+        """
+        An entry required by concurrent threads is only computed once and a frozen cache is not modified by them.
+        """
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., kernel_transform=['center'])
+        computations = list()
+        barrier = threading.Barrier(8)
+
+        def fun():
+            computations.append(None)
+            return torch.randn(10, 10)
+
+        def get(_):
+            barrier.wait()
+            return kernel._get("shared", fun=fun, default_level='light')
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            values = list(executor.map(get, range(8)))
+        self.assertEqual(len(computations), 1)
+        self.assertTrue(all(val is values[0] for val in values))
+
+        K = kernel.K
+        kernel.freeze()
+        keys = set(kernel.cache_keys(private=True))
+        x = [torch.randn(10, self.DIM_INPUT) for _ in range(16)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            ks = list(executor.map(kernel.k, x))
+        self.assertEqual(set(kernel.cache_keys(private=True)), keys)
+        self.assertIs(kernel.K, K)
+        kernel.unfreeze()
+        for xi, ki in zip(x, ks):
+            self.assertTrue(torch.allclose(kernel.k(xi), ki, atol=1e-5))
+
+    def test_storage(self):
+        """
+        The entries stored with a reduced precision or packed are restored to their type when read, with a bounded
+        error reported in the statistics, while the entries feeding decompositions are kept exact.
+        """
+        model = kerch.level.KPCA(sample=self.x, sigma=1., dim_output=3, kernel_transform=['center'], cache_level='total',
+                                 cache_storage_dtype='bfloat16', cache_storage_level='normal')
+        reference = kerch.level.KPCA(sample=self.x, sigma=1., dim_output=3, kernel_transform=['center'])
+        model.solve()
+        reference.solve()
+        model.reset(recurse=True)
+        model.solve()
+        self.assertTrue(torch.allclose(model.vals, reference.vals))
+
+        x = torch.randn(10, self.DIM_INPUT)
+        model(x)
+        out = model(x)
+        self.assertEqual(out.dtype, kerch.FTYPE)
+        # the eigenvectors are only defined up to their sign
+        self.assertTrue(torch.allclose(out.abs(), reference(x).abs(), atol=1e-2))
+        stats = model.cache_stats()
+        errors = [error for error in stats['storage_error'] if error is not None]
+        self.assertGreater(len(errors), 0)
+        self.assertTrue(all(error < 1e-2 for error in errors))
+        self.assertNotIn('K', [key for key, storage in zip(stats['key'], stats['storage']) if storage is not None])
+
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_storage_packed=True)
+        K = kerch.kernel.RBF(sample=self.x, sigma=1.).K
+        val = kernel._get("packed", fun=lambda: K.clone(), default_level='heavy', force=True)
+        self.assertEqual(kernel.cache_bytes, self.NUM_DATA * (self.NUM_DATA + 1) // 2 * 4)
+        self.assertTrue(torch.equal(kernel._get("packed"), val))
+
+        # the values out of the range of the reduced type are kept in full precision
+        kernel = kerch.kernel.RBF(sample=self.x, sigma=1., cache_storage_dtype='float16')
+        kernel._get("big", fun=lambda: torch.full((4, 4), 1e6), default_level='heavy', force=True)
+        self.assertTrue(torch.equal(kernel._get("big"), torch.full((4, 4), 1e6)))
+        self.assertEqual(kernel.cache_stats()['storage'][kernel.cache_stats()['key'].index('big')], None)
+        kernel._get("small", fun=lambda: torch.full((4, 4), .5), default_level='heavy', force=True)
+        self.assertEqual(kernel._get("small").dtype, kerch.FTYPE)
+        self.assertIsNotNone(kernel.cache_stats()['storage'][kernel.cache_stats()['key'].index('small')])
+
+
+if __name__ == '__main__':
+    unittest.main()
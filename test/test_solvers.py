@@ -0,0 +1,409 @@
+import unittest
+import torch
+import kerch
+
+kerch.set_logging_level(40)  # only print errors
+unittest.TestCase.__str__ = lambda x: ""
+
+
+class TestSolvers(unittest.TestCase):
+    r"""
+    These tests verify that the alternative solvers agree with the dense ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(TestSolvers, self).__init__(*args, **kwargs)
+
+        self.NUM_DATA = 100
+        self.DIM_INPUT = 4
+        self.DIM_OUTPUT = 3
+
+        self.x = torch.randn(self.NUM_DATA, self.DIM_INPUT)
+
+    def test_kpca_matrix_free(self):
+        """
+        The matrix-free KPCA recovers the same eigenvalues and losses as the dense one.
+        """
+        for kernel_type, kernel_transform in [('rbf', []), ('linear', ['center']), ('polynomial', ['center', 'normalize'])]:
+            kwargs = {'sample': self.x,
+                      'kernel_type': kernel_type,
+                      'kernel_transform': kernel_transform,
+                      'dim_output': self.DIM_OUTPUT,
+                      'representation': 'dual'}
+            dense = kerch.level.KPCA(**kwargs)
+            dense.solve()
+            free = kerch.level.KPCA(solver='matrix_free', block_size=16, **kwargs)
+            free.solve()
+            self.assertNotIn('K', free.cache_keys())
+            self.assertTrue(torch.allclose(dense.vals, free.vals, rtol=1e-3, atol=1e-5))
+            self.assertAlmostEqual(dense.total_variance(), free.total_variance(), places=4)
+            self.assertAlmostEqual(dense.loss().item(), free.loss().item(), delta=1e-3 * dense.loss().item() + 1e-3)
+
+    def test_kpca_incremental(self):
+        """
+        Adding and removing points incrementally is exact when the kernel matrix has a rank lower than the output
+        dimension.
+        """
+        x_new = torch.randn(10, self.DIM_INPUT)
+        kwargs = {'kernel_type': 'linear',
+                  'kernel_transform': ['center'],
+                  'dim_output': self.DIM_INPUT}
+        mdl = kerch.level.KPCA(sample=self.x, **kwargs)
+        mdl.solve()
+        mdl.partial_fit(x_new)
+        mdl.forget(range(5))
+        ref = kerch.level.KPCA(sample=torch.cat((self.x, x_new))[5:], **kwargs)
+        ref.solve()
+        self.assertEqual(mdl.num_idx, self.NUM_DATA + 5)
+        self.assertTrue(torch.allclose(mdl.vals, ref.vals, rtol=1e-4, atol=1e-5))
+        self.assertTrue(torch.allclose(torch.abs(mdl.H.T @ ref.H), torch.eye(self.DIM_INPUT), atol=1e-3))
+
+    def test_kpca_cached_eigs(self):
+        """
+        Changing the output dimension reuses the cached eigendecomposition.
+        """
+        mdl = kerch.level.KPCA(sample=self.x, kernel_type='rbf', kernel_transform=['center'], dim_output=5)
+        mdl.solve()
+        vals = mdl.vals.clone()
+        mdl.dim_output = self.DIM_OUTPUT
+        mdl.solve()
+        self.assertTrue(torch.equal(mdl.vals, vals[:self.DIM_OUTPUT]))
+        mdl.dim_output = 10
+        mdl.solve()
+        ref = kerch.level.KPCA(sample=self.x, kernel_type='rbf', kernel_transform=['center'], dim_output=10)
+        ref.solve()
+        self.assertTrue(torch.allclose(mdl.vals, ref.vals, rtol=1e-3, atol=1e-5))
+
+        # the PPCA shares the cached decomposition, all the eigenpairs of a dense one being kept
+        eigs, calls = kerch.utils.eigs, []
+        kerch.utils.eigs = lambda *args, **kwargs: calls.append(kwargs['k']) or eigs(*args, **kwargs)
+        try:
+            for representation in ['primal', 'dual']:
+                calls.clear()
+                mdl = kerch.level.PPCA(sample=self.x[:5, :], kernel_type='linear', dim_output=2,
+                                       representation=representation)
+                mdl.solve()
+                self.assertEqual(calls, [2])
+                for dim_output in [4, 1]:
+                    mdl.dim_output = dim_output
+                    mdl.solve()
+                    self.assertEqual(calls, [2])
+                    ref = kerch.level.PPCA(sample=self.x[:5, :], kernel_type='linear', dim_output=dim_output,
+                                           representation=representation)
+                    ref.solve()
+                    calls.pop()
+                    self.assertTrue(torch.allclose(mdl.vals, ref.vals, atol=1e-5))
+        finally:
+            kerch.utils.eigs = eigs
+
+    def test_kpca_spectrum(self):
+        """
+        The stochastic Lanczos quadrature estimates are consistent with the exact spectrum: the largest eigenvalue is
+        recovered to 1e-3, the trace to 15%, the explained variance curve and the effective rank to 5% and 10%.
+        """
+        torch.manual_seed(0)
+        x = torch.randn(self.NUM_DATA, self.DIM_INPUT)
+        mdl = kerch.level.KPCA(sample=x, kernel_type='rbf', sigma=2., kernel_transform=['center'],
+                               dim_output=self.DIM_OUTPUT)
+        exact = torch.clamp(torch.linalg.eigvalsh(mdl.K).flip(0) / self.NUM_DATA, min=0.)
+        nodes, weights = mdl.spectral_density(num_probes=50)
+        self.assertAlmostEqual(torch.sum(weights).item(), self.NUM_DATA, places=2)
+        self.assertAlmostEqual(torch.max(nodes).item(), exact[0].item(), delta=1e-3 * exact[0].item())
+        self.assertAlmostEqual(torch.sum(weights * nodes).item(), torch.sum(exact).item(),
+                               delta=.15 * torch.sum(exact).item())
+
+        curve = mdl.explained_variance(num_probes=50)
+        self.assertEqual(curve.shape[0], self.NUM_DATA)
+        self.assertTrue(torch.all(curve[1:] >= curve[:-1]))
+        self.assertAlmostEqual(curve[-1].item(), 1., places=4)
+        self.assertTrue(torch.allclose(curve, torch.cumsum(exact, dim=0) / torch.sum(exact), atol=.05))
+        mdl.solve()
+        self.assertAlmostEqual(curve[self.DIM_OUTPUT - 1].item(), mdl.relative_variance(), delta=.05)
+
+        p = exact[exact > 0] / torch.sum(exact)
+        erank = torch.exp(-torch.sum(p * torch.log(p))).item()
+        self.assertAlmostEqual(mdl.effective_rank(num_probes=50).item(), erank, delta=.1 * erank)
+
+    def test_generalized_eigs(self):
+        """
+        The Cholesky reduction solves the generalized eigenvalue problem with B-orthonormal eigenvectors.
+        """
+        a, b = torch.randn(20, 20), torch.randn(20, 20)
+        A, B = a @ a.T, b @ b.T + 20 * torch.eye(20)
+        s, v = kerch.utils.eigs(A, k=20, B=B)
+        self.assertTrue(torch.allclose(A @ v, B @ v * s, atol=1e-3))
+        self.assertTrue(torch.allclose(v.T @ B @ v, torch.eye(20), atol=1e-4))
+        s_chol, v_chol = kerch.utils.eigs(A, k=5, L=torch.linalg.cholesky(B))
+        self.assertTrue(torch.allclose(s[:5], s_chol, rtol=1e-4))
+        self.assertTrue(torch.allclose(A @ v_chol, B @ v_chol * s_chol, atol=1e-2))
+        self.assertTrue(torch.allclose(v_chol.T @ B @ v_chol, torch.eye(5), atol=1e-4))
+
+    def test_lssvm_dual(self):
+        """
+        The Cholesky and Schur complement solution of the LSSVM corresponds to the one of the bordered system.
+        """
+        y = torch.randn(self.NUM_DATA, 2)
+        mdl = kerch.level.LSSVM(sample=self.x, target=y, kernel_type='rbf', gamma=.5)
+        mdl.solve()
+        n = self.NUM_DATA
+        A = torch.cat((torch.cat((mdl.kernel.K + .5 * torch.eye(n), torch.ones(n, 1)), dim=1),
+                       torch.cat((torch.ones(1, n), torch.zeros(1, 1)), dim=1)), dim=0)
+        sol = torch.linalg.solve(A, torch.cat((y, torch.zeros(1, 2)), dim=0))
+        self.assertTrue(torch.allclose(mdl.H, sol[:-1], atol=1e-4))
+        self.assertTrue(torch.allclose(mdl.bias, sol[-1], atol=1e-4))
+
+    def test_solve_path(self):
+        """
+        The regularization path corresponds to individual solves for each value of gamma.
+        """
+        y = torch.randn(self.NUM_DATA, 2)
+        gammas = [.5, 1., 5.]
+        for cls in [kerch.level.LSSVM, kerch.level.Ridge]:
+            for representation in ['primal', 'dual']:
+                mdl = cls(sample=self.x, target=y, kernel_type='linear', representation=representation)
+                path = mdl.solve_path(gammas)
+                for i, gamma in enumerate(gammas):
+                    mdl.gamma = gamma
+                    mdl.solve()
+                    param = mdl.W if representation == 'primal' else mdl.H
+                    key = 'weight' if representation == 'primal' else 'hidden'
+                    self.assertTrue(torch.allclose(param, path[key][i], atol=1e-3))
+                    if mdl.requires_bias:
+                        self.assertTrue(torch.allclose(mdl.bias, path['bias'][i], atol=1e-4))
+
+    def test_loo_residuals(self):
+        """
+        The closed-form leave-one-out residuals correspond to the ones obtained by refitting without each point.
+        """
+        x, y = self.x[:20], torch.randn(20, 1)
+        mdl = kerch.level.LSSVM(sample=x, target=y, kernel_type='rbf', sigma=1., gamma=.5)
+        residuals = mdl.loo_residuals()
+        for i in range(3):
+            keep = torch.arange(20) != i
+            ref = kerch.level.LSSVM(sample=x[keep], target=y[keep], kernel_type='rbf', sigma=1., gamma=.5)
+            ref.solve()
+            self.assertAlmostEqual(residuals[i, 0].item(), (y[i] - ref.forward(x[i:i + 1])[0]).item(), places=4)
+        cv = kerch.train.CrossValidator(mdl)
+        self.assertAlmostEqual(cv.scan([.1, .5])['error'][1].item(), torch.mean(residuals ** 2).item(), places=5)
+
+    def test_kfold_residuals(self):
+        """
+        The closed-form k-fold residuals correspond to the ones obtained by refitting without each fold, with the
+        cached factorization and along a regularization path.
+        """
+        x, y = self.x[:20], torch.randn(20, 2)
+        folds = list(torch.randperm(20).reshape(4, 5))
+        for cls in [kerch.level.LSSVM, kerch.level.Ridge]:
+            mdl = cls(sample=x, target=y, kernel_type='rbf', sigma=1., gamma=.5)
+            residuals = mdl.loo_residuals(folds=folds)
+            path = mdl.loo_residuals(folds=folds, gammas=[.1, .5])
+            for fold in folds:
+                keep = torch.ones(20, dtype=torch.bool)
+                keep[fold] = False
+                ref = cls(sample=x[keep], target=y[keep], kernel_type='rbf', sigma=1., gamma=.5)
+                ref.solve()
+                expected = y[fold] - ref.forward(x[fold])
+                self.assertTrue(torch.allclose(residuals[fold], expected, atol=1e-4))
+                self.assertTrue(torch.allclose(path[1, fold], expected, atol=1e-4))
+
+    def test_lssvm_pcg(self):
+        """
+        The preconditioned conjugate gradient solver recovers the dense solution.
+        """
+        y = torch.randn(self.NUM_DATA, 2)
+        for cls in [kerch.level.LSSVM, kerch.level.Ridge]:
+            dense = cls(sample=self.x, target=y, kernel_type='rbf', sigma=1.)
+            dense.solve()
+            pcg = cls(sample=self.x, target=y, kernel_type='rbf', sigma=1., solver='pcg', num_landmarks=20,
+                      block_size=16, tol=1e-7)
+            pcg.solve()
+            self.assertNotIn('K', pcg.cache_keys())
+            self.assertTrue(torch.allclose(dense.H, pcg.H, atol=1e-3))
+            if dense.requires_bias:
+                self.assertTrue(torch.allclose(dense.bias, pcg.bias, atol=1e-4))
+
+    def test_fixed_size_lssvm(self):
+        """
+        The fixed-size LSSVM with all points as prototypes coincides with the LSSVM solved in primal on the Nyström
+        features and its prototypes have a larger entropy than random ones.
+        """
+        x = torch.randn(200, self.DIM_INPUT)
+        y = torch.randn(200, 2)
+        model = kerch.level.FixedSizeLSSVM(sample=x, target=y, kernel_type='rbf', sigma=1., num_prototypes=20)
+        model.solve()
+        self.assertEqual(model.W.shape[0], model.dim_feature)
+        x_test = torch.randn(5, self.DIM_INPUT)
+        self.assertTrue(torch.allclose(model.forward(x_test), model.phi(x_test) @ model.W + model.bias))
+
+        def entropy(points):
+            return -torch.log(torch.mean(model.kernel._implicit(points, points)))
+
+        self.assertGreater(entropy(model.prototypes), entropy(x[:20, :]))
+
+        full = kerch.level.FixedSizeLSSVM(sample=self.x, target=self.x[:, :1], kernel_type='rbf', sigma=1.,
+                                          num_prototypes=self.NUM_DATA)
+        full.solve()
+        nystrom = kerch.level.LSSVM(sample=self.x, target=self.x[:, :1], kernel_type='nystrom',
+                                    base_kernel_type='rbf', sigma=1., representation='primal')
+        nystrom.solve()
+        self.assertTrue(torch.allclose(full.forward(), nystrom.forward(), atol=1e-3))
+
+    def test_cholesky_delete(self):
+        """
+        The updated and downdated Cholesky factors coincide with new factorizations, for a few or many indices.
+        """
+        x = torch.randn(200, 210, dtype=torch.float64)
+        A = x @ x.T / 210 + torch.eye(200, dtype=torch.float64)
+        L = torch.linalg.cholesky(A)
+        X = torch.randn(200, 3, dtype=torch.float64)
+        self.assertTrue(torch.allclose(kerch.utils.cholesky_update(L, X), torch.linalg.cholesky(A + X @ X.T)))
+        self.assertTrue(torch.allclose(kerch.utils.cholesky_update(L, X[:, 0]),
+                                       torch.linalg.cholesky(A + torch.outer(X[:, 0], X[:, 0]))))
+        for idx in [[5], [150, 3, 77], list(range(0, 200, 2))]:
+            keep = [i for i in range(200) if i not in idx]
+            self.assertTrue(torch.allclose(kerch.utils.cholesky_delete(L, idx),
+                                           torch.linalg.cholesky(A[keep, :][:, keep])))
+
+    def test_lssvm_prune(self):
+        """
+        The pruned LSSVM coincides with the LSSVM solved on the retained support vectors.
+        """
+        x = torch.randn(150, self.DIM_INPUT)
+        y = torch.sin(torch.sum(x, dim=1, keepdim=True))
+        x_val = torch.randn(50, self.DIM_INPUT)
+        y_val = torch.sin(torch.sum(x_val, dim=1, keepdim=True))
+        model = kerch.level.LSSVM(sample=x, target=y, kernel_type='rbf', sigma=2., gamma=.1)
+        retained = model.prune(ratio=.1, budget=1., x_val=x_val, y_val=y_val)
+        self.assertLess(retained.shape[0], 150)
+        self.assertEqual(model.H.shape[0], retained.shape[0])
+        self.assertTrue(torch.equal(model.sample.data, x[retained, :]))
+
+        ref = kerch.level.LSSVM(sample=x[retained, :], target=y[retained, :], kernel_type='rbf', sigma=2., gamma=.1)
+        ref.solve()
+        self.assertTrue(torch.allclose(model.H, ref.H, atol=1e-3))
+        self.assertTrue(torch.allclose(model.forward(x_val), ref.forward(x_val), atol=1e-3))
+
+    def test_ensemble(self):
+        """
+        The levels of the divide-and-conquer ensemble are solved independently on their shards and their predictions
+        are averaged.
+        """
+        y = torch.randn(self.NUM_DATA, 2)
+        x_test = torch.randn(10, self.DIM_INPUT)
+        for partition in ['random', 'cluster']:
+            model = kerch.model.Ensemble(sample=self.x, target=y, kernel_type='rbf', sigma=1., num_shards=3,
+                                         partition=partition)
+            model.solve()
+            self.assertEqual(sorted(torch.cat(model.shards).tolist()), list(range(self.NUM_DATA)))
+            preds = []
+            for shard, level in zip(model.shards, model.levels):
+                ref = kerch.level.LSSVM(sample=self.x[shard, :], target=y[shard, :], kernel_type='rbf', sigma=1.)
+                ref.solve()
+                self.assertTrue(torch.allclose(level.H, ref.H, atol=1e-5))
+                preds.append(ref(x_test))
+            if partition == 'random':
+                self.assertTrue(torch.allclose(model(x_test), torch.mean(torch.stack(preds), dim=0), atol=1e-5))
+
+    def test_ensemble_parallel(self):
+        """
+        The levels of the ensemble solved in parallel processes coincide with the ones solved sequentially.
+        """
+        y = torch.randn(self.NUM_DATA, 2)
+        x_test = torch.randn(10, self.DIM_INPUT)
+        models = []
+        for num_workers in [1, 2]:
+            torch.manual_seed(0)
+            model = kerch.model.Ensemble(sample=self.x, target=y, kernel_type='rbf', sigma=1., num_shards=3,
+                                         num_workers=num_workers)
+            model.solve()
+            models.append(model)
+        sequential, parallel = models
+        for shard_sequential, shard_parallel in zip(sequential.shards, parallel.shards):
+            self.assertTrue(torch.equal(shard_sequential, shard_parallel))
+        for level_sequential, level_parallel in zip(sequential.levels, parallel.levels):
+            self.assertTrue(torch.allclose(level_sequential.H, level_parallel.H, atol=1e-5))
+            self.assertTrue(torch.allclose(level_sequential.bias, level_parallel.bias, atol=1e-5))
+        self.assertTrue(torch.allclose(sequential(x_test), parallel(x_test), atol=1e-5))
+
+    def test_lssvm_online(self):
+        """
+        Adding and removing points with the updated factorization is equivalent to solving on the final sample.
+        """
+        y = torch.randn(self.NUM_DATA, 2)
+        for cls in [kerch.level.LSSVM, kerch.level.Ridge]:
+            model = cls(sample=self.x[:60, :], target=y[:60, :], kernel_type='rbf', sigma=2.)
+            model.solve()
+            model.partial_fit(self.x[60:, :], y[60:, :])
+            model.remove([0, 10, 99])
+            self.assertIn('cholesky_LSSVM_dual', model.cache_keys())
+            keep = [i for i in range(self.NUM_DATA) if i not in [0, 10, 99]]
+            ref = cls(sample=self.x[keep, :], target=y[keep, :], kernel_type='rbf', sigma=2.)
+            ref.solve()
+            self.assertTrue(torch.allclose(model.H, ref.H, atol=1e-4))
+            if ref.requires_bias:
+                self.assertTrue(torch.allclose(model.bias, ref.bias, atol=1e-5))
+
+        # the factor of the dual system does not include the scaling kappa of the view
+        model = kerch.level.LSSVM(sample=self.x[:60, :], target=y[:60, :], kernel_type='rbf', sigma=2., kappa=2.)
+        model.solve()
+        model.partial_fit(self.x[60:, :], y[60:, :])
+        ref = kerch.level.LSSVM(sample=self.x, target=y, kernel_type='rbf', sigma=2., kappa=2.)
+        ref.solve()
+        self.assertTrue(torch.allclose(model.H, ref.H, atol=1e-4))
+        self.assertTrue(torch.allclose(model.bias, ref.bias, atol=1e-5))
+        self.assertTrue(torch.allclose(model(self.x[:5, :]), ref(self.x[:5, :]), atol=1e-4))
+
+    def test_ppca_posterior(self):
+        """
+        The posterior of the PPCA computed by Cholesky factorizations in the latent space corresponds to the one with
+        explicit inverses.
+        """
+        for representation in ['primal', 'dual']:
+            model = kerch.level.PPCA(sample=self.x, kernel_type='linear', dim_output=2,
+                                     representation=representation)
+            model.solve()
+            noise = model.feature_noise ** 2 * torch.eye(2)
+            if representation == 'primal':
+                W, phi = model.W, model.phi()
+                h = phi @ W @ torch.linalg.inv(W.T @ W + noise)
+                cov = W @ W.T + model.feature_noise ** 2 * torch.eye(W.shape[0])
+                self.assertTrue(torch.allclose(model.h_map(phi=phi), h, atol=1e-4))
+                self.assertTrue(torch.allclose(model._B_primal.T @ model._B_primal, cov, atol=1e-4))
+                self.assertEqual(model.draw_phi(1000).shape, (1000, W.shape[0]))
+            else:
+                H, K = model.H, model.K
+                h = K @ H @ torch.linalg.inv(H.T @ K @ H + noise)
+                cov = K @ H @ H.T @ K + model.feature_noise ** 2 * K
+                self.assertTrue(torch.allclose(model.h_map(k=K), h, atol=1e-4))
+                self.assertTrue(torch.allclose(model._B_dual.T @ model._B_dual, cov, atol=1e-3))
+                self.assertEqual(model.draw_k(1000, posterior=True).shape, (1000, self.NUM_DATA))
+
+    def test_mvkpca_projection(self):
+        """
+        The cached projections of the multi-view KPCA correspond to the explicit inverse and the batched pre-images to
+        the pre-images of each view.
+        """
+        y = torch.cat((torch.sin(self.x[:, :2]), self.x[:, 2:] ** 2), dim=1)
+        model = kerch.level.MVKPCA({"name": "x", "kernel_type": "rbf", "sample": self.x, "sigma": 2.},
+                                   {"name": "y", "kernel_type": "rbf", "sample": y[:, :2], "sigma": 2.},
+                                   {"name": "z", "kernel_type": "rbf", "sample": y[:, 2:], "sigma": 2.},
+                                   dim_output=3)
+        model.solve()
+        x_test = torch.randn(5, self.DIM_INPUT)
+        K_predict, H = model.k(['y', 'z']), model.H
+        inv = torch.linalg.inv(torch.diag(model.vals) - H.T @ K_predict @ H)
+        projection = model.k({'x': x_test}) @ H @ inv @ H.T @ K_predict
+        self.assertTrue(torch.allclose(model.project({'x': x_test}), projection, atol=1e-4))
+        self.assertIn('MVKPCA_projector_dual_y_z', model.cache_keys())
+
+        prediction = model.predict({'x': x_test}, knn=3)
+        for name in ['y', 'z']:
+            preimage = model.view(name).kernel.implicit_preimage(projection, method='smoother', num=3)
+            self.assertTrue(torch.allclose(prediction[name], preimage, atol=1e-4))
+
+        model.solve()
+        self.assertNotIn('MVKPCA_projector_dual_y_z', model.cache_keys())
+
+
+if __name__ == '__main__':
+    unittest.main()